@@ -0,0 +1,133 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+CELL_KEYS = ("genre", "platform", "publisher", "year")
+# Regional sales summed per cell alongside Global_Sales, for the trend series
+REGION_SUMS = ("na_sales", "eu_sales", "jp_sales", "other_sales")
+# Capped: each worker is a full interpreter holding a partition's groupby
+AGG_WORKERS = int(os.environ.get("AGG_WORKERS", min(4, os.cpu_count() or 1)))
+# Below this many rows one groupby beats shipping partitions to worker processes
+PARALLEL_MIN_ROWS = int(os.environ.get("PARALLEL_MIN_ROWS", 4_000_000))
+
+
+# ---------------------------------------------
+# Partial and Merged Cells
+# ---------------------------------------------
+def partial_cells(columns, offset=0):
+    """Sales sum, count, max and max row per cell over one block of rows.
+
+    `columns` maps the cell keys, "sales" and any of REGION_SUMS to
+    equal-length arrays; regional columns are summed per cell too. Max rows
+    are shifted by `offset` so they are positions in the whole table.
+    """
+    frame = pd.DataFrame(columns)
+    # Rows missing a dimension value have no cell to live in
+    frame = frame[(frame[["genre", "platform", "publisher"]] >= 0).all(axis=1)]
+    grouped = frame.groupby(list(CELL_KEYS), sort=False)
+    cells = grouped["sales"].agg(["sum", "count", "max", "idxmax"])
+    regions = [column for column in REGION_SUMS if column in frame]
+    if regions:
+        cells = cells.join(grouped[regions].sum())
+    cells = cells.reset_index()
+    cells["idxmax"] += offset
+    return cells
+
+
+def merge_cells(partials):
+    """Combines per-partition cells: sums and counts add, the max keeps its earliest row.
+
+    Partials must be in row order; cells come out in order of first appearance,
+    as a single groupby over all rows would list them.
+    """
+    cells = pd.concat(partials, ignore_index=True)
+    keys = list(CELL_KEYS)
+    summed = ["sum", "count"] + [column for column in REGION_SUMS if column in cells]
+    totals = cells.groupby(keys, sort=False)[summed].sum()
+    best = (
+        cells.sort_values(["max", "idxmax"], ascending=[False, True], kind="stable")
+        .drop_duplicates(keys)
+        .set_index(keys)[["max", "idxmax"]]
+    )
+    return totals.join(best).reset_index()
+
+
+# ---------------------------------------------
+# Worker Pool over Shared Memory
+# ---------------------------------------------
+_pool_lock = threading.Lock()
+_executor = None
+
+
+def _pool():
+    """Spawned once on the first large aggregation and reused after; shut down at exit."""
+    global _executor
+    with _pool_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(AGG_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def shutdown_pool():
+    """Stops the worker processes; the next large aggregation spawns a new pool."""
+    global _executor
+    with _pool_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+# Registered per import, so a pool from a module instance replaced by a reload is stopped too
+atexit.register(shutdown_pool)
+
+
+def _partition_cells(blocks, length, start, stop, offset):
+    """Worker: aggregates rows start:stop of the shared columns."""
+    handles = [shared_memory.SharedMemory(name=name) for name, _ in blocks.values()]
+    try:
+        columns = {
+            column: np.ndarray(length, dtype=dtype, buffer=handle.buf)[start:stop]
+            for (column, (_, dtype)), handle in zip(blocks.items(), handles)
+        }
+        cells = partial_cells(columns, offset + start)
+        del columns  # Views must go before the segments close
+        return cells
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def aggregate_cells(columns, offset=0):
+    """Cells over all rows of `columns`, split by row range across the worker pool when large.
+
+    Each column is copied once into shared memory; workers map it rather
+    than receiving pickled slices, and only their partial cells come back.
+    """
+    rows = len(columns["sales"])
+    if AGG_WORKERS < 2 or rows < PARALLEL_MIN_ROWS:
+        return partial_cells(columns, offset)
+
+    handles, blocks = [], {}
+    try:
+        for column, values in columns.items():
+            handle = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            handles.append(handle)
+            np.ndarray(rows, dtype=values.dtype, buffer=handle.buf)[:] = values
+            blocks[column] = (handle.name, values.dtype.str)
+        bounds = np.linspace(0, rows, AGG_WORKERS + 1).astype(np.int64)
+        futures = [
+            _pool().submit(_partition_cells, blocks, rows, int(start), int(stop), offset)
+            for start, stop in zip(bounds[:-1], bounds[1:])
+            if stop > start
+        ]
+        return merge_cells([future.result() for future in futures])
+    finally:
+        for handle in handles:
+            handle.close()
+            handle.unlink()
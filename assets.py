@@ -0,0 +1,106 @@
+import base64
+import functools
+import json
+import os
+
+import streamlit as st
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Written by build_assets.py; absent until the asset build has run
+OPTIMIZED_DIR = os.path.join(STATIC_DIR, "optimized")
+MANIFEST_PATH = os.path.join(OPTIMIZED_DIR, "manifest.json")
+# Relative so the app also works behind a server.baseUrlPath prefix
+STATIC_URL = "app/static"
+MIME_TYPES = {
+    ".gif": "image/gif",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".mp4": "video/mp4",
+}
+
+
+# ---------------------------------------------
+# Asset Resolution
+# ---------------------------------------------
+def asset_path(name):
+    """Absolute path of a media asset in the static folder."""
+    return os.path.join(STATIC_DIR, name)
+
+
+def static_serving_enabled():
+    """True when Streamlit serves ./static at app/static."""
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def _data_uri(file_path, mtime_ns):
+    """Reads and encodes a file once per process (per modification time)."""
+    mime_type = MIME_TYPES[os.path.splitext(file_path)[1].lower()]
+    with open(file_path, "rb") as f:
+        return f"data:{mime_type};base64,{base64.b64encode(f.read()).decode('utf-8')}"
+
+
+@functools.lru_cache(maxsize=4)
+def _read_manifest(mtime_ns):
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f).get("assets", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def load_manifest():
+    """Returns the optimized-asset manifest, re-read only when the file changes."""
+    try:
+        mtime_ns = os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    return _read_manifest(mtime_ns)
+
+
+def asset_variants(name):
+    """Optimized variants of an asset from the manifest, narrowest first."""
+    variants = load_manifest().get(name, {}).get("variants", [])
+    return sorted(
+        (v for v in variants if os.path.isfile(asset_path(v["path"]))),
+        key=lambda v: v["width"],
+    )
+
+
+def pick_variant(name, width=None):
+    """Name of the file to serve for `name`: the narrowest optimized variant at
+    least `width` px wide (the widest one when width is None), or the original."""
+    variants = asset_variants(name)
+    if not variants:
+        return name
+    if width is not None:
+        for variant in variants:
+            if variant["width"] >= width:
+                return variant["path"]
+    return variants[-1]["path"]
+
+
+def asset_url(name, width=None):
+    """Returns a browser URL for a media asset in the static folder.
+
+    Optimized variants from the manifest are preferred over the original.
+    With static serving on, this is a short app/static URL that the browser
+    caches (ETag/Last-Modified) across reruns. Otherwise it falls back to a
+    data URI that is encoded once per process. Raises FileNotFoundError or
+    ValueError for missing or unsupported files.
+    """
+    if os.path.isfile(asset_path(name)):
+        name = pick_variant(name, width)
+    path = asset_path(name)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(path)
+    if os.path.splitext(name)[1].lower() not in MIME_TYPES:
+        raise ValueError(f"Unsupported file type: {name}")
+    if static_serving_enabled():
+        return f"{STATIC_URL}/{name}"
+    return _data_uri(path, os.stat(path).st_mtime_ns)
@@ -0,0 +1,265 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmark_snapshot import write_scaled_csv
+from instrumentation import REGISTRY, peak_rss_bytes, process_rss_bytes, reset_peak_rss
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gaming_dashboard.py")
+# AppTest accessor for each filter widget key
+WIDGETS = {
+    "filter_genres_unique": "multiselect",
+    "filter_platforms_unique": "multiselect",
+    "filter_publishers_unique": "multiselect",
+    "filter_year_range_unique": "slider",
+}
+# Recorded filter session: each step sets some widgets, then the app reruns
+SCENARIO = [
+    {"filter_genres_unique": ["Action"]},
+    {"filter_genres_unique": ["Action", "Shooter"]},
+    {"filter_platforms_unique": ["PS2"]},
+    {"filter_platforms_unique": ["PS2", "X360", "Wii"]},
+    {"filter_year_range_unique": [2005, 2010]},
+    {"filter_publishers_unique": ["Nintendo", "Electronic Arts"]},
+    {"filter_genres_unique": []},
+    {"filter_year_range_unique": [1990, 2016]},
+    {"filter_publishers_unique": []},
+    {"filter_platforms_unique": ["DS"]},
+    {"filter_genres_unique": ["Sports", "Racing"], "filter_platforms_unique": []},
+    {"filter_genres_unique": ["Role-Playing"], "filter_platforms_unique": ["GB", "DS", "3DS"]},
+    {"filter_year_range_unique": [1980, 2020]},
+    {"filter_genres_unique": [], "filter_platforms_unique": []},
+]
+# Metrics compared against a baseline report; all are lower-is-better
+COMPARED = ["cold_ms", "rerun_ms_median", "rerun_ms_p95", "payload_kb_median", "peak_rss_mb"]
+
+
+# ---------------------------------------------
+# Payload Meter
+# ---------------------------------------------
+_payloads = []
+# Hashes of the large messages the simulated browser already holds
+_browser_cache = set()
+
+
+def _meter_payloads():
+    """Records the bytes each AppTest run sends to a browser that caches large messages.
+
+    AppTest reports no cached messages, so Streamlit sends everything in
+    full; a real browser lists the hashes it holds and gets references to
+    those instead, which is what is counted here. The hooks are Streamlit
+    internals: when a release drops them, nothing is recorded and the
+    report shows the payload as unavailable.
+    """
+    try:
+        from streamlit.runtime import forward_msg_cache
+        from streamlit.testing.v1 import local_script_runner
+    except ImportError:
+        return
+    create_reference_msg = getattr(forward_msg_cache, "create_reference_msg", None)
+    runner_class = getattr(local_script_runner, "LocalScriptRunner", None)
+    forward_msgs = getattr(runner_class, "forward_msgs", None)
+    if create_reference_msg is None or forward_msgs is None:
+        return
+
+    def metered(runner):
+        messages = forward_msgs(runner)
+        size = 0
+        for message in messages:
+            if message.metadata.cacheable and message.hash in _browser_cache:
+                size += create_reference_msg(message).ByteSize()
+            else:
+                size += message.ByteSize()
+                if message.metadata.cacheable:
+                    _browser_cache.add(message.hash)
+        _payloads.append(size)
+        return messages
+
+    runner_class.forward_msgs = metered
+
+
+# ---------------------------------------------
+# Worker: one scenario replay at one scale
+# ---------------------------------------------
+def _rerun(at, label):
+    """Runs the app once and returns that rerun's measurements."""
+    start = time.perf_counter()
+    at.run()
+    wall_s = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{label}: {at.exception[0].value}")
+    trace = json.loads(REGISTRY.json_lines().splitlines()[-1])
+    return {
+        "step": label,
+        "wall_ms": wall_s * 1000,
+        "payload_kb": _payloads[-1] / 1024 if _payloads else None,
+        "rss_mb": process_rss_bytes() / 2**20,
+        "spans_ms": trace["spans_ms"],
+        "counters": trace["counters"],
+    }
+
+
+def replay(csv_path, scenario, repeats, timeout):
+    """Loads the dashboard on `csv_path` and replays the scenario `repeats` times in a fresh process."""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["DASHBOARD_DATA"] = csv_path
+    _meter_payloads()
+    baseline = process_rss_bytes()  # Interpreter and Streamlit, before the app runs
+    reset_peak_rss()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    reruns = [_rerun(at, "cold")]
+    for repeat in range(repeats):
+        for i, step in enumerate(scenario):
+            for key, value in step.items():
+                widget = getattr(at, WIDGETS[key])(key=key)
+                widget.set_value(tuple(value) if WIDGETS[key] == "slider" else value)
+            reruns.append(_rerun(at, f"{repeat}.{i}"))
+    return {
+        "baseline_rss_mb": baseline / 2**20,
+        "peak_rss_mb": peak_rss_bytes() / 2**20,
+        "reruns": reruns,
+    }
+
+
+def summarize(result):
+    warm = sorted(rerun["wall_ms"] for rerun in result["reruns"][1:])
+    payloads = [rerun["payload_kb"] for rerun in result["reruns"][1:] if rerun["payload_kb"] is not None]
+    return {
+        "cold_ms": result["reruns"][0]["wall_ms"],
+        "rerun_ms_median": statistics.median(warm),
+        "rerun_ms_p95": warm[int(0.95 * (len(warm) - 1))],
+        "payload_kb_median": statistics.median(payloads) if payloads else None,
+        "payload_kb_max": max(payloads) if payloads else None,
+        "baseline_rss_mb": result["baseline_rss_mb"],
+        "peak_rss_mb": result["peak_rss_mb"],
+    }
+
+
+# ---------------------------------------------
+# Benchmark and Baseline Comparison
+# ---------------------------------------------
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(APP_PATH),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(source_path, factors, scenario, repeats, backend, timeout, synthetic=False):
+    # Fresh snapshots, database and model directory; no background training competes with reruns
+    tmp_dir = tempfile.mkdtemp(prefix="benchmark_dashboard_")
+    os.environ.update({
+        "VGSALES_SNAPSHOT_DIR": os.path.join(tmp_dir, "snapshots"),
+        "VGSALES_MODEL_DIR": os.path.join(tmp_dir, "models"),
+        "MODEL_WORKERS": "0",
+        "DASHBOARD_BACKEND": backend,
+    })
+    scales = []
+    # One process per scale, so memory and caches start cold each time
+    context = multiprocessing.get_context("spawn")
+    for factor in factors:
+        csv_path = os.path.join(tmp_dir, f"vgsales_x{factor}.csv")
+        write_scaled_csv(source_path, csv_path, factor, synthetic)
+        os.environ["VGSALES_DB"] = os.path.join(tmp_dir, f"vgsales_x{factor}.db")
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            result = pool.submit(replay, csv_path, scenario, repeats, timeout).result()
+        with open(csv_path) as f:
+            rows = sum(1 for _ in f) - 1
+        scales.append({"factor": factor, "rows": rows, **summarize(result), **result})
+        os.remove(csv_path)
+
+    return {
+        "commit": git_commit(),
+        "source": os.path.basename(source_path),
+        "backend": backend,
+        "synthetic": synthetic,
+        "steps": len(scenario),
+        "repeats": repeats,
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "streamlit": __import__("streamlit").__version__,
+        },
+        "scales": scales,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Lines describing every metric that got worse than the baseline by more than `tolerance`."""
+    regressions = []
+    previous = {scale["factor"]: scale for scale in baseline["scales"]}
+    for scale in report["scales"]:
+        before = previous.get(scale["factor"])
+        if before is None:
+            continue
+        for metric in COMPARED:
+            if before.get(metric) is None or scale[metric] is None:
+                continue  # Not measured in one of the runs
+            if before[metric] > 0 and scale[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{scale['factor']}x {metric}: {before[metric]:.1f} -> {scale[metric]:.1f} "
+                    f"(+{scale[metric] / before[metric] - 1:.0%})"
+                )
+    return regressions
+
+
+def _kb(value):
+    return "n/a" if value is None else f"{value:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded filter interactions against the dashboard headlessly.")
+    parser.add_argument("--source", default="vgsales.csv")
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--scenario", help="JSON list of {widget key: value} steps (default: built-in session)")
+    parser.add_argument("--repeats", type=int, default=2, help="Times the scenario is replayed after the cold load")
+    parser.add_argument("--backend", choices=["pandas", "sqlite"], default="pandas")
+    parser.add_argument("--synthetic", action="store_true", help="Generate scaled inputs instead of repeating the source")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed per rerun")
+    parser.add_argument("--output", default="benchmark_dashboard.json")
+    parser.add_argument("--baseline", help="Earlier report to compare against; exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a metric regresses")
+    args = parser.parse_args()
+
+    scenario = SCENARIO
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+
+    report = run_benchmark(args.source, args.factors, scenario, args.repeats, args.backend, args.timeout,
+                           args.synthetic)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"commit {report['commit']}, {args.backend} backend, {len(scenario)} steps x {args.repeats}")
+    print(f"{'scale':>6} {'rows':>10} {'cold ms':>9} {'rerun ms':>16} {'payload KB':>11} {'peak MB':>8}")
+    for s in report["scales"]:
+        print(f"{s['factor']:>5}x {s['rows']:>10} {s['cold_ms']:>9.0f} "
+              f"{s['rerun_ms_median']:>7.0f}/{s['rerun_ms_p95']:<8.0f} {_kb(s['payload_kb_median']):>11} "
+              f"{s['peak_rss_mb']:>8.0f}")
+    print(f"report -> {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from data_store import load_sales_data
+from instrumentation import peak_rss_bytes, process_rss_bytes, reset_peak_rss
+from sales_models import FEATURES, MODELS, TARGET, build_model, training_frame
+
+
+# ---------------------------------------------
+# Worker: one model on one fold
+# ---------------------------------------------
+def run_fold(name, fold, X_train, y_train, X_test, y_test):
+    """Fits and scores one model on one fold in a fresh worker process.
+
+    Peak memory covers fit and predict only: the peak mark is reset after
+    the imports and the fold's arrays are in place.
+    """
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    model = build_model(name)
+    baseline = process_rss_bytes()  # Interpreter, sklearn and the fold's arrays
+    reset_peak_rss()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    predicted = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+    peak = peak_rss_bytes()
+    return {
+        "model": name,
+        "fold": fold,
+        "MSE": float(mean_squared_error(y_test, predicted)),
+        "R2": float(r2_score(y_test, predicted)),
+        "fit_s": fit_s,
+        "predict_ms_per_1k": predict_s * 1000 / len(X_test) * 1000,
+        "peak_rss_mb": peak / 2**20,
+        "peak_over_baseline_mb": (peak - baseline) / 2**20,
+    }
+
+
+# ---------------------------------------------
+# Cross-validated Benchmark
+# ---------------------------------------------
+def summarize(folds):
+    """Mean and spread per metric over a model's folds."""
+    summary = {}
+    for metric in ["MSE", "R2", "fit_s", "predict_ms_per_1k"]:
+        values = [fold[metric] for fold in folds]
+        summary[f"{metric}_mean"] = statistics.fmean(values)
+        summary[f"{metric}_std"] = statistics.stdev(values) if len(values) > 1 else 0.0
+    summary["peak_rss_mb_max"] = max(fold["peak_rss_mb"] for fold in folds)
+    summary["peak_over_baseline_mb_max"] = max(fold["peak_over_baseline_mb"] for fold in folds)
+    return summary
+
+
+def run_isolated(context, *args):
+    """run_fold in a worker process of its own, which exits once the fold is scored."""
+    with ProcessPoolExecutor(1, mp_context=context) as pool:
+        return pool.submit(run_fold, *args).result()
+
+
+def run_benchmark(source_path, models, n_folds, workers, seed):
+    from sklearn.model_selection import KFold
+
+    frame, _ = training_frame(load_sales_data(source_path))
+    X, y = frame[FEATURES].to_numpy(), frame[TARGET].to_numpy()
+    splits = list(KFold(n_splits=n_folds, shuffle=True, random_state=seed).split(X))
+
+    # One task per process, so no fit inherits another's heap; `workers` threads
+    # each wait on one such process at a time
+    context = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        futures = [
+            pool.submit(run_isolated, context, name, fold, X[train], y[train], X[test], y[test])
+            for name in models
+            for fold, (train, test) in enumerate(splits)
+        ]
+        results = [future.result() for future in futures]
+    wall_s = time.perf_counter() - start
+
+    return {
+        "source": os.path.basename(source_path),
+        "rows": len(X),
+        "features": FEATURES,
+        "folds": n_folds,
+        "seed": seed,
+        "workers": workers,
+        "wall_s": wall_s,
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": __import__("sklearn").__version__,
+        },
+        "models": {
+            name: {
+                "estimator": MODELS[name][1],
+                "params": MODELS[name][2],
+                **summarize([r for r in results if r["model"] == name]),
+                "per_fold": [r for r in results if r["model"] == name],
+            }
+            for name in models
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validate the sales regressors in parallel.")
+    parser.add_argument("--source", default="vgsales.csv")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS), metavar="MODEL")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_models.json")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.source, args.models, args.folds, args.workers, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{report['rows']} rows, {args.folds}-fold CV, {args.workers} workers, {report['wall_s']:.1f}s wall")
+    print(f"{'model':<18} {'MSE':>14} {'R2':>14} {'fit s':>8} {'ms/1k':>8} {'peak MB':>8}")
+    for name, r in report["models"].items():
+        print(
+            f"{name:<18} {r['MSE_mean']:>7.3f}±{r['MSE_std']:<6.3f} {r['R2_mean']:>7.3f}±{r['R2_std']:<6.3f} "
+            f"{r['fit_s_mean']:>8.2f} {r['predict_ms_per_1k_mean']:>8.2f} {r['peak_over_baseline_mb_max']:>8.1f}"
+        )
+    print(f"report -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
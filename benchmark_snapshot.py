@@ -0,0 +1,86 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from data_store import read_sales_csv, read_snapshot, write_snapshot
+from synthetic_sales import write_sales
+
+
+# ---------------------------------------------
+# Scaled Copies of the Dataset
+# ---------------------------------------------
+def write_scaled_csv(source_path, target_path, factor, synthetic=False):
+    """Writes the source CSV with its data rows repeated `factor` times.
+
+    With `synthetic`, writes as many generated rows with the source's
+    distributions instead of exact repeats.
+    """
+    with open(source_path) as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith("\n"):
+        body += "\n"
+    if synthetic:
+        write_sales(source_path, target_path, body.count("\n") * factor)
+        return
+    with open(target_path, "w") as f:
+        f.write(header)
+        for _ in range(factor):
+            f.write(body)
+
+
+def time_call(func, repeats):
+    """Returns the median wall time of `func` over `repeats` runs."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+# ---------------------------------------------
+# CSV vs Snapshot Load Benchmark
+# ---------------------------------------------
+def run_benchmark(source_path, factors, repeats, synthetic=False):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for factor in factors:
+            csv_path = os.path.join(tmp_dir, f"vgsales_x{factor}.csv")
+            write_scaled_csv(source_path, csv_path, factor, synthetic)
+            data = read_sales_csv(csv_path)
+            snapshot_path = write_snapshot(data, csv_path, snapshot_dir="snapshots")
+
+            csv_time = time_call(lambda: read_sales_csv(csv_path), repeats)
+            snapshot_time = time_call(lambda: read_snapshot(snapshot_path), repeats)
+            results.append({
+                "factor": factor,
+                "rows": len(data),
+                "csv_mb": os.path.getsize(csv_path) / 1e6,
+                "snapshot_mb": os.path.getsize(snapshot_path) / 1e6,
+                "csv_s": csv_time,
+                "snapshot_s": snapshot_time,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV parsing with snapshot loading.")
+    parser.add_argument("--source", default="vgsales.csv")
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--synthetic", action="store_true", help="Generate scaled inputs instead of repeating the source")
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'rows':>10} {'csv MB':>8} {'snap MB':>8} {'csv s':>8} {'snap s':>8} {'speedup':>8}")
+    for r in run_benchmark(args.source, args.factors, args.repeats, args.synthetic):
+        print(
+            f"{r['factor']:>5}x {r['rows']:>10} {r['csv_mb']:>8.1f} {r['snapshot_mb']:>8.1f} "
+            f"{r['csv_s']:>8.3f} {r['snapshot_s']:>8.3f} {r['csv_s'] / r['snapshot_s']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmark_snapshot import write_scaled_csv
+from data_store import memory_report, read_sales_csv
+from filter_engine import FilterEngine
+from sales_cube import SalesCube
+from sql_backend import SqlSalesDataset, build_database
+
+
+# ---------------------------------------------
+# Random Filter Panel Selections
+# ---------------------------------------------
+def random_selections(options, count, seed=0):
+    """Selections shaped like the filter panel's: a few genres and/or platforms plus a year range."""
+    rng = random.Random(seed)
+    selections = []
+    for _ in range(count):
+        genres = rng.sample(options["Genre"], rng.randint(0, 3))
+        platforms = rng.sample(options["Platform"], rng.randint(0 if genres else 1, 3))
+        publishers = rng.sample(options["Publisher"], rng.randint(1, 3)) if rng.random() < 0.2 else []
+        selections.append({
+            "genres": genres,
+            "platforms": platforms,
+            "publishers": publishers,
+            "year_range": tuple(sorted(rng.sample(range(1980, 2021), 2))),
+        })
+    return selections
+
+
+def pandas_rollup(data, genres=(), platforms=(), publishers=(), year_range=None):
+    """The in-memory pandas path: boolean masks, then groupbys over the filtered rows."""
+    mask = data["Year"].between(*year_range) if year_range is not None else True
+    if genres:
+        mask &= data["Genre"].isin(genres)
+    if platforms:
+        mask &= data["Platform"].isin(platforms)
+    if publishers:
+        mask &= data["Publisher"].isin(publishers)
+    filtered = data[mask]
+    return {
+        "sales_by_year": filtered.groupby("Year")["Global_Sales"].sum(),
+        "avg_sales_by_year": filtered.groupby("Year")["Global_Sales"].mean(),
+        "sales_by_genre": filtered.groupby("Genre", observed=True)["Global_Sales"].sum(),
+        "publishers_by_genre": filtered.groupby("Genre", observed=True)["Publisher"].nunique(),
+        "best_selling_game": filtered.loc[filtered["Global_Sales"].idxmax(), "Name"] if len(filtered) else None,
+    }
+
+
+def time_queries(func, selections):
+    """Returns (median, p95) seconds per selection."""
+    timings = []
+    for selection in selections:
+        start = time.perf_counter()
+        func(selection)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.median(timings), timings[int(0.95 * (len(timings) - 1))]
+
+
+# ---------------------------------------------
+# pandas vs SQLite Benchmark
+# ---------------------------------------------
+def run_benchmark(source_path, factors, queries, synthetic=False):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for factor in factors:
+            csv_path = os.path.join(tmp_dir, f"vgsales_x{factor}.csv")
+            db_path = os.path.join(tmp_dir, f"vgsales_x{factor}.db")
+            write_scaled_csv(source_path, csv_path, factor, synthetic)
+            data = read_sales_csv(csv_path)
+            engine, cube = FilterEngine(data), SalesCube(data)
+            start = time.perf_counter()
+            build_database(data, db_path)
+            build_s = time.perf_counter() - start
+            sql = SqlSalesDataset(db_path)
+            selections = random_selections(engine.options, queries)
+
+            results.append({
+                "factor": factor,
+                "rows": len(data),
+                "memory_mb": (memory_report(data).loc["Total", "bytes"] + engine.nbytes()) / 1e6,
+                "db_mb": os.path.getsize(db_path) / 1e6,
+                "build_s": build_s,
+                "pandas": time_queries(lambda s: pandas_rollup(data, **s), selections),
+                "cube": time_queries(lambda s: cube.rollup(**s), selections),
+                "sqlite": time_queries(sql._rollup, selections),
+            })
+            sql.pool.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the pandas and SQLite query paths.")
+    parser.add_argument("--source", default="vgsales.csv")
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--synthetic", action="store_true", help="Generate scaled inputs instead of repeating the source")
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'rows':>10} {'mem MB':>8} {'db MB':>8} {'build s':>8} "
+          f"{'pandas ms':>14} {'cube ms':>14} {'sqlite ms':>14}   (median / p95)")
+    for r in run_benchmark(args.source, args.factors, args.queries, args.synthetic):
+        timings = " ".join(
+            f"{r[path][0] * 1000:>6.2f}/{r[path][1] * 1000:<7.2f}" for path in ("pandas", "cube", "sqlite")
+        )
+        print(f"{r['factor']:>5}x {r['rows']:>10} {r['memory_mb']:>8.1f} {r['db_mb']:>8.1f} "
+              f"{r['build_s']:>8.2f} {timings}")
+
+
+if __name__ == "__main__":
+    main()
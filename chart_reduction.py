@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Most categories drawn before the rest are folded into "Other"
+CHART_TOP_N = int(os.environ.get("CHART_TOP_N", 20))
+# Most points drawn per time series
+CHART_MAX_POINTS = int(os.environ.get("CHART_MAX_POINTS", 500))
+# Upper bound on the data serialized into one figure, in bytes
+CHART_BUDGET_BYTES = int(os.environ.get("CHART_BUDGET_BYTES", 64 * 1024))
+OTHER_LABEL = "Other"
+
+
+def payload_bytes(frame):
+    """Size of a chart frame's values as JSON, which is how Plotly ships them."""
+    return len(frame.to_json(orient="values"))
+
+
+# ---------------------------------------------
+# Reductions
+# ---------------------------------------------
+def top_n(frame, label, value, n):
+    """The `n` - 1 largest rows by `value` plus one "Other" row summing the rest."""
+    if len(frame) <= n:
+        return frame
+    ranked = frame.sort_values(value, ascending=False, kind="stable")
+    kept = ranked.iloc[:n - 1]
+    other = pd.DataFrame({label: [OTHER_LABEL], value: [ranked[value].iloc[n - 1:].sum()]})
+    kept = kept[[label, value]].astype({label: str})
+    return pd.concat([kept, other], ignore_index=True)
+
+
+def lttb_indices(x, y, threshold):
+    """Positions of the points Largest-Triangle-Three-Buckets keeps out of (x, y).
+
+    The first and last points always stay; every bucket in between keeps the
+    point forming the largest triangle with the previous pick and the next
+    bucket's mean, which preserves peaks and troughs a stride sample drops.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[stop:edges[i + 2]].mean(), y[stop:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(frame, x, y, max_points):
+    """The frame thinned to `max_points` rows with LTTB, in x order."""
+    if len(frame) <= max_points:
+        return frame
+    frame = frame.sort_values(x, kind="stable")
+    return frame.iloc[lttb_indices(frame[x].to_numpy(), frame[y].to_numpy(), max_points)]
+
+
+# ---------------------------------------------
+# Budgeted Chart Frames
+# ---------------------------------------------
+def _within_budget(frame, reduce, limit, budget):
+    """Applies `reduce` at `limit`, halving the limit until the data fits `budget`."""
+    reduced = reduce(frame, limit)
+    while limit > 3 and payload_bytes(reduced) > budget:
+        limit //= 2
+        reduced = reduce(frame, limit)
+    return reduced
+
+
+def reduce_categories(frame, label, value, noun, top=None, budget=None):
+    """Chart frame for a categorical breakdown and a note if groups were folded into "Other"."""
+    reduced = _within_budget(
+        frame, lambda f, n: top_n(f, label, value, n), top or CHART_TOP_N, budget or CHART_BUDGET_BYTES
+    )
+    if len(reduced) == len(frame):
+        return frame, None
+    return reduced, f"Top {len(reduced) - 1} of {len(frame)} {noun}; the other {len(frame) - len(reduced) + 1} are grouped as \"{OTHER_LABEL}\"."
+
+
+def reduce_series(frame, x, y, noun, max_points=None, budget=None):
+    """Chart frame for a time series and a note if it was downsampled."""
+    reduced = _within_budget(
+        frame, lambda f, n: downsample(f, x, y, n), max_points or CHART_MAX_POINTS, budget or CHART_BUDGET_BYTES
+    )
+    if len(reduced) == len(frame):
+        return frame, None
+    return reduced, f"{len(frame):,} {noun} downsampled to {len(reduced):,} points (LTTB)."
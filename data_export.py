@@ -0,0 +1,475 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from data_store import _write_atomic
+
+# Finished exports are written here, one file per job
+EXPORT_DIR = os.environ.get("VGSALES_EXPORT_DIR", ".exports")
+# Rows encoded at a time: the most any export holds beyond the table itself
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 100_000))
+# Threads, not processes: a worker reads the table in place instead of copying it
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", 1))
+# Seconds a finished job (and its file) is kept; the jobs are shared by every
+# session, so a file goes by age, never because other sessions exported more
+EXPORT_TTL = float(os.environ.get("EXPORT_TTL_SECONDS", 3600))
+
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+# Chart aggregates, as named in the rollup
+AGGREGATES = ("sales_by_year", "avg_sales_by_year", "sales_by_genre", "publishers_by_genre")
+EXPORT_KINDS = ("rows",) + AGGREGATES
+
+
+# ---------------------------------------------
+# Chunked Tables
+# ---------------------------------------------
+def _check_export(kind, fmt):
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export {kind!r}; expected one of {', '.join(EXPORT_KINDS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+
+
+def arrow_chunk(frame, dictionaries):
+    """An Arrow table of one chunk, categoricals decoded to plain strings.
+
+    Converting a categorical as is would carry its whole dictionary (every
+    title in the table) into every chunk; taking the chunk's values from a
+    dictionary converted once keeps each chunk proportional to its rows.
+    """
+    columns = {}
+    for name in frame.columns:
+        column = frame[name]
+        if hasattr(column, "cat"):
+            if name not in dictionaries:
+                dictionaries[name] = pa.array(column.cat.categories, type=pa.large_string())
+            codes = column.cat.codes.to_numpy()
+            columns[name] = dictionaries[name].take(pa.array(codes, mask=codes < 0))
+        else:
+            columns[name] = pa.array(column, from_pandas=True)
+    return pa.table(columns)
+
+
+def export_tables(dataset, selection, kind="rows", chunk_rows=EXPORT_CHUNK_ROWS):
+    """Arrow tables of a selection's rows, chunk_rows at a time, or of one chart aggregate."""
+    if kind == "rows":
+        dictionaries = {}
+        for frame in dataset.row_chunks(selection, chunk_rows):
+            yield arrow_chunk(frame, dictionaries)
+    elif kind in AGGREGATES:
+        yield pa.Table.from_pandas(dataset.rollup(selection)[kind], preserve_index=False)
+    else:
+        raise ValueError(f"Unknown export {kind!r}; expected one of {', '.join(EXPORT_KINDS)}")
+
+
+# ---------------------------------------------
+# Encoding
+# ---------------------------------------------
+class _DrainSink:
+    """A write-only file the Parquet writer fills and encode() empties after every row group."""
+
+    def __init__(self):
+        self.closed = False
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position  # Offsets in the footer count every byte ever written
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def encode(tables, fmt):
+    """Yields the bytes of a CSV or Parquet file as each table is encoded.
+
+    CSV repeats no header after the first chunk; Parquet writes one row
+    group per chunk and its footer last.
+    """
+    if fmt == "csv":
+        include_header = True
+        for table in tables:
+            sink = pa.BufferOutputStream()
+            pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=include_header))
+            include_header = False
+            yield sink.getvalue()
+    elif fmt == "parquet":
+        sink, writer = _DrainSink(), None
+        for table in tables:
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table)
+            yield sink.drain()
+        if writer is not None:
+            writer.close()
+            yield sink.drain()
+    else:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+
+
+def export_file_name(kind, fmt):
+    return f"vgsales_{kind}.{fmt}"
+
+
+# ---------------------------------------------
+# Background Jobs
+# ---------------------------------------------
+class ExportJob:
+    """One export: its request, progress and result file."""
+
+    def __init__(self, kind, fmt, selection, total_rows):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.format = fmt
+        self.selection = selection
+        self.total_rows = total_rows
+        self.status = "queued"  # -> running -> done | failed | cancelled
+        self.rows = 0
+        self.bytes = 0
+        self.path = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancelled = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def file_name(self):
+        return export_file_name(self.kind, self.format)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "format": self.format,
+            "selection": self.selection,
+            "status": self.status,
+            "rows": self.rows,
+            "total_rows": self.total_rows,
+            "bytes": self.bytes,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ExportJobs:
+    """Runs exports on a small thread pool and keeps their files in EXPORT_DIR for EXPORT_TTL seconds.
+
+    submit() returns at once, so a session's reruns never wait on an
+    export. Encoding and compression run in Arrow with the GIL released,
+    and each job holds a single chunk beyond the shared table.
+    """
+
+    def __init__(self, export_dir=EXPORT_DIR, max_workers=EXPORT_WORKERS):
+        self.export_dir = export_dir
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self._executor = None
+        self._jobs = {}
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="export")
+        return self._executor
+
+    def submit(self, dataset, selection, kind="rows", fmt="csv", chunk_rows=EXPORT_CHUNK_ROWS):
+        """Queues an export of a selection; returns the job id."""
+        _check_export(kind, fmt)
+        selection = {key: (list(value) if isinstance(value, (list, tuple)) else value)
+                     for key, value in selection.items()}
+        total_rows = dataset.rollup(selection)["rows"] if kind == "rows" else None
+        job = ExportJob(kind, fmt, selection, total_rows)
+        with self.lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool().submit(self._run, job, dataset, chunk_rows)
+        return job.id
+
+    def _run(self, job, dataset, chunk_rows):
+        if job.cancelled.is_set():
+            return
+        job.status = "running"
+        path = os.path.join(self.export_dir, f"{job.id}.{job.format}")
+
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                for data in encode(self._counted(job, export_tables(dataset, job.selection, job.kind, chunk_rows)),
+                                   job.format):
+                    if job.cancelled.is_set():
+                        raise InterruptedError
+                    f.write(data)
+                    job.bytes += len(data)
+
+        try:
+            _write_atomic(path, write)
+        except InterruptedError:
+            job.status = "cancelled"
+        except Exception as error:
+            job.status, job.error = "failed", repr(error)
+        else:
+            job.path, job.status = path, "done"
+        job.finished_at = time.time()
+
+    @staticmethod
+    def _counted(job, tables):
+        for table in tables:
+            yield table
+            job.rows += table.num_rows
+
+    def _prune(self):
+        expired = [job for job in self._jobs.values()
+                   if job.finished_at is not None and time.time() - job.finished_at > EXPORT_TTL]
+        for job in expired:
+            del self._jobs[job.id]
+            if job.path is not None and os.path.exists(job.path):
+                os.remove(job.path)
+
+    def get(self, job_id):
+        """The job with this id, or None once it has expired."""
+        with self.lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self.lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """Stops a queued or running job at its next chunk; returns whether it was active."""
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return False
+        job.cancelled.set()
+        if job.status == "queued":
+            job.status, job.finished_at = "cancelled", time.time()
+        return True
+
+    def shutdown(self):
+        # Queued jobs see the flag and return at once; running ones stop at their next chunk
+        for job in self.jobs():
+            job.cancelled.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+# ---------------------------------------------
+# HTTP Endpoint
+# ---------------------------------------------
+def selection_from_query(params, dataset):
+    """A filter-panel selection from genre/platform/publisher (repeatable) and year_min/year_max."""
+    return {
+        "genres": params.get("genre", []),
+        "platforms": params.get("platform", []),
+        "publishers": params.get("publisher", []),
+        "year_range": (
+            int(params.get("year_min", [dataset.year_min])[0]),
+            int(params.get("year_max", [dataset.year_max])[0]),
+        ),
+    }
+
+
+def _export_params(params):
+    return params.get("kind", ["rows"])[0], params.get("format", ["csv"])[0]
+
+
+class _ExportHandler(BaseHTTPRequestHandler):
+    """GET /export streams a selection; POST /jobs queues one; /jobs/<id>[/file] reports and serves it."""
+
+    protocol_version = "HTTP/1.1"  # Chunked transfer encoding
+
+    def _request(self):
+        """The path's segments and the query parameters."""
+        url = urlsplit(self.path)
+        return [part for part in url.path.split("/") if part], parse_qs(url.query)
+
+    def do_GET(self):
+        parts, params = self._request()
+        if parts == ["export"]:
+            self._stream_export(params)
+        elif parts == ["jobs"]:
+            self._send_json(200, [job.to_dict() for job in self.server.jobs.jobs()])
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.server.jobs.get(parts[1])
+            if job is None:
+                self._send_json(404, {"error": "no such job"})
+            elif len(parts) == 2:
+                self._send_json(200, job.to_dict())
+            elif parts[2] == "file" and job.status == "done":
+                self._send_file(job)
+            else:
+                self._send_json(409 if parts[2] == "file" else 404, job.to_dict())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts, params = self._request()
+        if parts != ["jobs"]:
+            self._send_json(404, {"error": "not found"})
+            return
+        dataset = self._dataset()
+        try:
+            job_id = self.server.jobs.submit(dataset, selection_from_query(params, dataset), *_export_params(params))
+        except ValueError as error:
+            self._send_json(400, {"error": str(error)})
+            return
+        self._send_json(202, self.server.jobs.get(job_id).to_dict())
+
+    def do_DELETE(self):
+        parts, _ = self._request()
+        if len(parts) != 2 or parts[0] != "jobs" or self.server.jobs.get(parts[1]) is None:
+            self._send_json(404, {"error": "no such job"})
+            return
+        self.server.jobs.cancel(parts[1])
+        self._send_json(200, self.server.jobs.get(parts[1]).to_dict())
+
+    def _dataset(self):
+        dataset = self.server.dataset
+        dataset.refresh()
+        return dataset
+
+    def _stream_export(self, params):
+        kind, fmt = _export_params(params)
+        dataset = self._dataset()
+        try:
+            _check_export(kind, fmt)
+            selection = selection_from_query(params, dataset)
+        except ValueError as error:
+            self._send_json(400, {"error": str(error)})
+            return
+        tables = export_tables(dataset, selection, kind)
+        self.send_response(200)
+        self.send_header("Content-Type", EXPORT_FORMATS[fmt])
+        self.send_header("Content-Disposition", f'attachment; filename="{export_file_name(kind, fmt)}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for data in encode(tables, fmt):
+            if len(data):
+                self.wfile.write(f"{len(data):x}\r\n".encode())
+                self.wfile.write(data)
+                self.wfile.write(b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_file(self, job):
+        self.send_response(200)
+        self.send_header("Content-Type", EXPORT_FORMATS[job.format])
+        self.send_header("Content-Disposition", f'attachment; filename="{job.file_name}"')
+        self.send_header("Content-Length", str(os.path.getsize(job.path)))
+        self.end_headers()
+        with open(job.path, "rb") as f:
+            while data := f.read(1 << 20):
+                self.wfile.write(data)
+
+    def _send_json(self, status, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_exports(dataset, jobs, port, host="127.0.0.1"):
+    """Serves /export and /jobs for a dataset from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _ExportHandler)
+    server.dataset, server.jobs = dataset, jobs
+    threading.Thread(target=server.serve_forever, name="export-endpoint", daemon=True).start()
+    return server
+
+
+# ---------------------------------------------
+# Command Line: batch exports without the dashboard
+# ---------------------------------------------
+def open_dataset(source, backend=None):
+    """The dataset the dashboard would serve for a CSV, with the same backend choice."""
+    if (backend or os.environ.get("DASHBOARD_BACKEND")) == "sqlite":
+        from sql_backend import SqlSalesDataset, ensure_database
+
+        return SqlSalesDataset(ensure_database(source), source_path=source)
+    from sales_dataset import SalesDataset
+
+    return SalesDataset(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export filtered sales rows or chart aggregates as CSV or Parquet.")
+    parser.add_argument("--source", default="vgsales.csv")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], help="Default: DASHBOARD_BACKEND, else memory")
+    parser.add_argument("--genre", action="append", default=[])
+    parser.add_argument("--platform", action="append", default=[])
+    parser.add_argument("--publisher", action="append", default=[])
+    parser.add_argument("--years", type=int, nargs=2, metavar=("MIN", "MAX"))
+    parser.add_argument("--kind", choices=EXPORT_KINDS, default="rows")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    parser.add_argument("--out", help="Output file, '-' for stdout (default: vgsales_<kind>.<format>)")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Serve /export and /jobs on localhost instead")
+    args = parser.parse_args()
+
+    dataset = open_dataset(args.source, args.backend)
+    if args.serve is not None:
+        server = serve_exports(dataset, ExportJobs(), args.serve)
+        print(f"Serving exports on http://127.0.0.1:{args.serve}/export", file=sys.stderr)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    selection = {
+        "genres": args.genre,
+        "platforms": args.platform,
+        "publishers": args.publisher,
+        "year_range": tuple(args.years) if args.years else (dataset.year_min, dataset.year_max),
+    }
+    out = args.out or export_file_name(args.kind, args.format)
+    start = time.perf_counter()
+    written = 0
+
+    def write(sink):
+        nonlocal written
+        for data in encode(export_tables(dataset, selection, args.kind, args.chunk_rows), args.format):
+            sink.write(data)
+            written += len(data)
+
+    if out == "-":
+        write(sys.stdout.buffer)
+    else:
+        def write_file(tmp_path):
+            with open(tmp_path, "wb") as sink:
+                write(sink)
+        _write_atomic(os.path.abspath(out), write_file)
+    print(f"{written / 1e6:.1f} MB -> {out} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Snapshots live next to the source file unless told otherwise
+SNAPSHOT_DIR = os.environ.get("VGSALES_SNAPSHOT_DIR", ".snapshots")
+# Bump whenever the preprocessing rules change so old snapshots are ignored
+SNAPSHOT_VERSION = 2
+SALES_COLUMNS = ["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales"]
+CATEGORY_COLUMNS = ["Name", "Platform", "Genre", "Publisher"]
+# Declared so chunks parse straight into compact types; "N/A" years parse as NaN
+SALES_DTYPES = {
+    "Rank": "int32",
+    "Year": "float32",
+    **{column: "category" for column in CATEGORY_COLUMNS},
+    **{column: "float32" for column in SALES_COLUMNS + ["Global_Sales"]},
+}
+# Working-set budget for parsing one chunk, in MB
+CHUNK_MEMORY_MB = float(os.environ.get("VGSALES_CHUNK_MB", 64))
+# Parser buffers, the cleaned copy and the compacted copy each hold about one chunk
+CHUNK_OVERHEAD = 4
+
+
+# ---------------------------------------------
+# Preprocessing Rules
+# ---------------------------------------------
+def clean_sales_frame(data):
+    """Applies the dashboard preprocessing rules to a raw sales frame."""
+    data.columns = data.columns.str.strip()
+    if "Global_Sales" not in data.columns:
+        data["Global_Sales"] = data[SALES_COLUMNS].astype("float64").sum(axis=1)
+    data = data.dropna(subset=["Year", "Publisher"])
+    data["Year"] = data["Year"].astype(int)
+    return data.reset_index(drop=True)
+
+
+def compact_sales_frame(data):
+    """Dictionary-encodes the string columns and narrows the numeric ones.
+
+    Slices of the result share the category dictionaries, so filtered copies
+    only carry integer codes.
+    """
+    data = data.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in data.columns:
+            # Parsed as category already: drop values only the cleaned-out rows used
+            data[column] = data[column].astype("category").cat.remove_unused_categories()
+    data["Year"] = pd.to_numeric(data["Year"], downcast="integer")
+    if "Rank" in data.columns:
+        data["Rank"] = pd.to_numeric(data["Rank"], downcast="integer")
+    for column in SALES_COLUMNS + ["Global_Sales"]:
+        data[column] = data[column].astype("float32")
+    return data
+
+
+def memory_report(data):
+    """Returns per-column memory use in bytes, including category dictionaries."""
+    usage = data.memory_usage(index=True, deep=True)
+    report = pd.DataFrame({"dtype": data.dtypes.astype(str), "bytes": usage.drop("Index")})
+    report.loc["Index"] = ["index", usage["Index"]]
+    report.loc["Total"] = ["", int(usage.sum())]
+    return report
+
+
+def read_sales_csv(file_path, compact=True, max_memory_mb=CHUNK_MEMORY_MB, size=None):
+    """Parses the CSV and applies the preprocessing rules.
+
+    The compact table is built chunk by chunk (see iter_sales_chunks), so the
+    full uncompacted frame is never held. `size` stops reading at that byte offset.
+    """
+    if not compact:
+        return clean_sales_frame(pd.read_csv(file_path))
+    chunk_rows = chunk_rows_for_budget(file_path, max_memory_mb)
+    with open(file_path, "rb") as f:
+        source = f if size is None else io.BufferedReader(_BoundedReader(f, size))
+        return concat_compact_frames(list(iter_sales_chunks(source, chunk_rows)))
+
+
+# ---------------------------------------------
+# Chunked Parsing
+# ---------------------------------------------
+class _BoundedReader(io.RawIOBase):
+    """Reads a binary file only up to a fixed byte offset."""
+
+    def __init__(self, f, limit):
+        self._f = f
+        self._remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        block = self._f.read(min(len(buffer), self._remaining))
+        buffer[:len(block)] = block
+        self._remaining -= len(block)
+        return len(block)
+
+
+def chunk_rows_for_budget(file_path, max_memory_mb=CHUNK_MEMORY_MB, sample_rows=1000):
+    """Rows per chunk that keep parsing and preprocessing one chunk within max_memory_mb."""
+    sample = pd.read_csv(file_path, nrows=sample_rows, dtype=SALES_DTYPES)
+    row_bytes = sample.memory_usage(index=False, deep=True).sum() / max(1, len(sample))
+    return max(1000, int(max_memory_mb * 2**20 / (row_bytes * CHUNK_OVERHEAD)))
+
+
+def iter_sales_chunks(source, chunk_rows):
+    """Yields the CSV as cleaned, compacted frames of at most chunk_rows rows each."""
+    with pd.read_csv(source, dtype=SALES_DTYPES, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield compact_sales_frame(clean_sales_frame(chunk))
+
+
+def concat_compact_frames(frames):
+    """Concatenates compacted chunks, merging their category dictionaries.
+
+    Dictionaries come out sorted, exactly as compacting the whole table would
+    produce them.
+    """
+    columns = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[column] = union_categoricals(parts, sort_categories=True)
+        else:
+            columns[column] = np.concatenate([part.to_numpy() for part in parts])
+    data = pd.DataFrame(columns)
+    # Narrowest type for the whole table; chunks may have picked different widths
+    for column in ["Rank", "Year"]:
+        if column in data.columns:
+            data[column] = pd.to_numeric(data[column], downcast="integer")
+    return data
+
+
+# ---------------------------------------------
+# Source Fingerprinting
+# ---------------------------------------------
+def file_sha256(file_path, block_size=1 << 20):
+    """Hashes a file in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _snapshot_paths(file_path, snapshot_dir):
+    """Returns the metadata path and the snapshot path prefix for a source file."""
+    base = os.path.splitext(os.path.basename(file_path))[0]
+    directory = os.path.join(os.path.dirname(os.path.abspath(file_path)), snapshot_dir)
+    return os.path.join(directory, f"{base}.meta.json"), os.path.join(directory, base)
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path, write):
+    """Writes through a temp file so concurrent workers never see half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        # mkstemp creates the file 0600; dashboard processes under other users read it too
+        os.chmod(tmp_path, 0o644)
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_json(path, obj):
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(obj, f, indent=2)
+    _write_atomic(path, write)
+
+
+# ---------------------------------------------
+# Columnar Snapshot
+# ---------------------------------------------
+def write_snapshot(data, file_path, snapshot_dir=SNAPSHOT_DIR, sha256=None, extra=None):
+    """Writes a Feather snapshot of the preprocessed frame keyed on the source hash."""
+    stat = os.stat(file_path)
+    sha256 = sha256 or file_sha256(file_path)
+    meta_path, prefix = _snapshot_paths(file_path, snapshot_dir)
+    snapshot_path = f"{prefix}.{sha256[:16]}.v{SNAPSHOT_VERSION}.feather"
+
+    _write_atomic(snapshot_path, lambda tmp: data.to_feather(tmp, compression="lz4"))
+    meta = {
+        "source": os.path.basename(file_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+        "version": SNAPSHOT_VERSION,
+        "snapshot": os.path.basename(snapshot_path),
+        "rows": len(data),
+        **(extra or {}),
+    }
+    _write_json(meta_path, meta)
+    _remove_stale_snapshots(prefix, snapshot_path)
+    return snapshot_path
+
+
+def _remove_stale_snapshots(prefix, keep_path):
+    """Deletes snapshots of earlier versions of the same source file."""
+    directory, base = os.path.split(prefix)
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(base + ".") and name.endswith(".feather") and path != keep_path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def find_snapshot(file_path, snapshot_dir=SNAPSHOT_DIR):
+    """Returns (snapshot_path, sha256) for a valid snapshot of the source, or (None, sha256).
+
+    An unchanged mtime and size is trusted without rehashing, so warm starts
+    never read the CSV. If only the mtime moved, the hash decides.
+    """
+    stat = os.stat(file_path)
+    meta_path, prefix = _snapshot_paths(file_path, snapshot_dir)
+    meta = _read_meta(meta_path)
+    directory = os.path.dirname(meta_path)
+
+    if (
+        meta.get("version") == SNAPSHOT_VERSION
+        and meta.get("mtime_ns") == stat.st_mtime_ns
+        and meta.get("size") == stat.st_size
+    ):
+        snapshot_path = os.path.join(directory, meta["snapshot"])
+        if os.path.isfile(snapshot_path):
+            return snapshot_path, meta["sha256"]
+
+    sha256 = file_sha256(file_path)
+    snapshot_path = f"{prefix}.{sha256[:16]}.v{SNAPSHOT_VERSION}.feather"
+    if os.path.isfile(snapshot_path):
+        # Content is unchanged (e.g. the file was touched); refresh the fast-path key
+        meta.update({"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256,
+                     "version": SNAPSHOT_VERSION, "snapshot": os.path.basename(snapshot_path)})
+        _write_json(meta_path, meta)
+        return snapshot_path, sha256
+    return None, sha256
+
+
+def read_snapshot(snapshot_path):
+    """Loads a Feather snapshot written by write_snapshot."""
+    return pd.read_feather(snapshot_path)
+
+
+def load_sales_data(file_path, snapshot_dir=SNAPSHOT_DIR, use_snapshot=True):
+    """Loads the preprocessed sales table, preferring a columnar snapshot over the CSV."""
+    if not use_snapshot:
+        return read_sales_csv(file_path)
+
+    snapshot_path, sha256 = find_snapshot(file_path, snapshot_dir)
+    if snapshot_path:
+        try:
+            return read_snapshot(snapshot_path)
+        except Exception:
+            pass  # Corrupt or unreadable snapshot: fall back to the CSV and rewrite it
+
+    data = read_sales_csv(file_path)
+    try:
+        write_snapshot(data, file_path, snapshot_dir, sha256=sha256)
+    except OSError:
+        pass  # Read-only filesystem: serve from the CSV without caching
+    return data
+
+
+# ---------------------------------------------
+# Incremental Append Ingestion
+# ---------------------------------------------
+def parse_sales_bytes(raw, columns=None):
+    """Parses CSV bytes and applies the preprocessing rules, without compacting.
+
+    With `columns`, the bytes are a headerless tail of a file with that header.
+    """
+    if columns is None:
+        frame = pd.read_csv(io.BytesIO(raw), dtype=SALES_DTYPES)
+    else:
+        frame = pd.read_csv(io.BytesIO(raw), header=None, names=columns, dtype=SALES_DTYPES)
+    return clean_sales_frame(frame)
+
+
+def align_categories(data, new_rows):
+    """Compacts `new_rows` onto the category dictionaries of `data`.
+
+    Unseen values are appended to the end of each dictionary, so the codes
+    already held by `data` (and by indexes built over them) do not change.
+    Returns (data with extended dictionaries, compacted new rows).
+    """
+    new_rows = compact_sales_frame(new_rows)
+    data = data.copy(deep=False)
+    for column in CATEGORY_COLUMNS:
+        if column not in data.columns:
+            continue
+        known = data[column].cat.categories
+        unseen = new_rows[column].cat.categories.difference(known, sort=False)
+        if len(unseen):
+            # Rebuilding from codes skips the per-value checks cat.add_categories does
+            dtype = pd.CategoricalDtype(known.append(unseen))
+            data[column] = pd.Categorical.from_codes(data[column].cat.codes, dtype=dtype)
+        new_rows[column] = pd.Categorical(new_rows[column], dtype=data[column].dtype)
+    return data, new_rows
+
+
+def _count_lines(f, size, block_size=1 << 20):
+    """Counts lines in the first `size` bytes, including a final one without a newline."""
+    f.seek(0)
+    lines, last = 0, b"\n"
+    while size > 0:
+        block = f.read(min(block_size, size))
+        if not block:
+            break
+        lines += block.count(b"\n")
+        last = block[-1:]
+        size -= len(block)
+    return lines + (last != b"\n")
+
+
+class IncrementalLoader:
+    """Loads a growing sales CSV and afterwards parses only the appended tail.
+
+    Tracks the byte offset and raw row count already consumed. A rewrite is
+    detected and triggers a full reload: a replaced or truncated file, changed
+    bytes just before the offset, or growth after a final line that had no
+    newline.
+    """
+
+    GUARD_BYTES = 64
+
+    def __init__(self, file_path, snapshot_dir=SNAPSHOT_DIR, max_memory_mb=CHUNK_MEMORY_MB):
+        self.file_path = file_path
+        self.snapshot_dir = snapshot_dir
+        self.max_memory_mb = max_memory_mb
+        self.data = None
+        self.columns = None
+        self.offset = 0
+        self.raw_rows = 0
+        self._identity = None
+        self._mtime_ns = None
+        self._guard = b""
+        self._ends_with_newline = True
+
+    def _remember_position(self, f, stat, offset):
+        self.offset = offset
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._mtime_ns = stat.st_mtime_ns
+        f.seek(max(0, offset - self.GUARD_BYTES))
+        self._guard = f.read(offset - max(0, offset - self.GUARD_BYTES))
+        self._ends_with_newline = self._guard.endswith(b"\n") or offset == 0
+
+    def position(self):
+        """What has been consumed so far, as JSON values another process can resume from."""
+        return {
+            "columns": self.columns,
+            "offset": self.offset,
+            "raw_rows": self.raw_rows,
+            "identity": list(self._identity),
+            "mtime_ns": self._mtime_ns,
+            "guard": self._guard.hex(),
+        }
+
+    def resume(self, data, position):
+        """Continues from a position() taken when `data` was loaded, instead of load()."""
+        self.data = data
+        self.columns = position["columns"]
+        self.offset, self.raw_rows = position["offset"], position["raw_rows"]
+        self._identity = tuple(position["identity"])
+        self._mtime_ns = position["mtime_ns"]
+        self._guard = bytes.fromhex(position["guard"])
+        self._ends_with_newline = self._guard.endswith(b"\n") or self.offset == 0
+
+    def _guard_matches(self):
+        with open(self.file_path, "rb") as f:
+            f.seek(self.offset - len(self._guard))
+            return f.read(len(self._guard)) == self._guard
+
+    def load(self):
+        """Full load, through the columnar snapshot when it is current."""
+        with open(self.file_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            header = f.readline()
+            self.columns = next(csv.reader([header.decode("utf-8")]))
+
+            snapshot_path, sha256 = find_snapshot(self.file_path, self.snapshot_dir)
+            meta = _read_meta(_snapshot_paths(self.file_path, self.snapshot_dir)[0])
+            if snapshot_path and meta.get("size") == stat.st_size:
+                self.data = read_snapshot(snapshot_path)
+                self.raw_rows = meta.get("raw_rows", len(self.data))
+            else:
+                # Stop at the size just read so rows appended meanwhile are left for refresh
+                self.data = read_sales_csv(self.file_path, max_memory_mb=self.max_memory_mb,
+                                           size=stat.st_size)
+                self.raw_rows = max(0, _count_lines(f, stat.st_size) - 1)  # Minus the header
+                try:
+                    write_snapshot(self.data, self.file_path, self.snapshot_dir, sha256=sha256,
+                                   extra={"raw_rows": self.raw_rows})
+                except OSError:
+                    pass
+            self._remember_position(f, stat, stat.st_size)
+        return self.data
+
+    def refresh(self):
+        """Picks up changes since the last load.
+
+        Returns ("unchanged", None), ("appended", new_rows) or ("reloaded", data).
+        After an append, self.data holds the combined table.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return "unchanged", None  # Mid-rotation: keep serving what we have
+        if (stat.st_dev, stat.st_ino) != self._identity or stat.st_size < self.offset:
+            return "reloaded", self.load()
+        if stat.st_size == self.offset:
+            if stat.st_mtime_ns != self._mtime_ns and not self._guard_matches():
+                return "reloaded", self.load()  # Rewritten in place at the same size
+            return "unchanged", None
+
+        with open(self.file_path, "rb") as f:
+            f.seek(self.offset - len(self._guard))
+            if f.read(len(self._guard)) != self._guard or not self._ends_with_newline:
+                return "reloaded", self.load()
+            tail = f.read(stat.st_size - self.offset)
+            complete = tail.rfind(b"\n") + 1  # A partly written last line waits for next time
+            if complete == 0:
+                return "unchanged", None
+            tail = tail[:complete]
+            self.raw_rows += tail.count(b"\n")
+            self._remember_position(f, stat, self.offset + complete)
+
+        new_rows = parse_sales_bytes(tail, self.columns)
+        if new_rows.empty:
+            return "unchanged", None
+        self.data, new_rows = align_categories(self.data, new_rows)
+        self.data = pd.concat([self.data, new_rows], ignore_index=True)
+        return "appended", new_rows
+
+
+# ---------------------------------------------
+# Command Line: build snapshots ahead of deploys
+# ---------------------------------------------
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    for file_path in argv or ["vgsales.csv"]:
+        data = read_sales_csv(file_path)
+        snapshot_path = write_snapshot(data, file_path)
+        total = memory_report(data).loc["Total", "bytes"]
+        print(f"{file_path}: {len(data)} rows, {total / 1e6:.1f} MB in memory -> {snapshot_path}")
+
+
+if __name__ == "__main__":
+    main()
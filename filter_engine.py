@@ -0,0 +1,218 @@
+import numpy as np
+
+FILTER_DIMENSIONS = ("Genre", "Platform", "Publisher")
+# A value gets a bitmap once it covers at least 1/32 of the rows; rarer values
+# keep a sorted row-id list, which is smaller than a bitmap below that density
+DENSE_FRACTION = 1 / 32
+
+
+# ---------------------------------------------
+# Bitmap Helpers
+# ---------------------------------------------
+def ids_to_bitmap(row_ids, n_bytes):
+    """Packs row ids into a zeroed bitmap of n_bytes bytes."""
+    bits = np.zeros(n_bytes * 8, dtype=bool)
+    bits[row_ids] = True
+    return np.packbits(bits)
+
+
+def set_bits(bitmap, row_ids):
+    """ORs row ids into a packed bitmap in place."""
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    np.bitwise_or.at(bitmap, row_ids >> 3, (128 >> (row_ids & 7)).astype(np.uint8))
+
+
+def bitmap_to_ids(bitmap, n_rows):
+    """Returns the sorted row ids whose bits are set."""
+    return np.flatnonzero(np.unpackbits(bitmap, count=n_rows))
+
+
+def _grow(bitmap, n_bytes):
+    grown = np.zeros(n_bytes, dtype=np.uint8)
+    grown[:len(bitmap)] = bitmap
+    return grown
+
+
+# ---------------------------------------------
+# Filter Engine
+# ---------------------------------------------
+class FilterEngine:
+    """Per-value bitmaps and a sorted year index over the sales table.
+
+    Built once per dataset load. A selection is resolved with bitwise
+    OR/AND over packed bitmaps and never touches the string columns.
+    Bitmaps are allocated with spare capacity so appended rows only set
+    bits (see append).
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.n_rows = len(data)
+        self._n_bytes = (self.n_rows + 7) // 8
+        self.options = {}
+        self._bitmaps = {}
+        self._row_ids = {}
+        for dimension in FILTER_DIMENSIONS:
+            self._bitmaps[dimension] = {}
+            self._row_ids[dimension] = {}
+            self.options[dimension] = []
+            self._index_dimension(dimension, data[dimension], 0)
+        self._index_years(data["Year"].to_numpy())
+
+    def _index_dimension(self, dimension, column, start):
+        """Indexes rows start.. of a column; `column` holds only those rows."""
+        values, codes = _value_codes(column)
+        # Keep the widget options in first-appearance order, as before
+        options = self.options[dimension]
+        known = set(options)
+        options.extend(v for v in column.unique() if v not in known)
+
+        order = np.argsort(codes, kind="stable")
+        offsets = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        dense_rows = max(1, int(self.n_rows * DENSE_FRACTION))
+        bitmaps, row_ids = self._bitmaps[dimension], self._row_ids[dimension]
+
+        for code, value in enumerate(values):
+            ids = (order[offsets[code]:offsets[code + 1]] + start).astype(np.int32)
+            if not len(ids):
+                continue
+            if value in bitmaps:
+                set_bits(bitmaps[value], ids)
+                continue
+            if value in row_ids:
+                ids = np.concatenate([row_ids.pop(value), ids])
+            if len(ids) >= dense_rows:
+                bitmaps[value] = ids_to_bitmap(ids, self._n_bytes)
+            else:
+                row_ids[value] = ids
+
+    def _index_years(self, years):
+        order = np.argsort(years, kind="stable")
+        sorted_years = years[order]
+        self.years = np.unique(sorted_years)
+        self._update_year_bounds()
+
+        # Cumulative bitmaps: _year_prefix[i] holds every row with Year <= years[i],
+        # so any year range is a single AND-NOT of two of them
+        ends = np.searchsorted(sorted_years, self.years, side="right")
+        bits = np.zeros(self._n_bytes * 8, dtype=bool)
+        prefix, start = [], 0
+        for end in ends:
+            bits[order[start:end]] = True
+            prefix.append(np.packbits(bits))
+            start = end
+        self._year_prefix = prefix
+
+    def _update_year_bounds(self):
+        self.year_min = int(self.years[0]) if len(self.years) else 0
+        self.year_max = int(self.years[-1]) if len(self.years) else 0
+
+    # ---------------------------------------------
+    # Incremental Updates
+    # ---------------------------------------------
+    def _reserve(self, n_rows):
+        """Makes room for n_rows bits in every bitmap, doubling capacity when full."""
+        needed = (n_rows + 7) // 8
+        if needed <= self._n_bytes:
+            return
+        self._n_bytes = max(needed, 2 * self._n_bytes)
+        for bitmaps in self._bitmaps.values():
+            for value, bitmap in bitmaps.items():
+                bitmaps[value] = _grow(bitmap, self._n_bytes)
+        self._year_prefix = [_grow(bitmap, self._n_bytes) for bitmap in self._year_prefix]
+
+    def append(self, data, start):
+        """Indexes rows start.. of `data`, the table with rows appended at the end."""
+        self._reserve(len(data))
+        self.data = data
+        self.n_rows = len(data)
+        new_rows = data.iloc[start:]
+        for dimension in FILTER_DIMENSIONS:
+            self._index_dimension(dimension, new_rows[dimension], start)
+
+        years = new_rows["Year"].to_numpy()
+        row_ids = np.arange(start, self.n_rows)
+        for year in np.unique(years):
+            position = int(np.searchsorted(self.years, year))
+            if position == len(self.years) or self.years[position] != year:
+                # A year not seen before: its prefix starts as the previous year's
+                if position:
+                    previous = self._year_prefix[position - 1].copy()
+                else:
+                    previous = np.zeros(self._n_bytes, dtype=np.uint8)
+                self.years = np.insert(self.years, position, year)
+                self._year_prefix.insert(position, previous)
+            ids = row_ids[years == year]
+            for bitmap in self._year_prefix[position:]:
+                set_bits(bitmap, ids)
+        self._update_year_bounds()
+
+    # ---------------------------------------------
+    # Selections
+    # ---------------------------------------------
+    def _dimension_bitmap(self, dimension, values):
+        bitmap = np.zeros(self._n_bytes, dtype=np.uint8)
+        bitmaps, row_ids = self._bitmaps[dimension], self._row_ids[dimension]
+        for value in values:
+            if value in bitmaps:
+                np.bitwise_or(bitmap, bitmaps[value], out=bitmap)
+            elif value in row_ids:
+                set_bits(bitmap, row_ids[value])
+        return bitmap
+
+    def _year_bitmap(self, year_range):
+        """Returns None when the range covers every row, else the rows inside it."""
+        low, high = year_range
+        if low <= self.year_min and high >= self.year_max:
+            return None
+        upper = np.searchsorted(self.years, high, side="right") - 1
+        lower = np.searchsorted(self.years, low, side="left") - 1
+        if upper < 0 or upper <= lower:
+            return np.zeros(self._n_bytes, dtype=np.uint8)
+        bitmap = self._year_prefix[upper].copy()
+        if lower >= 0:
+            np.bitwise_and(bitmap, ~self._year_prefix[lower], out=bitmap)
+        return bitmap
+
+    def select(self, genres=(), platforms=(), publishers=(), year_range=None):
+        """Returns the sorted row ids matching the selection, or None for every row.
+
+        Empty value lists leave a dimension unconstrained.
+        """
+        bitmaps = [
+            self._dimension_bitmap(dimension, values)
+            for dimension, values in zip(FILTER_DIMENSIONS, (genres, platforms, publishers))
+            if len(values)
+        ]
+        if year_range is not None:
+            year_bitmap = self._year_bitmap(year_range)
+            if year_bitmap is not None:
+                bitmaps.append(year_bitmap)
+        if not bitmaps:
+            return None
+
+        combined = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            np.bitwise_and(combined, bitmap, out=combined)
+        return bitmap_to_ids(combined, self.n_rows)
+
+    def filter(self, genres=(), platforms=(), publishers=(), year_range=None):
+        """Returns the rows of the table matching the selection."""
+        row_ids = self.select(genres, platforms, publishers, year_range)
+        return self.data if row_ids is None else self.data.take(row_ids)
+
+    def nbytes(self):
+        """Memory held by the bitmaps and row-id lists."""
+        total = sum(b.nbytes for b in self._year_prefix)
+        for dimension in FILTER_DIMENSIONS:
+            total += sum(b.nbytes for b in self._bitmaps[dimension].values())
+            total += sum(ids.nbytes for ids in self._row_ids[dimension].values())
+        return total
+
+
+def _value_codes(column):
+    """Returns (values, integer codes) for a categorical or plain column."""
+    if hasattr(column, "cat"):
+        return list(column.cat.categories), column.cat.codes.to_numpy()
+    codes, values = column.factorize()
+    return list(values), codes
@@ -1,69 +1,139 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.tree import DecisionTreeRegressor
-from sklearn.svm import SVR
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.metrics import mean_squared_error, r2_score
-import base64
 import os
+from functools import partial, wraps
+from lazy_imports import lazy_import
+from sales_dataset import SalesDataset
+from sql_backend import SqlSalesDataset, ensure_database
+from sales_models import ModelService
+from assets import asset_url
+from chart_reduction import reduce_categories, reduce_series
+from query_cache import selection_key
+from data_export import EXPORT_FORMATS, ExportJobs, serve_exports
+from instrumentation import count, current_trace, finish_rerun, gauges, serve_metrics, span, start_rerun, timed
+
+# Plotly loads on the first rerun that draws a chart, not at worker start
+px = lazy_import("plotly.express")
+
 
 # ---------------------------------------------
-# Function to encode local GIF or MP4
+# Instrumented Output
 # ---------------------------------------------
-def render_local_file(file_path):
-    try:
-        if not os.path.isfile(file_path):
-            st.error(f"File not found: {file_path}. Please verify the file path and try again.")
-            return ""
+def markdown(body, **kwargs):
+    """st.markdown that counts the bytes it sends to the browser."""
+    count("markdown_bytes", len(body.encode("utf-8")))
+    count("markdown_calls")
+    return st.markdown(body, **kwargs)
 
-        with open(file_path, "rb") as f:
-            file_data = f.read()
 
-        if file_path.endswith(".gif"):
-            mime_type = "image/gif"
-        elif file_path.endswith((".jpg", ".jpeg", ".png")):
-            mime_type = "image/png"
-        else:
-            st.error(f"Unsupported file type for {file_path}. Only GIF and image formats (JPG, PNG) are supported.")
-            return ""
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart that counts the figures it renders."""
+    count("figures_rendered")
+    return st.plotly_chart(fig, **kwargs)
 
-        encoded_data = f"data:{mime_type};base64,{base64.b64encode(file_data).decode('utf-8')}"
-        return encoded_data
 
-    except Exception as e:
-        st.error(f"An error occurred while encoding the file {file_path}: {e}")
-        return ""
+def dataframe(data, **kwargs):
+    """st.dataframe that sends only the categories its rows use.
+
+    Arrow ships a categorical column's whole dictionary: every title in the
+    table for Name, even when 25 are shown.
+    """
+    if hasattr(data, "select_dtypes"):
+        data = data.assign(**{
+            name: data[name].cat.remove_unused_categories() for name in data.select_dtypes("category")
+        })
+    return st.dataframe(data, **kwargs)
+
+
+def chart_note(note):
+    """Says under a chart how its data was reduced to fit the payload budget."""
+    if note:
+        count("charts_reduced")
+        st.caption(note)
+
 
+def fragment(func=None, *, run_every=None):
+    """st.fragment whose solo reruns are traced like full ones.
+
+    A widget inside a fragment reruns only that fragment, so main() never
+    runs to open and close the trace; the fragment does it itself.
+    """
+    if func is None:
+        return lambda func: fragment(func, run_every=run_every)
+
+    @st.fragment(run_every=run_every)
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if current_trace() is not None:  # Part of a full rerun or an enclosing fragment's
+            return func(*args, **kwargs)
+        start_rerun(session_id(), scope=func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_trace(finish_rerun())
+    return wrapper
 
 
 # ---------------------------------------------
-# Function to Encode Images for Background
+# Function to resolve local GIF or MP4 to a URL
 # ---------------------------------------------
-def encode_image(image_path):
-    """Encodes an image to base64."""
-    with open(image_path, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
+def render_local_file(file_path, width=None):
+    """Returns a cacheable URL for a file in ./static (a data URI if static serving is off).
+
+    When the asset build has run, the optimized variant at least `width` px wide is used.
+    """
+    try:
+        return asset_url(file_path, width)
+
+    except FileNotFoundError:
+        st.error(f"File not found: {file_path}. Please verify the file path and try again.")
+        return ""
+
+    except ValueError:
+        st.error(f"Unsupported file type for {file_path}. Only GIF and image formats (JPG, PNG) are supported.")
+        return ""
+
+    except Exception as e:
+        st.error(f"An error occurred while encoding the file {file_path}: {e}")
+        return ""
+
 
 
 # ---------------------------------------------
 # Background Image Slideshow
 # ---------------------------------------------
-def add_background_slideshow():
-    img1 = encode_image("p1.jpg")
-    img2 = encode_image("p2.jpg")
-    img3 = encode_image("p3.jpg")
-    img4 = encode_image("p4.jpg")
-    img5 = encode_image("p5.jpg")
-
-    st.markdown(f"""
-    <style>
+BACKGROUND_IMAGES = ["p1.jpg", "p2.jpg", "p3.jpg", "p4.jpg", "p5.jpg"]
+# (media query, image width) pairs; the optimized variant closest to the width is served
+BACKGROUND_BREAKPOINTS = [
+    (None, 1920),
+    ("(max-width: 1280px)", 1280),
+    ("(min-width: 1921px)", 2560),
+]
+
+
+def slideshow_keyframes(width):
+    """Builds the slideShow keyframes for the background variants at a given width."""
+    img1, img2, img3, img4, img5 = [render_local_file(image, width) for image in BACKGROUND_IMAGES]
+    return f"""
+        @keyframes slideShow {{
+            0% {{ background-image: url('{img1}'); }}
+            20% {{ background-image: url('{img2}'); }}
+            40% {{ background-image: url('{img3}'); }}
+            60% {{ background-image: url('{img4}'); }}
+            80% {{ background-image: url('{img5}'); }}
+            100% {{ background-image: url('{img1}'); }}
+        }}"""
+
+
+def slideshow_styles():
+    """Background slideshow rules, with smaller or larger variants per breakpoint."""
+    # URLs rather than inlined bytes: the browser fetches each image once and caches it
+    default_keyframes = slideshow_keyframes(BACKGROUND_BREAKPOINTS[0][1])
+    responsive_keyframes = ""
+    for media_query, width in BACKGROUND_BREAKPOINTS[1:]:
+        keyframes = slideshow_keyframes(width)
+        if keyframes != default_keyframes:  # No optimized variants: one set is enough
+            responsive_keyframes += f"\n        @media {media_query} {{{keyframes}\n        }}"
+    return f"""
         body {{
             margin: 0;
             padding: 0;
@@ -71,30 +141,35 @@ def add_background_slideshow():
             background-size: cover;
             background-repeat: no-repeat;
             animation: slideShow 25s infinite;
-        }}
-        @keyframes slideShow {{
-            0% {{ background-image: url('data:image/jpg;base64,{img1}'); }}
-            20% {{ background-image: url('data:image/jpg;base64,{img2}'); }}
-            40% {{ background-image: url('data:image/jpg;base64,{img3}'); }}
-            60% {{ background-image: url('data:image/jpg;base64,{img4}'); }}
-            80% {{ background-image: url('data:image/jpg;base64,{img5}'); }}
-            100% {{ background-image: url('data:image/jpg;base64,{img1}'); }}
-        }}
+        }}{default_keyframes}{responsive_keyframes}
         .stApp {{
             background: transparent;
             height: 100%;
-        }}
-    </style>
-    """, unsafe_allow_html=True)
+        }}"""
+
+
+# ---------------------------------------------
+# Page Styles
+# ---------------------------------------------
+@timed
+def add_page_styles():
+    """Emits every section's CSS as one block at the top of the page.
+
+    Only full reruns emit it; fragment reruns leave it in place. Each
+    section's rules are defined next to the section. The block is identical
+    across reruns and large enough for Streamlit's message cache, so a
+    browser that already holds it receives only its hash.
+    """
+    styles = "".join([
+        slideshow_styles(), FILTER_STYLES, TITLE_STYLES, PROMPT_STYLES, GIF_STYLES, CHART_STYLES, INSIGHTS_STYLES,
+    ])
+    markdown(f"<style>{styles}\n</style>", unsafe_allow_html=True)
 
 
 # ---------------------------------------------
 # Filter Section
 # ---------------------------------------------
-def display_filter_section(data):
-    st.markdown(
-        """
-        <style>
+FILTER_STYLES = """
         .stSelectbox > label, .stSlider > label, .stMultiSelect > label {
             font-size: 30px !important;  /* Font size */
             font-weight: bold !important;
@@ -129,27 +204,28 @@ def display_filter_section(data):
         .filter-container > div {
             flex: 1;
         }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+"""
+
+
+@timed
+def display_filter_section(dataset):
 
     # Genre and Platform filters in two columns
-    st.markdown('<div class="filter-container">', unsafe_allow_html=True)
+    markdown('<div class="filter-container">', unsafe_allow_html=True)
     col1, col2 = st.columns(2)
     with col1:
-        genres = st.multiselect("Select Genre(s):",  options=data["Genre"].unique(), key="filter_genres_unique"  ) # Unique key for genres 
+        genres = st.multiselect("Select Genre(s):",  options=dataset.options["Genre"], key="filter_genres_unique"  ) # Unique key for genres 
     with col2:
-        platforms = st.multiselect( "Select Platform(s):", options=data["Platform"].unique(),key="filter_platforms_unique") # Unique key for platforms
-    st.markdown('</div>', unsafe_allow_html=True)
+        platforms = st.multiselect( "Select Platform(s):", options=dataset.options["Platform"],key="filter_platforms_unique") # Unique key for platforms
+    markdown('</div>', unsafe_allow_html=True)
 
     # Publisher filter
-    publishers = st.multiselect("Select Publisher(s): (Optional)", options=data["Publisher"].unique(),key="filter_publishers_unique"  # Unique key for publishers
+    publishers = st.multiselect("Select Publisher(s): (Optional)", options=dataset.options["Publisher"],key="filter_publishers_unique"  # Unique key for publishers
     )
 
     # Year range filter
-    year_min = int(data["Year"].min())
-    year_max = int(data["Year"].max())
+    year_min = dataset.year_min
+    year_max = dataset.year_max
     year_range = st.slider(
         "Select Year Range:",
         min_value=year_min,
@@ -157,15 +233,14 @@ def display_filter_section(data):
         value=(2000,2020),
         key="filter_year_range_unique"  # Unique key for year range
     )
-    # Create boolean filters
-    genre_filter = data["Genre"].isin(genres) if genres else pd.Series([True] * len(data), index=data.index)
-    platform_filter = data["Platform"].isin(platforms) if platforms else pd.Series([True] * len(data), index=data.index)
-    publisher_filter = data["Publisher"].isin(publishers) if publishers else pd.Series([True] * len(data), index=data.index)
-    year_filter = data["Year"].between(year_range[0], year_range[1])
-
-    # Combine filters
-    combined_filter = genre_filter & platform_filter & publisher_filter & year_filter
-    filtered_data = data[combined_filter]
+    # The selection is resolved lazily: dataset.filter(selection) for rows,
+    # dataset.rollup(selection) for chart aggregates
+    selection = {
+        "genres": genres,
+        "platforms": platforms,
+        "publishers": publishers,
+        "year_range": year_range,
+    }
 
     # Determine if filters are applied (genre or platform must be selected)
     filters_applied = bool(genres or platforms)
@@ -173,18 +248,13 @@ def display_filter_section(data):
     # Determine if filters were applied
     #filters_applied = bool(genres or platforms or publishers or year_range != (year_min, year_max))
 
-    return filtered_data,filters_applied
+    return selection,filters_applied
 
 
 # ---------------------------------------------
 # Display Title Block with Hover Effect
 # ---------------------------------------------
-def display_title_in_left_block():
-    """Displays the title block with letter-by-letter animation and words on new lines."""
-    
-    st.markdown(
-        """
-        <style>
+TITLE_STYLES = """
             /* Title block styling */
             .title-block {
                 background-color: black;
@@ -251,8 +321,13 @@ def display_title_in_left_block():
                 animation: fade-in 2s ease-in-out forwards;
                 animation-delay: 2s; /* Delay after title animation */
             }
-        </style>
-        
+"""
+
+
+def display_title_in_left_block():
+    """Displays the title block with letter-by-letter animation and words on new lines."""
+    markdown(
+        """
         <div class="title-block">
             <div class="animated-title">
                 <div>
@@ -275,8 +350,12 @@ def display_title_in_left_block():
 # ---------------------------------------------
 # Enhanced Layout
 # ---------------------------------------------
-def enhanced_layout(data):
-    """Enhanced layout with title block and visualizations."""
+def enhanced_layout(file_path, model_service):
+    """Enhanced layout with title block and visualizations.
+
+    The left column and the page styles only change on a full rerun; the
+    filters and everything they drive rerun as one fragment.
+    """
     col1, col2 = st.columns([1, 2])  # 1:2 ratio for left and right sections
 
     with col1:
@@ -288,116 +367,174 @@ def enhanced_layout(data):
 
     with col2:
         # Add an empty space at the top to leave the right side of the title block empty
-        st.markdown("<div style='height: 110vh;'></div>", unsafe_allow_html=True)
+        markdown("<div style='height: 110vh;'></div>", unsafe_allow_html=True)
 
         # Filters and visualizations below the empty space
-        filtered_data, filters_applied = display_filter_section(data)
+        display_analytics(file_path, model_service)
 
 
+@fragment
+def display_analytics(file_path, model_service):
+    """Filters with the charts, insights, trends, title search, exports and predictions they drive.
 
-        if filters_applied:
-            display_visualizations(filtered_data)
-                    # Display insights at the top
-            display_gaming_insights(filtered_data)
+    Changing a filter reruns only this fragment. The trends, title search,
+    export and prediction panels are fragments nested in it: they rerun alone for
+    their own inputs and with it when the selection changes.
+    """
+    dataset = preprocess_data(file_path)
+    selection, filters_applied = display_filter_section(dataset)
 
-        else:
+    if filters_applied:
+        with span("rollup"):
+            rollup = dataset.rollup(selection)
+        display_visualizations(dataset, selection, rollup)
+        # Display insights below the charts
+        display_gaming_insights(rollup)
+        # Year-over-year trends, with their own window slider
+        display_trends(dataset, selection)
 
-            st.markdown(
-                """
-                <div class="animated-text">
-                    <span>S</span><span>e</span><span>l</span><span>e</span><span>c</span><span>t</span>
-                    <span> </span><span>f</span><span>i</span><span>l</span><span>t</span><span>e</span><span>r</span><span>s</span>
-                    <span> </span><span>a</span><span>b</span><span>o</span><span>v</span><span>e</span>
-                    <span> </span><span>t</span><span>o</span>
-                    <span> </span><span>v</span><span>i</span><span>e</span><span>w</span>
-                    <span> </span><span>g</span><span>a</span><span>m</span><span>i</span><span>n</span><span>g</span>
-                    <span> </span><span>a</span><span>n</span><span>a</span><span>l</span><span>y</span><span>t</span><span>i</span><span>c</span><span>s</span>.
-                </div>
-                <style>
-                    .animated-text {
-                        display: inline-block;
-                        font-size: 30px;
-                        font-weight: bold;
-                        color: white;
-                        
-                        font-family: 'Arial', sans-serif;
-                    }
-
-                    .animated-text span {
-                        opacity: 0;
-                        display: inline-block;
-                        transform: translateY(20px);
-                        animation: slide-in 1s forwards;
-                    }
-
-                    /* Delays for each letter, starting from 3 seconds */
-                    .animated-text span:nth-child(1) { animation-delay: 3.1s; }
-                    .animated-text span:nth-child(2) { animation-delay: 3.2s; }
-                    .animated-text span:nth-child(3) { animation-delay: 3.3s; }
-                    .animated-text span:nth-child(4) { animation-delay: 3.4s; }
-                    .animated-text span:nth-child(5) { animation-delay: 3.5s; }
-                    .animated-text span:nth-child(6) { animation-delay: 3.6s; }
-                    .animated-text span:nth-child(7) { animation-delay: 3.7s; }
-                    .animated-text span:nth-child(8) { animation-delay: 3.8s; }
-                    .animated-text span:nth-child(9) { animation-delay: 3.9s; }
-                    .animated-text span:nth-child(10) { animation-delay: 4.0s; }
-                    .animated-text span:nth-child(11) { animation-delay: 4.1s; }
-                    .animated-text span:nth-child(12) { animation-delay: 4.2s; }
-                    .animated-text span:nth-child(13) { animation-delay: 4.3s; }
-                    .animated-text span:nth-child(14) { animation-delay: 4.4s; }
-                    .animated-text span:nth-child(15) { animation-delay: 4.5s; }
-                    .animated-text span:nth-child(16) { animation-delay: 4.6s; }
-                    .animated-text span:nth-child(17) { animation-delay: 4.7s; }
-                    .animated-text span:nth-child(18) { animation-delay: 4.8s; }
-                    .animated-text span:nth-child(19) { animation-delay: 4.9s; }
-                    .animated-text span:nth-child(20) { animation-delay: 5.0s; }
-                    .animated-text span:nth-child(21) { animation-delay: 5.1s; }
-                    .animated-text span:nth-child(22) { animation-delay: 5.2s; }
-                    .animated-text span:nth-child(23) { animation-delay: 5.3s; }
-                    .animated-text span:nth-child(24) { animation-delay: 5.4s; }
-                    .animated-text span:nth-child(25) { animation-delay: 5.5s; }
-                    .animated-text span:nth-child(26) { animation-delay: 5.6s; }
-                    .animated-text span:nth-child(27) { animation-delay: 5.7s; }
-                    .animated-text span:nth-child(28) { animation-delay: 5.8s; }
-                    .animated-text span:nth-child(29) { animation-delay: 5.9s; }
-                    .animated-text span:nth-child(30) { animation-delay: 6.0s; }
-                    .animated-text span:nth-child(31) { animation-delay: 6.1s; }
-                    .animated-text span:nth-child(32) { animation-delay: 6.2s; }
-                    .animated-text span:nth-child(33) { animation-delay: 6.3s; }
-                    .animated-text span:nth-child(34) { animation-delay: 6.4s; }
-                    .animated-text span:nth-child(35) { animation-delay: 6.5s; }
-                    .animated-text span:nth-child(36) { animation-delay: 6.6s; }
-                    .animated-text span:nth-child(37) { animation-delay: 6.7s; }
-                    .animated-text span:nth-child(38) { animation-delay: 6.8s; }
-                    .animated-text span:nth-child(39) { animation-delay: 6.9s; }
-                    .animated-text span:nth-child(40) { animation-delay: 7.0s; }
-                    .animated-text span:nth-child(41) { animation-delay: 7.1s; }
-                    .animated-text span:nth-child(42) { animation-delay: 7.2s; }
-                    .animated-text span:nth-child(43) { animation-delay: 7.3s; }
-                    .animated-text span:nth-child(44) { animation-delay: 7.4s; }
-                    .animated-text span:nth-child(45) { animation-delay: 7.5s; }
-
-                    @keyframes slide-in {
-                        from {
-                            opacity: 0;
-                            transform: translateY(20px);
-                        }
-                        to {
-                            opacity: 1;
-                            transform: translateY(0);
-                        }
-                    }
-                </style>
-                """,
-                unsafe_allow_html=True,
-            )
+    else:
+        display_filter_prompt()
+
+    # Title lookup within the active filters
+    display_title_search(dataset, selection)
+
+    # Downloads of the selection's rows or chart data
+    display_export_panel(dataset, selection)
+
+    # Sales prediction below the charts
+    display_prediction_panel(dataset, model_service, selection if filters_applied else None)
+
+
+PROMPT_STYLES = """
+        .animated-text {
+            display: inline-block;
+            font-size: 30px;
+            font-weight: bold;
+            color: white;
+
+            font-family: 'Arial', sans-serif;
+        }
+
+        .animated-text span {
+            opacity: 0;
+            display: inline-block;
+            transform: translateY(20px);
+            animation: rise-in 1s forwards;
+        }
+
+        /* Delays for each letter, starting from 3 seconds */
+        .animated-text span:nth-child(1) { animation-delay: 3.1s; }
+        .animated-text span:nth-child(2) { animation-delay: 3.2s; }
+        .animated-text span:nth-child(3) { animation-delay: 3.3s; }
+        .animated-text span:nth-child(4) { animation-delay: 3.4s; }
+        .animated-text span:nth-child(5) { animation-delay: 3.5s; }
+        .animated-text span:nth-child(6) { animation-delay: 3.6s; }
+        .animated-text span:nth-child(7) { animation-delay: 3.7s; }
+        .animated-text span:nth-child(8) { animation-delay: 3.8s; }
+        .animated-text span:nth-child(9) { animation-delay: 3.9s; }
+        .animated-text span:nth-child(10) { animation-delay: 4.0s; }
+        .animated-text span:nth-child(11) { animation-delay: 4.1s; }
+        .animated-text span:nth-child(12) { animation-delay: 4.2s; }
+        .animated-text span:nth-child(13) { animation-delay: 4.3s; }
+        .animated-text span:nth-child(14) { animation-delay: 4.4s; }
+        .animated-text span:nth-child(15) { animation-delay: 4.5s; }
+        .animated-text span:nth-child(16) { animation-delay: 4.6s; }
+        .animated-text span:nth-child(17) { animation-delay: 4.7s; }
+        .animated-text span:nth-child(18) { animation-delay: 4.8s; }
+        .animated-text span:nth-child(19) { animation-delay: 4.9s; }
+        .animated-text span:nth-child(20) { animation-delay: 5.0s; }
+        .animated-text span:nth-child(21) { animation-delay: 5.1s; }
+        .animated-text span:nth-child(22) { animation-delay: 5.2s; }
+        .animated-text span:nth-child(23) { animation-delay: 5.3s; }
+        .animated-text span:nth-child(24) { animation-delay: 5.4s; }
+        .animated-text span:nth-child(25) { animation-delay: 5.5s; }
+        .animated-text span:nth-child(26) { animation-delay: 5.6s; }
+        .animated-text span:nth-child(27) { animation-delay: 5.7s; }
+        .animated-text span:nth-child(28) { animation-delay: 5.8s; }
+        .animated-text span:nth-child(29) { animation-delay: 5.9s; }
+        .animated-text span:nth-child(30) { animation-delay: 6.0s; }
+        .animated-text span:nth-child(31) { animation-delay: 6.1s; }
+        .animated-text span:nth-child(32) { animation-delay: 6.2s; }
+        .animated-text span:nth-child(33) { animation-delay: 6.3s; }
+        .animated-text span:nth-child(34) { animation-delay: 6.4s; }
+        .animated-text span:nth-child(35) { animation-delay: 6.5s; }
+        .animated-text span:nth-child(36) { animation-delay: 6.6s; }
+        .animated-text span:nth-child(37) { animation-delay: 6.7s; }
+        .animated-text span:nth-child(38) { animation-delay: 6.8s; }
+        .animated-text span:nth-child(39) { animation-delay: 6.9s; }
+        .animated-text span:nth-child(40) { animation-delay: 7.0s; }
+        .animated-text span:nth-child(41) { animation-delay: 7.1s; }
+        .animated-text span:nth-child(42) { animation-delay: 7.2s; }
+        .animated-text span:nth-child(43) { animation-delay: 7.3s; }
+        .animated-text span:nth-child(44) { animation-delay: 7.4s; }
+        .animated-text span:nth-child(45) { animation-delay: 7.5s; }
+
+        @keyframes rise-in {
+            from {
+                opacity: 0;
+                transform: translateY(20px);
+            }
+            to {
+                opacity: 1;
+                transform: translateY(0);
+            }
+        }
+"""
 
 
+def display_filter_prompt():
+    """Asks for a genre or platform, letter by letter, while none is selected."""
+    markdown(
+        """
+        <div class="animated-text">
+            <span>S</span><span>e</span><span>l</span><span>e</span><span>c</span><span>t</span>
+            <span> </span><span>f</span><span>i</span><span>l</span><span>t</span><span>e</span><span>r</span><span>s</span>
+            <span> </span><span>a</span><span>b</span><span>o</span><span>v</span><span>e</span>
+            <span> </span><span>t</span><span>o</span>
+            <span> </span><span>v</span><span>i</span><span>e</span><span>w</span>
+            <span> </span><span>g</span><span>a</span><span>m</span><span>i</span><span>n</span><span>g</span>
+            <span> </span><span>a</span><span>n</span><span>a</span><span>l</span><span>y</span><span>t</span><span>i</span><span>c</span><span>s</span>.
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
 
 
 # ---------------------------------------------
 # GIF Display
 # ---------------------------------------------
+GIF_STYLES = """
+    .gif-container {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        justify-content: flex-start;
+        gap: 100px; /* Adds proper spacing between GIFs */
+        margin-top: 20px; /* Adjusts top margin */
+        width: 70%; /* Ensures container takes full width */
+    }
+    .gif-item {
+        display: flex;
+        align-items: center;
+        justify-content: center;
+    }
+    .gif-item img {
+        width: 100px; /* Consistent width for all GIFs */
+        height: 100px; /* Fixed height for uniformity */
+        border-radius: 10px; /* Adds rounded corners */
+
+        animation: zoom-in-out 3s ease-in-out infinite; /* Adds zoom animation */
+    }
+    @keyframes zoom-in-out {
+        0%, 100% { transform: scale(1); }
+        50% { transform: scale(1.1); }
+
+    }
+"""
+
+
+@timed
 def display_gif_carousel():
 
     """Displays a carousel of GIFs."""
@@ -407,45 +544,13 @@ def display_gif_carousel():
         "g11.gif",  # Second GIF
         "g14.gif",  # Third GIF
     ]
-    
-    # Add CSS for animations
-    st.markdown("""
-    <style>
-        .gif-container {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: flex-start;
-            gap: 100px; /* Adds proper spacing between GIFs */
-            margin-top: 20px; /* Adjusts top margin */
-            width: 70%; /* Ensures container takes full width */
-        }
-        .gif-item {
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .gif-item img {
-            width: 100px; /* Consistent width for all GIFs */
-            height: 100px; /* Fixed height for uniformity */
-            border-radius: 10px; /* Adds rounded corners */
-
-            animation: zoom-in-out 3s ease-in-out infinite; /* Adds zoom animation */
-        }
-        @keyframes zoom-in-out {
-            0%, 100% { transform: scale(1); }
-            50% { transform: scale(1.1); }
-        
-        }
-    </style>
-    """, unsafe_allow_html=True)
 
     # Display GIFs with the applied animation
-    st.markdown("<div class='gif-container'>", unsafe_allow_html=True)
+    markdown("<div class='gif-container'>", unsafe_allow_html=True)
     for gif in gifs:
-        gif_data = render_local_file(gif)
+        gif_data = render_local_file(gif, width=200)  # 2x the 100px display size
         if gif_data:
-            st.markdown(
+            markdown(
                 f"""
                 <div class="gif-item">
                     <img src="{gif_data}" alt="GIF"/>
@@ -453,174 +558,195 @@ def display_gif_carousel():
                 """,
                 unsafe_allow_html=True,
             )
-    st.markdown("</div>", unsafe_allow_html=True)
+    markdown("</div>", unsafe_allow_html=True)
 
 
 # ---------------------------------------------
 # Data Preprocessing
 # ---------------------------------------------
-@st.cache_data
+@st.cache_resource
+def load_dataset(file_path):
+    """Loads the data with its filter index, cube and query cache once, shared by all sessions.
+
+    DASHBOARD_BACKEND=sqlite queries video_game.db instead of holding the table in memory;
+    with VGSALES_SHARED_DIR set, dashboard processes on one host map a single copy of the table.
+    """
+    if os.environ.get("DASHBOARD_BACKEND") == "sqlite":
+        return SqlSalesDataset(ensure_database(file_path), source_path=file_path)
+    return SalesDataset(file_path)
+
+
+@timed
 def preprocess_data(file_path):
-    """Loads and preprocesses the data."""
-    data = pd.read_csv(file_path)
-    data.columns = data.columns.str.strip()
-    if "Global_Sales" not in data.columns:
-        data["Global_Sales"] = data[["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales"]].sum(axis=1)
-    data.dropna(subset=["Year", "Publisher"], inplace=True)
-    data["Year"] = data["Year"].astype(int)
-    return data
+    """Returns the shared dataset with any rows appended to the CSV since the last rerun."""
+    dataset = load_dataset(file_path)
+    dataset.refresh()
+    return dataset
 
-# ---------------------------------------------
-# Function to encode local images to base64
-# ---------------------------------------------
-def encode_image(image_path):
-    """Encodes an image to base64."""
-    with open(image_path, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
 
+@st.cache_resource
+def load_model_service():
+    """Background trainer and fitted-model cache, shared by all sessions."""
+    return ModelService()
 
 # ---------------------------------------------
-import streamlit as st
-import plotly.express as px
-import pandas as pd
-from matplotlib import cm
-
 # Custom color palette to match the background tones
 COLOR_PALETTE = ["#6a0dad", "#7f00ff", "#cc99ff", "#4b0082", "#6600cc"]
 
-# Function to display graphs in a grid layout
-def display_visualizations(filtered_data):
-    """Displays charts with a light color palette and animated headings."""
-    st.markdown(
-        """
-        <style>
-        /* Heading animation */
-        @keyframes slide-in-left {
-            0% {
-                opacity: 0;
-                transform: translateX(-100%);
-            }
-            100% {
-                opacity: 1;
-                transform: translateX(0);
-            }
-        }
-
-        .graph-heading {
-            font-size: 24px;
-            font-weight: bold;
-            color: white;
-            text-align: center;
-            background-color: rgba(0, 0, 0, 0.7); /* Black background for visibility */
-            padding: 10px;
-            border-radius: 10px;
-            margin-bottom: 20px;
-            animation: slide-in-left 1s ease-out;
-            animation-delay: 1.5s;
-            animation-fill-mode: forwards;
+CHART_STYLES = """
+    /* Heading animation */
+    @keyframes slide-in-left {
+        0% {
             opacity: 0;
+            transform: translateX(-100%);
         }
-        </style>
-        """,
-        unsafe_allow_html=True,
+        100% {
+            opacity: 1;
+            transform: translateX(0);
+        }
+    }
+
+    .graph-heading {
+        font-size: 24px;
+        font-weight: bold;
+        color: white;
+        text-align: center;
+        background-color: rgba(0, 0, 0, 0.7); /* Black background for visibility */
+        padding: 10px;
+        border-radius: 10px;
+        margin-bottom: 20px;
+        animation: slide-in-left 1s ease-out;
+        animation-delay: 1.5s;
+        animation-fill-mode: forwards;
+        opacity: 0;
+    }
+"""
+
+
+# (heading, figure) pairs for each column of the chart grid
+CHART_GRID = [
+    [("Global Sales Over Time", "sales_by_year"), ("Average Sales Per Year", "avg_sales_by_year")],
+    [("Total Sales by Genre", "sales_by_genre"), ("Publishers by Genre", "publishers_by_genre")],
+]
+
+
+def chart_figures(rollup):
+    """Builds the four chart figures, each with its payload-reduction note."""
+    figures = {}
+
+    # Sales over time
+    sales_by_year, note = reduce_series(rollup["sales_by_year"], "Year", "Global_Sales", "years")
+    figures["sales_by_year"] = px.line(
+        sales_by_year,
+        x="Year",
+        y="Global_Sales",
+        title="",
+        markers=True,
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+    ), note
+
+    # Average Global Sales by Year (Plotly spec, no server-side rasterising)
+    avg_sales_by_year, note = reduce_series(rollup["avg_sales_by_year"], "Year", "Global_Sales", "years")
+    fig_avg = px.bar(
+        avg_sales_by_year,
+        x="Year",
+        y="Global_Sales",
+        title="Average Sales Per Year",
+        color="Year",
+        color_continuous_scale="Purples",
+        labels={"Global_Sales": "Average Sales (in millions)"},
+    )
+    fig_avg.update_layout(coloraxis_showscale=False)
+    fig_avg.update_xaxes(tickangle=-45)
+    figures["avg_sales_by_year"] = fig_avg, note
+
+    # Sales by genre
+    sales_by_genre, note = reduce_categories(rollup["sales_by_genre"], "Genre", "Global_Sales", "genres")
+    figures["sales_by_genre"] = px.bar(
+        sales_by_genre,
+        x="Genre",
+        y="Global_Sales",
+        title="",
+        color="Genre",
+        color_discrete_sequence=px.colors.sequential.Blues,
+    ), note
+
+    # Pie Chart for Publishers by Genre
+    publishers_by_genre, note = reduce_categories(
+        rollup["publishers_by_genre"], "Genre", "Publisher_Count", "genres"
     )
+    figures["publishers_by_genre"] = px.pie(
+        publishers_by_genre,
+        names="Genre",
+        values="Publisher_Count",
+        title="",
+        color_discrete_sequence=px.colors.sequential.Blues,
+    ), note
+    return figures
 
-    if not filtered_data.empty:
-        # Create columns for a 2x2 grid layout
-        col1, col2 = st.columns(2)
-
-        with col1:
-            # Sales over time
-            st.markdown('<div class="graph-heading">Global Sales Over Time</div>', unsafe_allow_html=True)
-            sales_by_year = filtered_data.groupby("Year")["Global_Sales"].sum().reset_index()
-            fig_year = px.line(
-                sales_by_year,
-                x="Year",
-                y="Global_Sales",
-                title="",
-                markers=True,
-                color_discrete_sequence=px.colors.qualitative.Pastel,
-            )
-            st.plotly_chart(fig_year, use_container_width=True)
-
-            # Average Global Sales by Year (Matplotlib & Seaborn)
-            st.markdown('<div class="graph-heading">Average Sales Per Year</div>', unsafe_allow_html=True)
-            avg_sales_by_year = filtered_data.groupby("Year")["Global_Sales"].mean().reset_index()
-            plt.figure(figsize=(10, 5))
-            sns.barplot(
-                x="Year",
-                y="Global_Sales",
-                data=avg_sales_by_year,
-                palette="Purples",
-            )
-            plt.title("Average Sales Per Year", fontsize=18, pad=20, color="black")
-            plt.xlabel("Year", fontsize=14)
-            plt.ylabel("Average Sales (in millions)", fontsize=14)
-            plt.xticks(rotation=45)
-            st.pyplot(plt)
-
-        with col2:
-            # Sales by genre
-            st.markdown('<div class="graph-heading">Total Sales by Genre</div>', unsafe_allow_html=True)
-            sales_by_genre = filtered_data.groupby("Genre")["Global_Sales"].sum().reset_index()
-            fig_genre = px.bar(
-                sales_by_genre,
-                x="Genre",
-                y="Global_Sales",
-                title="",
-                color="Genre",
-                color_discrete_sequence=px.colors.sequential.Blues,
-            )
-            st.plotly_chart(fig_genre, use_container_width=True)
-
-            # Pie Chart for Publishers by Genre
-            st.markdown('<div class="graph-heading">Publishers by Genre</div>', unsafe_allow_html=True)
-            publishers_by_genre = filtered_data.groupby("Genre")["Publisher"].nunique().reset_index()
-            publishers_by_genre.columns = ["Genre", "Publisher_Count"]
-            fig_pie = px.pie(
-                publishers_by_genre,
-                names="Genre",
-                values="Publisher_Count",
-                title="",
-                color_discrete_sequence=px.colors.sequential.Blues,
-            )
-            st.plotly_chart(fig_pie, use_container_width=True)
 
-def display_gaming_insights(filtered_data):
-    """Displays key gaming insights in a center-aligned styled black box with creative transition."""
-    # Calculate insights
-    total_sales = filtered_data["Global_Sales"].sum()
-    top_genre = filtered_data.groupby("Genre")["Global_Sales"].sum().idxmax()
-    best_selling_game = filtered_data.loc[filtered_data["Global_Sales"].idxmax(), "Name"]
+# Function to display graphs in a grid layout
+@timed
+def display_visualizations(dataset, selection, rollup):
+    """Displays charts with a light color palette and animated headings.
+
+    Figures are built once per selection and shared by every session through
+    the dataset's query cache, like the rollup they are drawn from.
+    """
+    if not rollup["rows"]:
+        return
+    figures = dataset.query_cache.get_or_compute(
+        (dataset.version, "charts") + selection_key(**selection), lambda: chart_figures(rollup)
+    )
 
-    # Black box styling and creative transition
-    st.markdown(
+    # Create columns for a 2x2 grid layout
+    for column, charts in zip(st.columns(2), CHART_GRID):
+        with column:
+            for heading, name in charts:
+                fig, note = figures[name]
+                markdown(f'<div class="graph-heading">{heading}</div>', unsafe_allow_html=True)
+                plotly_chart(fig, width="stretch")
+                chart_note(note)
+
+
+# Black box styling and creative transition
+INSIGHTS_STYLES = """
+    .insights-box {
+        background-color: black;
+        color: white;
+        font-family: Arial, sans-serif;
+        font-size: 24px;
+        font-weight: bold;
+        line-height: 1.8;
+        text-align: center;
+        padding: 30px;
+        border-radius: 15px;
+        margin: 50px auto;
+        max-width: 600px;
+        box-shadow: 0px 0px 15px rgba(255, 255, 255, 0.5);
+        animation: slideDown 1.5s ease-in-out;
+    }
+
+    /* Creative slide-down transition */
+    @keyframes slideDown {
+        0% { opacity: 0; transform: translateY(-50px); }
+        100% { opacity: 1; transform: translateY(0); }
+    }
+"""
+
+
+@timed
+def display_gaming_insights(rollup):
+    """Displays key gaming insights in a center-aligned styled black box with creative transition."""
+    if not rollup["rows"]:
+        return
+    # Insights come straight from the cube rollup
+    total_sales = rollup["total_sales"]
+    top_genre = rollup["top_genre"]
+    best_selling_game = rollup["best_selling_game"]
+
+    markdown(
         f"""
-        <style>
-        .insights-box {{
-            background-color: black;
-            color: white;
-            font-family: Arial, sans-serif;
-            font-size: 24px;
-            font-weight: bold;
-            line-height: 1.8;
-            text-align: center;
-            padding: 30px;
-            border-radius: 15px;
-            margin: 50px auto;
-            max-width: 600px;
-            box-shadow: 0px 0px 15px rgba(255, 255, 255, 0.5);
-            animation: slideDown 1.5s ease-in-out;
-        }}
-
-        /* Creative slide-down transition */
-        @keyframes slideDown {{
-            0% {{ opacity: 0; transform: translateY(-50px); }}
-            100% {{ opacity: 1; transform: translateY(0); }}
-        }}
-        </style>
-
         <div class="insights-box">
             <p>Key Insights</p>
             <p>- <b>Total Global Sales:</b> {total_sales:.2f}M</p>
@@ -631,16 +757,345 @@ def display_gaming_insights(filtered_data):
         unsafe_allow_html=True,
     )
 
+# ---------------------------------------------
+# Sales Trends
+# ---------------------------------------------
+def trend_figures(trends):
+    """Builds the regional, growth and lifecycle figures for one selection and window."""
+    window = trends["window"]
+    per_year = "Sales per year" if window == 1 else f"Sales per year ({window}-year mean)"
+    regional = px.line(
+        trends["regional"],
+        x="Year",
+        y="Sales",
+        color="Region",
+        title="",
+        labels={"Sales": f"{per_year}, millions"},
+        color_discrete_sequence=COLOR_PALETTE,
+    )
+    growth = px.bar(
+        trends["growth"],
+        x="Year",
+        y="Growth",
+        title="",
+        color="Growth",
+        color_continuous_scale="Purples",
+    )
+    growth.update_layout(coloraxis_showscale=False)
+    growth.update_yaxes(tickformat=".0%")
+    lifecycle = px.line(
+        trends["lifecycle"],
+        x="Years_Since_Launch",
+        y="Global_Sales",
+        color="Platform",
+        title="",
+        markers=True,
+        labels={"Years_Since_Launch": "Years since launch", "Global_Sales": "Global sales, millions"},
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+    )
+    return {"regional": regional, "growth": growth, "lifecycle": lifecycle}
+
+
+@fragment
+@timed
+def display_trends(dataset, selection):
+    """Regional sales, growth and platform lifecycles over the selected years.
+
+    Moving the window slider reruns only this fragment; the selection's
+    year prefix is cached, so a new window is a pass over its years.
+    """
+    window = st.slider("Rolling window (years):", min_value=1, max_value=10, value=1, key="trend_window_unique")
+    figures = dataset.query_cache.get_or_compute(
+        (dataset.version, "trend_charts", window) + selection_key(**selection),
+        lambda: trend_figures(dataset.trends(selection, window)),
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        markdown('<div class="graph-heading">Regional Sales Per Year</div>', unsafe_allow_html=True)
+        plotly_chart(figures["regional"], width="stretch")
+    with col2:
+        markdown('<div class="graph-heading">Year-over-Year Growth</div>', unsafe_allow_html=True)
+        plotly_chart(figures["growth"], width="stretch")
+    markdown('<div class="graph-heading">Platform Lifecycles</div>', unsafe_allow_html=True)
+    plotly_chart(figures["lifecycle"], width="stretch")
+
+
+# ---------------------------------------------
+# Sales Prediction
+# ---------------------------------------------
+@fragment
+@timed
+def display_prediction_panel(dataset, model_service, selection=None):
+    """Predicts global sales from regional sales with the models trained in the background.
+
+    With a selection, every title in it can be scored in one batch.
+    """
+    model_service.ensure(dataset)
+    markdown("<h3 style='color: white;'>Predict Global Sales</h3>", unsafe_allow_html=True)
+    models = model_service.available()
+    if not models:
+        # Never fit inside a rerun: the panel fills in once the background run finishes
+        st.info("Prediction models are training in the background and will appear here shortly.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        genre = st.selectbox("Genre:", options=dataset.options["Genre"], key="predict_genre_unique")
+        na_sales = st.number_input("NA Sales (M):", min_value=0.0, value=1.0, step=0.1, key="predict_na_unique")
+    with col2:
+        publisher = st.selectbox("Publisher:", options=dataset.options["Publisher"], key="predict_publisher_unique")
+        eu_sales = st.number_input("EU Sales (M):", min_value=0.0, value=0.5, step=0.1, key="predict_eu_unique")
+    with col3:
+        platform = st.selectbox("Platform:", options=dataset.options["Platform"], key="predict_platform_unique")
+        other_sales = st.number_input("Other Sales (M):", min_value=0.0, value=0.1, step=0.1, key="predict_other_unique")
+    model = st.selectbox("Model:", options=list(models), key="predict_model_unique")
+
+    prediction = model_service.predict(model, {
+        "NA_Sales": [na_sales], "EU_Sales": [eu_sales], "Other_Sales": [other_sales],
+        "Genre": [genre], "Publisher": [publisher], "Platform": [platform],
+    })
+    if prediction is None:
+        # The run the panel was drawn from was replaced or failed since
+        st.info("Model is retraining… predictions will be back in a moment.")
+        return
+    st.metric("Predicted Global Sales", f"{prediction[0]:.2f}M")
+    scores = models[model]
+    st.caption(f"Test set: R² {scores['R2']:.3f}, MSE {scores['MSE']:.3f}")
+
+    throughput = model_service.throughput()
+    with st.expander("Model comparison"):
+        st.dataframe([
+            {"Model": name, "R²": round(s["R2"], 3), "MSE": round(s["MSE"], 3),
+             "Rows/sec": int(throughput.get(name, 0))}
+            for name, s in models.items()
+        ], hide_index=True)
+
+    if selection is not None and st.checkbox("Score every title in the current selection",
+                                             key="predict_selection_unique"):
+        rows = dataset.filter(selection)
+        predicted = model_service.predict_batch(model, rows)
+        if predicted is None:
+            st.info("Model is retraining… predictions will be back in a moment.")
+            return
+        rows = rows.assign(Predicted_Sales=predicted)
+        st.caption(
+            f"{len(rows)} titles: {predicted.sum():.2f}M predicted vs {rows['Global_Sales'].sum():.2f}M actual "
+            f"({model}, {model_service.throughput().get(model, 0):,.0f} rows/sec)"
+        )
+        top = rows.nlargest(10, "Predicted_Sales")
+        dataframe(top[["Name", "Platform", "Year", "Global_Sales", "Predicted_Sales"]], hide_index=True)
+
+
+# ---------------------------------------------
+# Find a Game
+# ---------------------------------------------
+@fragment
+@timed
+def display_title_search(dataset, selection):
+    """Looks up titles by name fragment, within the filter panel's selection."""
+    markdown("<h3 style='color: white;'>Find a Game</h3>", unsafe_allow_html=True)
+    query = st.text_input("Title:", placeholder="e.g. Mario", key="title_search_unique")
+    if not query.strip():
+        return
+    results, fuzzy = dataset.search_titles(query, selection)
+    if results.empty:
+        st.info(f'No titles matching "{query}" in the current selection.')
+        return
+    closest = " (closest spellings)" if fuzzy else ""
+    st.caption(f"{results['Name'].nunique()} titles{closest} in the current selection, best-selling first.")
+    dataframe(results, hide_index=True)
+
+
+# ---------------------------------------------
+# Export Data
+# ---------------------------------------------
+@st.cache_resource
+def load_export_jobs():
+    """Background export runner shared by all sessions; each session tracks its own jobs."""
+    return ExportJobs()
+
+
+@st.cache_resource
+def start_export_endpoint(file_path):
+    """Serves /export and /jobs on localhost when DASHBOARD_EXPORT_PORT is set."""
+    port = os.environ.get("DASHBOARD_EXPORT_PORT")
+    return serve_exports(load_dataset(file_path), load_export_jobs(), int(port)) if port else None
+
+
+def export_url():
+    """Where browsers reach the export endpoint (DASHBOARD_EXPORT_URL behind a proxy), if it runs."""
+    port = os.environ.get("DASHBOARD_EXPORT_PORT")
+    return os.environ.get("DASHBOARD_EXPORT_URL", f"http://localhost:{port}") if port else None
+
+
+def read_export(path):
+    """A finished export's bytes, read when its download button is clicked.
+
+    The file may have expired since the button was drawn; the download
+    then says so instead of failing.
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return b"This export has expired. Run it again from the Export Data panel.\n"
+
+
+def export_labels():
+    """What can be exported: the selection's rows, or the data behind one chart."""
+    labels = {"rows": "Filtered rows"}
+    labels.update((name, heading) for charts in CHART_GRID for heading, name in charts)
+    return labels
+
+
+def show_export_jobs(jobs, export_url):
+    """Progress of this session's exports, with a download for each finished one."""
+    labels = export_labels()
+    for job_id in reversed(st.session_state.get("export_jobs", [])):
+        job = jobs.get(job_id)
+        if job is None:
+            continue
+        title = f"{labels[job.kind]} ({job.format.upper()})"
+        if job.active:
+            done = job.rows / job.total_rows if job.total_rows else 0.0
+            st.progress(min(done, 1.0), text=f"{title}: {job.rows:,} rows written")
+            if st.button("Cancel", key=f"export_cancel_{job.id}"):
+                jobs.cancel(job.id)
+        elif job.status == "done":
+            size = f"{job.rows:,} rows, {job.bytes / 1e6:.1f} MB"
+            if export_url:
+                # Served from disk by the export endpoint, never through the session
+                markdown(f"[Download {title}]({export_url}/jobs/{job.id}/file) — {size}")
+            else:
+                st.download_button(
+                    f"Download {title}", data=partial(read_export, job.path), file_name=job.file_name,
+                    mime=EXPORT_FORMATS[job.format], on_click="ignore", key=f"export_download_{job.id}",
+                )
+                st.caption(size)
+        else:
+            st.caption(f"{title}: {job.status}" + (f" ({job.error})" if job.error else ""))
+
+
+@fragment(run_every=1)
+def poll_export_jobs(jobs, export_url):
+    """show_export_jobs once a second while an export runs, then one full rerun to stop polling."""
+    show_export_jobs(jobs, export_url)
+    if not any(job.active for job in map(jobs.get, st.session_state.get("export_jobs", [])) if job):
+        st.rerun()
+
+
+@fragment
+@timed
+def display_export_panel(dataset, selection):
+    """Exports the current selection as CSV or Parquet in the background.
+
+    The file is written chunk by chunk on the export thread, so reruns
+    carry on while it runs; only a small polling fragment follows it.
+    """
+    markdown("<h3 style='color: white;'>Export Data</h3>", unsafe_allow_html=True)
+    jobs = load_export_jobs()
+    labels = export_labels()
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        kind = st.selectbox("Data:", options=list(labels), format_func=labels.get, key="export_kind_unique")
+    with col2:
+        fmt = st.radio("Format:", options=list(EXPORT_FORMATS), format_func=str.upper, horizontal=True,
+                       key="export_format_unique")
+    with col3:
+        if st.button("Export", key="export_start_unique"):
+            job_ids = st.session_state.get("export_jobs", [])
+            st.session_state["export_jobs"] = job_ids[-4:] + [jobs.submit(dataset, selection, kind, fmt)]
+
+    running = [job for job in map(jobs.get, st.session_state.get("export_jobs", [])) if job and job.active]
+    if running:
+        poll_export_jobs(jobs, export_url())
+    else:
+        show_export_jobs(jobs, export_url())
+
+
+# ---------------------------------------------
+# Debug Sidebar
+# ---------------------------------------------
+def debug_enabled():
+    """Diagnostics are shown with ?debug=1 or DASHBOARD_DEBUG=1."""
+    return st.query_params.get("debug") == "1" or os.environ.get("DASHBOARD_DEBUG") == "1"
+
+
+def display_debug_sidebar(query_cache, trace):
+    """Shows this rerun's stage timings, process gauges and cache counters in the sidebar."""
+    process = gauges()
+    cache = query_cache.stats()
+    history = [t["total_ms"] for t in st.session_state.get("rerun_traces", [])]
+    with st.sidebar:
+        st.subheader("Diagnostics")
+        rerun = trace.to_dict()
+        st.metric(
+            "Rerun time", f"{rerun['total_ms']:.0f} ms",
+            delta=f"SLO {rerun['slo_ms']:.0f} ms" if rerun["slo_ms"] else None,
+            delta_color="inverse" if rerun["slo_violated"] else "off",
+        )
+        if history:
+            st.caption(f"Session median over {len(history)} reruns: {sorted(history)[len(history) // 2]:.0f} ms")
+        st.dataframe(
+            [{"Stage": name, "ms": round(ms, 1)}
+             for name, ms in sorted(rerun["spans_ms"].items(), key=lambda item: -item[1])],
+            hide_index=True,
+        )
+        counters = rerun["counters"]
+        st.caption(
+            f"{counters.get('markdown_bytes', 0) / 1024:.1f} KB markdown in {counters.get('markdown_calls', 0)} calls, "
+            f"{counters.get('figures_rendered', 0)} figures, "
+            f"{counters.get('query_cache_hits', 0)} cache hits / {counters.get('query_cache_misses', 0)} misses this rerun"
+        )
+        st.metric("Process RSS", f"{process['rss_bytes'] / 2**20:.0f} MB")
+        st.metric("Query cache hit rate", f"{cache['hit_rate']:.0%}")
+        st.caption(
+            f"{cache['hits']} hits, {cache['misses']} misses, {cache['evictions']} evictions, "
+            f"{cache['entries']} entries ({cache['bytes'] / 2**20:.1f} MB)"
+        )
+
+
+# ---------------------------------------------
+# Metrics Endpoint
+# ---------------------------------------------
+@st.cache_resource
+def start_metrics_endpoint():
+    """Serves /metrics (Prometheus) and /reruns (JSON lines) on localhost when DASHBOARD_METRICS_PORT is set."""
+    port = os.environ.get("DASHBOARD_METRICS_PORT")
+    return serve_metrics(int(port)) if port else None
+
+
+def session_id():
+    """Streamlit's id for the session running this script, if any."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
 # ---------------------------------------------
 # Main Application
 # ---------------------------------------------
+def record_trace(trace):
+    """Keeps the last reruns of this session, full or fragment, for the sidebar."""
+    st.session_state["rerun_traces"] = st.session_state.get("rerun_traces", [])[-49:] + [trace.to_dict()]
+
+
 def main():
+    start_rerun(session_id())
+    start_metrics_endpoint()
     st.set_page_config(page_title="Interactive Gaming Dashboard", layout="wide")
-    add_background_slideshow()
+    add_page_styles()
     # Load and preprocess data
-    file_path = "vgsales.csv"  # Update with your dataset path
-    data = preprocess_data(file_path)
+    file_path = os.environ.get("DASHBOARD_DATA", "vgsales.csv")  # Update with your dataset path
+    model_service = load_model_service()
+    start_export_endpoint(file_path)
     # Display layout
-    enhanced_layout(data)    
+    enhanced_layout(file_path, model_service)
+    trace = finish_rerun()
+    record_trace(trace)
+    if debug_enabled():
+        display_debug_sidebar(load_dataset(file_path).query_cache, trace)
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,259 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A rerun slower than this counts as an SLO violation; unset means no SLO
+RERUN_SLO_MS = float(os.environ.get("RERUN_SLO_MS", 0)) or None
+# Optional file that receives one JSON line per finished rerun
+TRACE_LOG = os.environ.get("DASHBOARD_TRACE_LOG")
+TRACE_HISTORY = 500
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ---------------------------------------------
+# Process Gauges
+# ---------------------------------------------
+def process_rss_bytes():
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def peak_rss_bytes():
+    """High-water resident set size of this process."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss():
+    """Resets the kernel's peak-RSS mark (Linux); elsewhere the peak includes startup."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def gauges():
+    """Snapshot of the process gauges."""
+    return {
+        "rss_bytes": process_rss_bytes(),
+    }
+
+
+# ---------------------------------------------
+# Per-rerun Traces
+# ---------------------------------------------
+class RerunTrace:
+    """Stage timings and counters for one script run of one session.
+
+    `scope` is "app" for a full rerun, else the fragment that reran alone.
+    """
+
+    def __init__(self, session_id=None, scope="app"):
+        self.session_id = session_id
+        self.scope = scope
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans = {}
+        self.counters = defaultdict(int)
+        self.total_s = None
+        self.gauges = None
+
+    def add_span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def finish(self):
+        self.total_s = time.perf_counter() - self._start
+        self.gauges = gauges()
+        return self
+
+    @property
+    def slo_violated(self):
+        return RERUN_SLO_MS is not None and self.total_s is not None and self.total_s * 1000 > RERUN_SLO_MS
+
+    def to_dict(self):
+        return {
+            "session_id": self.session_id,
+            "scope": self.scope,
+            "started_at": self.started_at,
+            "total_ms": None if self.total_s is None else self.total_s * 1000,
+            "spans_ms": {name: seconds * 1000 for name, seconds in self.spans.items()},
+            "counters": dict(self.counters),
+            "gauges": self.gauges,
+            "slo_ms": RERUN_SLO_MS,
+            "slo_violated": self.slo_violated,
+        }
+
+
+# Streamlit runs each session's script on its own thread
+_local = threading.local()
+
+
+def start_rerun(session_id=None, scope="app"):
+    """Begins collecting a trace for the script run on this thread."""
+    _local.trace = RerunTrace(session_id, scope)
+    return _local.trace
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def finish_rerun():
+    """Closes this thread's trace and hands it to the registry."""
+    trace = current_trace()
+    _local.trace = None
+    if trace is None:
+        return None
+    REGISTRY.record(trace.finish())
+    return trace
+
+
+@contextmanager
+def span(name):
+    """Times a block into the current trace and the process histograms."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        trace = current_trace()
+        if trace is not None:
+            trace.add_span(name, elapsed)
+        REGISTRY.observe(name, elapsed)
+
+
+def timed(func):
+    """Decorator form of span(), named after the function."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def count(name, amount=1):
+    """Adds to a counter on the current trace and the process totals."""
+    trace = current_trace()
+    if trace is not None:
+        trace.counters[name] += amount
+    REGISTRY.increment(name, amount)
+
+
+# ---------------------------------------------
+# Process-wide Registry and Export
+# ---------------------------------------------
+class MetricsRegistry:
+    """Counter totals, span histograms and the most recent rerun traces."""
+
+    def __init__(self, history=TRACE_HISTORY):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.histograms = {}  # span -> [bucket counts..., +Inf count, sum]
+        self.traces = deque(maxlen=history)
+        self.reruns = 0
+        self.slo_violations = 0
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.setdefault(name, [0] * (len(SPAN_BUCKETS) + 1) + [0.0])
+            for i, bound in enumerate(SPAN_BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[len(SPAN_BUCKETS)] += 1
+            histogram[-1] += seconds
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def record(self, trace):
+        # Fragment reruns are far cheaper; mixing them in would flatter the full-rerun histogram
+        self.observe("rerun" if trace.scope == "app" else "fragment_rerun", trace.total_s)
+        line = json.dumps(trace.to_dict())
+        with self.lock:
+            self.traces.append(line)
+            self.reruns += 1
+            self.slo_violations += trace.slo_violated
+            if TRACE_LOG:
+                with open(TRACE_LOG, "a") as f:
+                    f.write(line + "\n")
+
+    def json_lines(self):
+        """Recent rerun traces, one JSON object per line."""
+        with self.lock:
+            return "".join(line + "\n" for line in self.traces)
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = ["# TYPE dashboard_span_seconds histogram"]
+        with self.lock:
+            for name, histogram in sorted(self.histograms.items()):
+                for bound, hits in zip(SPAN_BUCKETS, histogram):
+                    lines.append(f'dashboard_span_seconds_bucket{{span="{name}",le="{bound}"}} {hits}')
+                lines.append(f'dashboard_span_seconds_bucket{{span="{name}",le="+Inf"}} {histogram[len(SPAN_BUCKETS)]}')
+                lines.append(f'dashboard_span_seconds_sum{{span="{name}"}} {histogram[-1]}')
+                lines.append(f'dashboard_span_seconds_count{{span="{name}"}} {histogram[len(SPAN_BUCKETS)]}')
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE dashboard_{name}_total counter", f"dashboard_{name}_total {value}"]
+            lines += ["# TYPE dashboard_reruns_total counter", f"dashboard_reruns_total {self.reruns}",
+                      "# TYPE dashboard_rerun_slo_violations_total counter",
+                      f"dashboard_rerun_slo_violations_total {self.slo_violations}"]
+        for name, value in gauges().items():
+            lines += [f"# TYPE dashboard_{name} gauge", f"dashboard_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    routes = {
+        "/metrics": ("text/plain; version=0.0.4", REGISTRY.prometheus_text),
+        "/reruns": ("application/x-ndjson", REGISTRY.json_lines),
+    }
+
+    def do_GET(self):
+        route = self.routes.get(self.path.split("?")[0])
+        if route is None:
+            self.send_error(404)
+            return
+        content_type, render = route
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would otherwise flood the dashboard log
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serves /metrics (Prometheus) and /reruns (JSON lines) from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+    return server
@@ -0,0 +1,49 @@
+import importlib
+import threading
+import time
+import types
+
+# Seconds spent importing each lazily loaded module, filled on first use
+IMPORT_TIMES = {}
+_import_lock = threading.Lock()
+
+
+# ---------------------------------------------
+# Lazy Module Proxy
+# ---------------------------------------------
+class LazyModule(types.ModuleType):
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _import_lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    IMPORT_TIMES[self.__name__] = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """Returns a proxy for `name` that defers the import to first use."""
+    return LazyModule(name)
+
+
+def import_timings():
+    """Seconds spent on each lazy import so far, slowest first."""
+    return dict(sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True))
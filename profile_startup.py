@@ -0,0 +1,76 @@
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+# Libraries the dashboard loads lazily (its lazy_import calls); profiled separately to show what deferral saves
+DEFERRED_MODULES = ["plotly.express"]
+_PHASE_MARKER = "profile_startup: deferred"
+
+
+# ---------------------------------------------
+# Import-time Profiling
+# ---------------------------------------------
+def run_importtime(module, deferred):
+    """Imports `module` (then `deferred`) under -X importtime and returns the raw log."""
+    code = f"import {module}\nimport sys\nsys.stderr.write({_PHASE_MARKER!r} + '\\n')\n"
+    code += "".join(f"import {name}\n" for name in deferred)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return result.stderr
+
+
+def parse_importtime(log):
+    """Sums self import time (seconds) per top-level package for each phase."""
+    phases = {"startup": defaultdict(float), "deferred": defaultdict(float)}
+    phase = phases["startup"]
+    for line in log.splitlines():
+        if line.strip() == _PHASE_MARKER:
+            phase = phases["deferred"]
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        phase[name.strip().split(".")[0]] += int(self_us) / 1e6
+    return phases
+
+
+def profile_startup(module="gaming_dashboard", deferred=DEFERRED_MODULES):
+    """Returns per-package import cost at startup and for the deferred libraries."""
+    phases = parse_importtime(run_importtime(module, deferred))
+    return {
+        name: {
+            "total_s": sum(costs.values()),
+            "packages": dict(sorted(costs.items(), key=lambda item: item[1], reverse=True)),
+        }
+        for name, costs in phases.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-module import cost of the dashboard.")
+    parser.add_argument("--module", default="gaming_dashboard")
+    parser.add_argument("--deferred", nargs="*", default=DEFERRED_MODULES,
+                        help="lazily imported modules to cost separately")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    report = profile_startup(args.module, args.deferred)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for phase, result in report.items():
+        print(f"{phase}: {result['total_s']:.3f}s")
+        for package, seconds in list(result["packages"].items())[:args.top]:
+            print(f"  {package:<28} {seconds * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
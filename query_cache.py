@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from instrumentation import count
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("QUERY_CACHE_MB", "64")) * 1024 * 1024)
+
+
+# ---------------------------------------------
+# Cache Keys and Sizing
+# ---------------------------------------------
+def selection_key(genres=(), platforms=(), publishers=(), year_range=None):
+    """Canonical, hashable form of a filter selection: order of picks does not matter."""
+    return (
+        tuple(sorted(genres)),
+        tuple(sorted(platforms)),
+        tuple(sorted(publishers)),
+        tuple(year_range) if year_range is not None else None,
+    )
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if hasattr(value, "to_plotly_json"):  # Plotly figure: its spec, as sent to the browser
+        return len(value.to_json(validate=False))
+    return sys.getsizeof(value)
+
+
+# ---------------------------------------------
+# LRU Result Cache
+# ---------------------------------------------
+class QueryCache:
+    """Process-wide LRU cache of query results, bounded by memory.
+
+    Shared by every session in the process, so a selection computed for
+    one user is served to the next. Cached values must not be mutated.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        # Per-rerun counts for the trace of the session asking
+        count("query_cache_misses" if entry is None else "query_cache_hits")
+        return default if entry is None else entry[0]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value  # Larger than the whole budget: serve it but never cache
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for `key`, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,268 @@
+import numpy as np
+import pandas as pd
+
+from aggregation_engine import CELL_KEYS, aggregate_cells
+from trend_analytics import YearRollups, clip_years, lifecycle_curves, prefix_sums, value_year_sums
+
+CUBE_DIMENSIONS = ("Genre", "Platform", "Publisher")
+# (attribute, aggregate column) pairs for the per-cell arrays
+CELL_ARRAYS = (
+    ("cell_genre", "genre"),
+    ("cell_platform", "platform"),
+    ("cell_publisher", "publisher"),
+    ("cell_year", "year"),
+    ("cell_sum", "sum"),
+    ("cell_count", "count"),
+    ("cell_max", "max"),
+    ("cell_max_row", "idxmax"),
+    ("cell_na", "na_sales"),
+    ("cell_eu", "eu_sales"),
+    ("cell_jp", "jp_sales"),
+    ("cell_other", "other_sales"),
+)
+# Per-cell arrays that add up when rows are appended, with their aggregate column
+SUMMED_ARRAYS = (
+    ("cell_sum", "sum"),
+    ("cell_count", "count"),
+    ("cell_na", "na_sales"),
+    ("cell_eu", "eu_sales"),
+    ("cell_jp", "jp_sales"),
+    ("cell_other", "other_sales"),
+)
+# Per-cell arrays in trend_analytics.TREND_MEASURES order
+TREND_ARRAYS = ("cell_na", "cell_eu", "cell_jp", "cell_other", "cell_sum")
+
+
+# ---------------------------------------------
+# Sales Cube
+# ---------------------------------------------
+class SalesCube:
+    """Sales pre-aggregated over (Genre, Platform, Publisher, Year) cells.
+
+    Each cell holds the global and regional sales sums, the row count and a
+    pointer to its best-selling row. A selection is answered by rolling up
+    the cells it covers, so chart cost depends on the number of cells, not
+    rows. Trend queries go through per-(dimension, Year) prefix sums built
+    from the cells on first use.
+    """
+
+    def __init__(self, data):
+        self.values = {}
+        self.lookup = {}
+        self._year_rollups = None
+        self._refresh_dimensions(data)
+        cells = self._aggregate(data, 0)
+        for attribute, column in CELL_ARRAYS:
+            # Writable copies: append updates the cells in place
+            setattr(self, attribute, cells[column].to_numpy().copy())
+        self._update_year_bounds()
+
+    def _refresh_dimensions(self, data):
+        """Reads the category dictionaries; codes of known values never change."""
+        self.names = data["Name"]
+        self._columns = {}
+        for dimension in CUBE_DIMENSIONS:
+            column = data[dimension]
+            if not hasattr(column, "cat"):
+                column = column.astype("category")
+            self._columns[dimension] = column
+            self.values[dimension] = list(column.cat.categories)
+            self.lookup[dimension] = {value: code for code, value in enumerate(self.values[dimension])}
+
+    def _aggregate(self, data, start):
+        """Folds rows start.. of the table into cells; max-row pointers are table positions."""
+        rows = slice(start, len(data))
+        # Large tables are split by row range across the aggregation workers
+        return aggregate_cells({
+            "genre": self._columns["Genre"].cat.codes.to_numpy()[rows],
+            "platform": self._columns["Platform"].cat.codes.to_numpy()[rows],
+            "publisher": self._columns["Publisher"].cat.codes.to_numpy()[rows],
+            "year": data["Year"].to_numpy()[rows].astype(np.int32),
+            "sales": data["Global_Sales"].to_numpy(dtype=np.float64)[rows],
+            "na_sales": data["NA_Sales"].to_numpy(dtype=np.float64)[rows],
+            "eu_sales": data["EU_Sales"].to_numpy(dtype=np.float64)[rows],
+            "jp_sales": data["JP_Sales"].to_numpy(dtype=np.float64)[rows],
+            "other_sales": data["Other_Sales"].to_numpy(dtype=np.float64)[rows],
+        }, start)
+
+    def _update_year_bounds(self):
+        if len(self.cell_year):
+            self.year_min = int(self.cell_year.min())
+            self.n_years = int(self.cell_year.max()) - self.year_min + 1
+        else:
+            self.year_min, self.n_years = 0, 0
+
+    def append(self, data, start):
+        """Folds rows start.. of `data`, the table with rows appended at the end, into the cube."""
+        self._refresh_dimensions(data)
+        new = self._aggregate(data, start)
+        existing = pd.DataFrame({
+            "genre": self.cell_genre,
+            "platform": self.cell_platform,
+            "publisher": self.cell_publisher,
+            "year": self.cell_year,
+            "cell": np.arange(len(self)),
+        })
+        new = new.merge(existing, how="left", on=list(CELL_KEYS))
+        matched = new[new["cell"].notna()]
+        cell = matched["cell"].to_numpy(dtype=np.int64)
+
+        for attribute, column in SUMMED_ARRAYS:
+            getattr(self, attribute)[cell] += matched[column].to_numpy()
+        # Ties keep the existing pointer: it is the earlier row, as idxmax would pick
+        better = matched["max"].to_numpy() > self.cell_max[cell]
+        self.cell_max[cell[better]] = matched["max"].to_numpy()[better]
+        self.cell_max_row[cell[better]] = matched["idxmax"].to_numpy()[better]
+
+        added = new[new["cell"].isna()]
+        for attribute, column in CELL_ARRAYS:
+            current = getattr(self, attribute)
+            setattr(self, attribute, np.concatenate([current, added[column].to_numpy(dtype=current.dtype)]))
+        self._update_year_bounds()
+        self._year_rollups = None
+
+    def __len__(self):
+        return len(self.cell_sum)
+
+    def _member_mask(self, dimension, selected, cell_codes):
+        """Boolean mask over cells whose code for `dimension` is in `selected`."""
+        wanted = np.zeros(len(self.values[dimension]), dtype=bool)
+        lookup = self.lookup[dimension]
+        wanted[[lookup[v] for v in selected if v in lookup]] = True
+        return wanted[cell_codes]
+
+    def cell_mask(self, genres=(), platforms=(), publishers=(), year_range=None):
+        """Boolean mask of the cells covered by a selection."""
+        mask = np.ones(len(self), dtype=bool)
+        for dimension, selected, cell_codes in (
+            ("Genre", genres, self.cell_genre),
+            ("Platform", platforms, self.cell_platform),
+            ("Publisher", publishers, self.cell_publisher),
+        ):
+            if len(selected):
+                mask &= self._member_mask(dimension, selected, cell_codes)
+        if year_range is not None:
+            mask &= (self.cell_year >= year_range[0]) & (self.cell_year <= year_range[1])
+        return mask
+
+    def rollup(self, genres=(), platforms=(), publishers=(), year_range=None):
+        """Returns the chart frames and insight values for a selection."""
+        mask = self.cell_mask(genres, platforms, publishers, year_range)
+        cell_year = self.cell_year[mask] - self.year_min
+        cell_genre = self.cell_genre[mask]
+        cell_sum = self.cell_sum[mask]
+        cell_count = self.cell_count[mask]
+        n_genres = len(self.values["Genre"])
+
+        # Per-year and per-genre sums and counts
+        year_sum = np.bincount(cell_year, weights=cell_sum, minlength=self.n_years)
+        year_count = np.bincount(cell_year, weights=cell_count, minlength=self.n_years)
+        genre_sum = np.bincount(cell_genre, weights=cell_sum, minlength=n_genres)
+        genre_count = np.bincount(cell_genre, weights=cell_count, minlength=n_genres)
+
+        # Exact distinct publishers per genre: OR a genre x publisher bitset over the cells
+        publisher_bits = np.zeros((n_genres, len(self.values["Publisher"])), dtype=bool)
+        publisher_bits[cell_genre, self.cell_publisher[mask]] = True
+        publisher_count = publisher_bits.sum(axis=1)
+
+        years_present = np.flatnonzero(year_count)
+        genres_present = np.flatnonzero(genre_count)
+        genre_names = pd.Categorical.from_codes(genres_present, self.values["Genre"])
+
+        rollup = {
+            "rows": int(cell_count.sum()),
+            "total_sales": float(cell_sum.sum()),
+            "sales_by_year": pd.DataFrame({
+                "Year": years_present + self.year_min,
+                "Global_Sales": year_sum[years_present],
+            }),
+            "avg_sales_by_year": pd.DataFrame({
+                "Year": years_present + self.year_min,
+                "Global_Sales": year_sum[years_present] / year_count[years_present],
+            }),
+            "sales_by_genre": pd.DataFrame({
+                "Genre": genre_names,
+                "Global_Sales": genre_sum[genres_present],
+            }),
+            "publishers_by_genre": pd.DataFrame({
+                "Genre": genre_names,
+                "Publisher_Count": publisher_count[genres_present],
+            }),
+            "top_genre": None,
+            "best_selling_game": None,
+        }
+        if len(genres_present):
+            rollup["top_genre"] = self.values["Genre"][genres_present[np.argmax(genre_sum[genres_present])]]
+            # Ties go to the earliest row, as idxmax does on the raw frame
+            cell_max = self.cell_max[mask]
+            best = cell_max == cell_max.max()
+            rollup["best_selling_game"] = self.names.iloc[int(self.cell_max_row[mask][best].min())]
+        return rollup
+
+    # ---------------------------------------------
+    # Trends
+    # ---------------------------------------------
+    @property
+    def year_rollups(self):
+        """Per-(dimension, Year) prefix sums, rebuilt from the cells after an append."""
+        if self._year_rollups is None:
+            self._year_rollups = YearRollups(
+                {"Genre": self.cell_genre, "Platform": self.cell_platform, "Publisher": self.cell_publisher},
+                self.cell_year - self.year_min,
+                self._trend_measures(),
+                {dimension: len(self.values[dimension]) for dimension in CUBE_DIMENSIONS},
+                self.n_years,
+            )
+        return self._year_rollups
+
+    def _trend_measures(self, mask=slice(None)):
+        return np.column_stack([getattr(self, attribute)[mask] for attribute in TREND_ARRAYS])
+
+    def _codes(self, dimension, selected):
+        lookup = self.lookup[dimension]
+        return np.array([lookup[v] for v in selected if v in lookup], dtype=np.int64)
+
+    def trend_base(self, genres=(), platforms=(), publishers=(), year_range=None):
+        """Year prefix sums and platform lifecycle curves for a selection.
+
+        With at most one dimension filtered, both come from the prefix rows of
+        the picked values; otherwise the covered cells are summed per year.
+        """
+        rollups = self.year_rollups
+        filtered = [
+            (dimension, selected)
+            for dimension, selected in zip(CUBE_DIMENSIONS, (genres, platforms, publishers))
+            if len(selected)
+        ]
+        mask = None
+        if len(filtered) <= 1:
+            dimension, selected = filtered[0] if filtered else (None, None)
+            codes = None if dimension is None else self._codes(dimension, selected)
+            prefix = rollups.selection_prefix(dimension, codes)
+        else:
+            # The year range is applied to the prefix below, so cells of every year count here
+            mask = self.cell_mask(genres, platforms, publishers)
+            years = self.cell_year[mask] - self.year_min
+            per_year = value_year_sums(np.zeros_like(years), years, self._trend_measures(mask), 1, self.n_years)
+            prefix = prefix_sums(per_year[0])
+        prefix, first_year = clip_years(prefix, self.year_min, year_range)
+
+        if all(dimension == "Platform" for dimension, _ in filtered):
+            codes = self._codes("Platform", platforms) if filtered else np.arange(len(self.values["Platform"]))
+            platform_years = rollups.platform_years(codes)
+        else:
+            if mask is None:
+                mask = self.cell_mask(genres, platforms, publishers)
+            codes = np.arange(len(self.values["Platform"]))
+            platform_years = value_year_sums(
+                self.cell_platform[mask], self.cell_year[mask] - self.year_min,
+                self.cell_sum[mask][:, None], len(codes), self.n_years,
+            )[:, :, 0]
+        offset = first_year - self.year_min
+        platform_years = platform_years[:, offset:offset + len(prefix) - 1]
+        names = [self.values["Platform"][code] for code in codes]
+        return {
+            "prefix": prefix,
+            "year_min": first_year,
+            "lifecycle": lifecycle_curves(platform_years, offset - rollups.launch[codes], names),
+        }
@@ -0,0 +1,137 @@
+import os
+import threading
+
+from data_store import IncrementalLoader
+from filter_engine import FilterEngine
+from query_cache import QueryCache, selection_key
+from sales_cube import SalesCube
+from shared_table import SHARED_DIR, SharedTableLoader
+from title_index import TITLE_LIMIT, TitleIndex, top_titles
+from trend_analytics import trend_frames
+
+
+# ---------------------------------------------
+# Live Sales Dataset
+# ---------------------------------------------
+class SalesDataset:
+    """The sales table with its filter index, cube, title index and result cache.
+
+    refresh() picks up rows appended to the CSV since the last call and
+    folds them into the indexes in place instead of rebuilding them.
+    Readers go through rollup/filter, which take the same lock as refresh.
+    """
+
+    def __init__(self, file_path, snapshot_dir=None, shared_dir=SHARED_DIR):
+        if shared_dir:
+            # Mapped from the published table; a changed CSV arrives as a new generation
+            self.loader = SharedTableLoader(file_path, shared_dir)
+        else:
+            kwargs = {} if snapshot_dir is None else {"snapshot_dir": snapshot_dir}
+            self.loader = IncrementalLoader(file_path, **kwargs)
+        self.lock = threading.RLock()
+        self.query_cache = QueryCache()
+        self.version = 0
+        self.source_stamp = self._stamp()
+        self._build(self.loader.load())
+
+    def _build(self, data):
+        self.data = data
+        self.engine = FilterEngine(data)
+        self.cube = SalesCube(data)
+        self.titles = TitleIndex(data["Name"].cat.categories, data["Name"].cat.codes.to_numpy())
+        self.query_cache.clear()
+        self.version += 1
+
+    def _stamp(self):
+        # Taken before reading, so a write during the read shows up as a later change
+        stat = os.stat(self.loader.file_path)
+        return [os.path.abspath(self.loader.file_path), stat.st_size, stat.st_mtime_ns]
+
+    def refresh(self):
+        """Ingests appended rows; returns "unchanged", "appended" or "reloaded"."""
+        with self.lock:
+            start = len(self.data)
+            stamp = self._stamp()
+            status, frame = self.loader.refresh()
+            if status != "unchanged":
+                self.source_stamp = stamp
+            if status == "reloaded":
+                self._build(frame)
+            elif status == "appended":
+                self.data = self.loader.data
+                self.engine.append(self.data, start)
+                self.cube.append(self.data, start)
+                self.titles.extend(self.data["Name"].cat.categories)
+                self.titles.set_rows(self.data["Name"].cat.codes.to_numpy())
+                self.query_cache.clear()
+                self.version += 1
+            return status
+
+    # Filter panel inputs, shared with SqlSalesDataset
+    @property
+    def options(self):
+        return self.engine.options
+
+    @property
+    def year_min(self):
+        return self.engine.year_min
+
+    @property
+    def year_max(self):
+        return self.engine.year_max
+
+    def rollup(self, selection):
+        """Chart frames and insight values for a selection, memoized until the next change."""
+        with self.lock:
+            return self.query_cache.get_or_compute(
+                selection_key(**selection), lambda: self.cube.rollup(**selection)
+            )
+
+    def trends(self, selection, window=1):
+        """Regional series, growth and platform lifecycles for a selection, over `window`-year means.
+
+        The selection's year prefix is memoized; any window is then a pass over its years.
+        """
+        with self.lock:
+            base = self.query_cache.get_or_compute(
+                ("trends",) + selection_key(**selection), lambda: self.cube.trend_base(**selection)
+            )
+        return trend_frames(base, window)
+
+    def filter(self, selection):
+        """Rows matching a selection."""
+        with self.lock:
+            return self.engine.filter(**selection)
+
+    def row_chunks(self, selection, chunk_rows):
+        """Rows matching a selection, chunk_rows at a time; never the whole result at once.
+
+        The table and the selected row ids are captured under the lock, so
+        a refresh during a long export neither waits for it nor changes it.
+        """
+        with self.lock:
+            data = self.data
+            row_ids = self.engine.select(**selection)
+        n_rows = len(data) if row_ids is None else len(row_ids)
+        # An empty selection still yields one (empty) chunk, which carries the columns
+        for low in range(0, max(n_rows, 1), chunk_rows):
+            if row_ids is None:
+                yield data.iloc[low:low + chunk_rows]
+            else:
+                yield data.take(row_ids[low:low + chunk_rows])
+
+    def search_titles(self, query, selection, limit=TITLE_LIMIT):
+        """Rows of the best-selling titles matching a name fragment within a selection.
+
+        Returns (rows, fuzzy); fuzzy is True when a word only matched by spelling.
+        """
+        with self.lock:
+            return self.query_cache.get_or_compute(
+                ("titles", query.strip().lower(), limit) + selection_key(**selection),
+                lambda: self._search_titles(query, selection, limit),
+            )
+
+    def _search_titles(self, query, selection, limit):
+        codes, fuzzy = self.titles.match(query)
+        rows = self.titles.rows(codes, self.engine.select(**selection))
+        return top_titles(self.data.take(rows), limit), fuzzy
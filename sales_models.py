@@ -0,0 +1,380 @@
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data_store import _write_atomic, _write_json
+
+MODEL_DIR = os.environ.get("VGSALES_MODEL_DIR", ".models")
+# 0 disables background training; models already on disk are still served
+MODEL_WORKERS = int(os.environ.get("MODEL_WORKERS", min(5, os.cpu_count() or 1)))
+
+# The notebook's regressors, as (module, class, parameters) so workers import them lazily
+MODELS = {
+    "Linear Regression": ("sklearn.linear_model", "LinearRegression", {}),
+    "Gradient Boosting": ("sklearn.ensemble", "GradientBoostingRegressor", {"n_estimators": 100, "random_state": 42}),
+    "Decision Tree": ("sklearn.tree", "DecisionTreeRegressor", {"max_depth": 5, "random_state": 42}),
+    "SVM": ("sklearn.svm", "SVR", {"kernel": "rbf"}),
+    "KNN": ("sklearn.neighbors", "KNeighborsRegressor", {"n_neighbors": 5}),
+}
+LABEL_COLUMNS = ["Genre", "Publisher", "Platform"]
+FEATURES = ["NA_Sales", "EU_Sales", "Other_Sales", "Genre_Label", "Publisher_Label", "Platform_Label"]
+TARGET = "Global_Sales"
+# Outlier caps from the notebook, in millions
+OUTLIER_THRESHOLDS = {"NA_Sales": 20, "EU_Sales": 10, "Other_Sales": 5, "JP_Sales": 9}
+TEST_SIZE = 0.3
+# Rows scored per predict call: bounds the feature matrix and per-model scratch memory
+SCORE_CHUNK_ROWS = int(os.environ.get("SCORE_CHUNK_ROWS", 10_000))
+REGIONAL_COLUMNS = ["NA_Sales", "EU_Sales", "Other_Sales"]
+
+
+# ---------------------------------------------
+# Training Data
+# ---------------------------------------------
+def label_classes(data):
+    """Sorted distinct values per label column, as LabelEncoder orders them."""
+    return {column: sorted(data[column].dropna().astype(str).unique()) for column in LABEL_COLUMNS}
+
+
+def encode_labels(values, classes):
+    """LabelEncoder codes for `values`; values outside `classes` become -1."""
+    return pd.Categorical(np.asarray(values, dtype=object), categories=classes).codes.astype(np.float64)
+
+
+class CodeTable:
+    """Maps values to a run's LabelEncoder codes without refitting anything.
+
+    Categorical columns are translated once per category dictionary and then
+    remapped by integer code, so a batch never compares strings per row.
+    """
+
+    def __init__(self, classes):
+        self.classes = pd.Index(classes)
+        self._by_dictionary = {}
+
+    def encode(self, values):
+        """Codes for a column of values as float64; unknown values become -1."""
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            categories = values.cat.categories
+            cached = self._by_dictionary.get(id(categories))
+            if cached is None or cached[0] is not categories:
+                # Keep the dictionary alive with its table so its id is not reused
+                cached = (categories, self.classes.get_indexer(categories.astype(str)))
+                self._by_dictionary = {id(categories): cached}
+            lookup = np.append(cached[1], -1)  # Missing values have code -1 -> last slot
+            return lookup[values.cat.codes.to_numpy()].astype(np.float64)
+        return self.classes.get_indexer(np.asarray(values, dtype=object)).astype(np.float64)
+
+
+def training_frame(data):
+    """The notebook's feature table: outliers removed, categories label-encoded."""
+    keep = np.ones(len(data), dtype=bool)
+    for column, limit in OUTLIER_THRESHOLDS.items():
+        if column in data.columns:
+            keep &= data[column].to_numpy() <= limit
+    data = data[keep]
+    classes = label_classes(data)
+    frame = pd.DataFrame({
+        "NA_Sales": data["NA_Sales"].to_numpy(np.float64),
+        "EU_Sales": data["EU_Sales"].to_numpy(np.float64),
+        "Other_Sales": data["Other_Sales"].to_numpy(np.float64),
+        **{f"{column}_Label": encode_labels(data[column], classes[column]) for column in LABEL_COLUMNS},
+        TARGET: data[TARGET].to_numpy(np.float64),
+    })
+    return frame, classes
+
+
+def training_key(source_stamp):
+    """Hash of the dataset's source stamp and the model settings; names the artifact directory.
+
+    The stamp (path, size and mtime of what the dataset was read from) is
+    the same in every process and costs a stat, so finding existing models
+    never reads or hashes the table itself.
+    """
+    digest = hashlib.sha256(json.dumps([source_stamp, MODELS, OUTLIER_THRESHOLDS, TEST_SIZE],
+                                       sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+# ---------------------------------------------
+# Worker: fit one model
+# ---------------------------------------------
+def build_model(name):
+    module, cls, params = MODELS[name]
+    return getattr(importlib.import_module(module), cls)(**params)
+
+
+def fit_model(name, X_train, y_train, X_test, y_test, path):
+    """Fits and scores one model and writes it to `path`; runs in a worker process."""
+    import joblib
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    start = time.perf_counter()
+    model = build_model(name)
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    predicted = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+    _write_atomic(path, lambda tmp: joblib.dump(model, tmp))
+    return {
+        "MSE": float(mean_squared_error(y_test, predicted)),
+        "R2": float(r2_score(y_test, predicted)),
+        "fit_s": fit_s,
+        # Scoring speed on the test split, for picking models on latency as well as R2
+        "rows_per_s": len(X_test) / max(predict_s, 1e-9),
+    }
+
+
+@lru_cache(maxsize=16)
+def load_model(path):
+    """Loads a fitted model once per process."""
+    import joblib
+
+    return joblib.load(path)
+
+
+def _rows(values, rows):
+    """Positional slice of a Series or a plain sequence."""
+    return values.iloc[rows] if hasattr(values, "iloc") else values[rows]
+
+
+def _model_file(name):
+    return name.lower().replace(" ", "_") + ".joblib"
+
+
+# ---------------------------------------------
+# Model Service
+# ---------------------------------------------
+class ModelService:
+    """Trains the notebook's models in a process pool and serves predictions from disk.
+
+    Fitted models live in MODEL_DIR/<training key>/. ensure() never blocks:
+    it starts a training run for a new dataset version (one run at a time,
+    the newest pending version next) while predictions keep coming from the
+    newest complete run.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, max_workers=MODEL_WORKERS):
+        self.model_dir = model_dir
+        self.max_workers = max_workers
+        # Reentrant: a done callback can run inside _prepare when a fit fails at once
+        self.lock = threading.RLock()
+        self._executor = None
+        self._training = None  # (key, {name: future})
+        self._trained = set()  # Run keys this service wrote, the only ones it may remove
+        self._pending = None
+        self._failed = {}
+        self._tables = None
+        self._throughput = {}
+        self.ready = self._latest_complete()
+
+    def _meta_path(self, key):
+        return os.path.join(self.model_dir, key, "meta.json")
+
+    def _read_meta(self, key):
+        try:
+            with open(self._meta_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _latest_complete(self):
+        """The most recently trained complete run on disk, or None."""
+        try:
+            keys = os.listdir(self.model_dir)
+        except OSError:
+            return None
+        runs = [meta for meta in map(self._read_meta, keys) if meta and meta.get("complete")]
+        return max(runs, key=lambda meta: meta["trained_at"]) if runs else None
+
+    def _pool(self):
+        if self._executor is None:
+            # Spawned workers: forking a threaded server process is not safe
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context)
+        return self._executor
+
+    def ensure(self, dataset):
+        """Makes sure models for the dataset's current version exist or are training."""
+        key = training_key(dataset.source_stamp)
+        with self.lock:
+            if self.ready and self.ready["key"] == key:
+                return
+            meta = self._read_meta(key)
+            if meta and meta.get("complete"):
+                self.ready = meta
+            elif not self.max_workers:
+                return
+            elif self._training is None:
+                self._start(key, dataset)
+            elif self._training[0] != key:
+                self._pending = (key, dataset)
+
+    def _start(self, key, dataset):
+        # The table is read and encoded on a thread: a rerun never waits for it
+        self._training = (key, {})
+        self._failed = {}
+        threading.Thread(target=self._prepare, args=(key, dataset), name="model-training", daemon=True).start()
+
+    def _prepare(self, key, dataset):
+        from sklearn.model_selection import train_test_split
+
+        try:
+            # Stamp first: rows the read picks up beyond it only make the run newer than its key
+            stamp_key = training_key(dataset.source_stamp)
+            frame, classes = training_frame(dataset.filter({}))
+            X, y = frame[FEATURES].to_numpy(), frame[TARGET].to_numpy()
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=42)
+            directory = os.path.join(self.model_dir, stamp_key)
+            os.makedirs(directory, exist_ok=True)
+        except Exception as error:
+            with self.lock:
+                self._failed = {name: repr(error) for name in MODELS}
+                self._next_run()
+            return
+
+        with self.lock:
+            futures = {
+                name: self._pool().submit(
+                    fit_model, name, X_train, y_train, X_test, y_test, os.path.join(directory, _model_file(name))
+                )
+                for name in MODELS
+            }
+            self._training = (stamp_key, futures)
+            self._trained.add(stamp_key)
+            if self._pending is not None and self._pending[0] == stamp_key:
+                self._pending = None
+            meta = {"key": stamp_key, "classes": classes, "rows": len(frame), "models": {}, "complete": False}
+            for name, future in futures.items():
+                future.add_done_callback(lambda f, name=name: self._finished(stamp_key, name, f, meta))
+
+    def _finished(self, key, name, future, meta):
+        with self.lock:
+            if future.exception() is not None:
+                self._failed[name] = repr(future.exception())
+            else:
+                meta["models"][name] = {"file": _model_file(name), **future.result()}
+            if not all(f.done() for f in self._training[1].values()):
+                return
+            meta["complete"] = True
+            meta["trained_at"] = time.time()
+            _write_json(self._meta_path(key), meta)
+            if meta["models"]:
+                previous, self.ready = self.ready, meta
+                self._remove_stale_runs(key, previous and previous["key"])
+            self._next_run()
+
+    def _next_run(self):
+        self._training = None
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self._start(*pending)
+
+    def _remove_stale_runs(self, keep, previous):
+        """Deletes older runs this service trained, except the one it served until now.
+
+        Reruns may still be scoring with `previous`; it goes at the next
+        promotion. Runs of other processes (another CSV, a rolling restart)
+        are never touched.
+        """
+        for key in self._trained - {keep, previous}:
+            shutil.rmtree(os.path.join(self.model_dir, key), ignore_errors=True)
+        self._trained &= {keep, previous}
+
+    def status(self):
+        """Model name -> "ready", "training" or "failed" for the display."""
+        with self.lock:
+            states = {name: "ready" for name in (self.ready or {}).get("models", {})}
+            if self._training is not None:
+                futures = self._training[1]
+                for name in MODELS:  # No futures yet while the training table is prepared
+                    future = futures.get(name)
+                    done = future is not None and future.done() and name not in self._failed
+                    states.setdefault(name, "ready" if done else "training")
+            for name in self._failed:
+                states.setdefault(name, "failed")
+            return states
+
+    def available(self):
+        """Fitted models of the newest complete run, with their test-set scores."""
+        with self.lock:
+            return dict((self.ready or {}).get("models", {}))
+
+    def _code_tables(self, meta):
+        with self.lock:
+            if self._tables is None or self._tables[0] is not meta:
+                self._tables = (meta, {column: CodeTable(meta["classes"][column]) for column in LABEL_COLUMNS})
+            return self._tables[1]
+
+    def predict_batch(self, name, records, chunk_rows=SCORE_CHUNK_ROWS, record=True):
+        """Predicts Global_Sales for every row of `records` with the newest complete run.
+
+        `records` maps NA_Sales, EU_Sales, Other_Sales, Genre, Publisher and
+        Platform to equal-length columns: a filtered sales frame or a dict of
+        lists. Rows are scored chunk_rows at a time and the rate is recorded
+        for throughput(). Returns None while no fitted model is available,
+        including when the run was removed between reading it and loading it.
+        """
+        with self.lock:
+            meta = self.ready
+        if meta is None or name not in meta["models"]:
+            return None
+        tables = self._code_tables(meta)
+        try:
+            model = load_model(os.path.join(self.model_dir, meta["key"], meta["models"][name]["file"]))
+        except FileNotFoundError:
+            return None
+        n_rows = len(records[REGIONAL_COLUMNS[0]])
+        predictions = np.empty(n_rows, dtype=np.float64)
+        features = np.empty((min(chunk_rows, n_rows), len(FEATURES)), dtype=np.float64)
+
+        start = time.perf_counter()
+        for low in range(0, n_rows, chunk_rows):
+            rows = slice(low, min(low + chunk_rows, n_rows))
+            chunk = features[:rows.stop - low]
+            for i, column in enumerate(REGIONAL_COLUMNS):
+                chunk[:, i] = np.asarray(_rows(records[column], rows), dtype=np.float64)
+            for i, column in enumerate(LABEL_COLUMNS, start=len(REGIONAL_COLUMNS)):
+                chunk[:, i] = tables[column].encode(_rows(records[column], rows))
+            predictions[rows] = model.predict(chunk)
+        if record:
+            self._record_throughput(name, n_rows, time.perf_counter() - start)
+        return predictions
+
+    def predict(self, name, records):
+        """predict_batch for a handful of rows; too small to count towards throughput."""
+        return self.predict_batch(name, records, record=False)
+
+    def _record_throughput(self, name, rows, seconds):
+        with self.lock:
+            total_rows, total_s = self._throughput.get(name, (0, 0.0))
+            self._throughput[name] = (total_rows + rows, total_s + seconds)
+
+    def throughput(self):
+        """Model name -> rows/sec: live batch scoring where measured, else the test-split figure."""
+        with self.lock:
+            rates = {name: scores["rows_per_s"] for name, scores in self.available().items()
+                     if "rows_per_s" in scores}
+            for name, (rows, seconds) in self._throughput.items():
+                if seconds > 0:
+                    rates[name] = rows / seconds
+            return rates
+
+    def shutdown(self):
+        with self.lock:
+            self._pending = None
+            # Fits not yet started are dropped (shutdown's cancel_futures needs Python 3.9)
+            for future in (self._training or (None, {}))[1].values():
+                future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from data_store import IncrementalLoader, _write_atomic, _write_json
+
+# Directory (ideally on tmpfs, e.g. /dev/shm/vgsales) the table is published to;
+# unset means every process loads its own copy
+SHARED_DIR = os.environ.get("VGSALES_SHARED_DIR")
+POINTER_NAME = "current.json"
+LOCK_NAME = "publish.lock"
+
+
+# ---------------------------------------------
+# Publishing Generations
+# ---------------------------------------------
+def _source_stamp(file_path):
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_pointer(shared_dir):
+    """The current generation's record, or None before the first publish."""
+    try:
+        with open(os.path.join(shared_dir, POINTER_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_current(pointer, file_path):
+    return (
+        pointer is not None
+        and pointer["source"] == os.path.abspath(file_path)
+        and pointer["stamp"] == _source_stamp(file_path)
+    )
+
+
+def _next_table(file_path, shared_dir, pointer):
+    """The CSV's table and the loader position it was read up to.
+
+    When the current generation came from the same file and it only grew,
+    that generation is mapped and just the appended rows are parsed onto it.
+    """
+    loader = IncrementalLoader(file_path)
+    if pointer is not None and pointer["source"] == os.path.abspath(file_path) and "position" in pointer:
+        try:
+            _, current = map_generation(shared_dir)
+        except FileNotFoundError:
+            current = None
+        if current is not None:
+            loader.resume(current, pointer["position"])
+            status, _ = loader.refresh()
+            return status, loader.data, loader.position()
+    return "reloaded", loader.load(), loader.position()
+
+
+def publish(file_path, shared_dir):
+    """Writes the CSV's table as the next generation and points readers at it.
+
+    Stored as an uncompressed Arrow IPC file, so readers map the columns
+    as they are instead of decoding them. Older generations are unlinked at
+    once: processes that still map one keep it until they swap. Returns the
+    generation readers should map, which stays the current one when the CSV
+    changed without gaining complete rows.
+    """
+    stamp = _source_stamp(file_path)  # Taken first: a write during the load triggers a republish
+    pointer = read_pointer(shared_dir)
+    status, data, position = _next_table(file_path, shared_dir, pointer)
+    record = {
+        "source": os.path.abspath(file_path),
+        "stamp": stamp,
+        "position": position,
+        "rows": len(data),
+        "published_at": time.time(),
+    }
+    if status == "unchanged":
+        # E.g. a partly written last line: note the stamp so readers don't republish
+        _write_json(os.path.join(shared_dir, POINTER_NAME), dict(pointer, **record))
+        return pointer["generation"]
+    generation = (pointer["generation"] if pointer else 0) + 1
+    name = f"sales.{generation}.arrow"
+    table = pa.Table.from_pandas(data, preserve_index=False)
+
+    def write(tmp_path):
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    _write_atomic(os.path.join(shared_dir, name), write)
+    _write_json(os.path.join(shared_dir, POINTER_NAME), dict(record, generation=generation, path=name))
+    for old in os.listdir(shared_dir):
+        if old.startswith("sales.") and old.endswith(".arrow") and old != name:
+            os.remove(os.path.join(shared_dir, old))
+    return generation
+
+
+def ensure_published(file_path, shared_dir):
+    """Publishes the CSV unless the current generation already matches it; returns the generation.
+
+    Only one process parses: the others wait on the lock, then find the
+    fresh generation and map it.
+    """
+    pointer = read_pointer(shared_dir)
+    if _is_current(pointer, file_path):
+        return pointer["generation"]
+    import fcntl
+
+    os.makedirs(shared_dir, exist_ok=True)
+    with open(os.path.join(shared_dir, LOCK_NAME), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        pointer = read_pointer(shared_dir)
+        if _is_current(pointer, file_path):
+            return pointer["generation"]
+        return publish(file_path, shared_dir)
+
+
+# ---------------------------------------------
+# Mapping a Generation
+# ---------------------------------------------
+def frame_from_table(table):
+    """A DataFrame whose columns are views of the table's buffers.
+
+    Categoricals are rebuilt from the dictionary indices and values rather
+    than through to_pandas, which copies both.
+    """
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        chunk = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+        if pa.types.is_dictionary(chunk.type):
+            categories = pd.Index(pd.array(chunk.dictionary, dtype="str"))
+            # Missing values are code -1 in pandas; only a column holding some is copied
+            indices = chunk.indices if chunk.null_count == 0 else chunk.indices.fill_null(-1)
+            codes = indices.to_numpy(zero_copy_only=chunk.null_count == 0)
+            columns[name] = pd.Categorical.from_codes(
+                codes, dtype=pd.CategoricalDtype(categories), validate=False
+            )
+        else:
+            columns[name] = chunk.to_numpy(zero_copy_only=chunk.null_count == 0)
+    return pd.DataFrame(columns, copy=False)
+
+
+def map_generation(shared_dir):
+    """Maps the current generation read-only; returns (generation, frame)."""
+    for _ in range(3):
+        pointer = read_pointer(shared_dir)
+        if pointer is None:
+            raise FileNotFoundError(f"No sales table published in {shared_dir}")
+        try:
+            source = pa.memory_map(os.path.join(shared_dir, pointer["path"]), "r")
+        except FileNotFoundError:
+            continue  # Swapped between reading the pointer and opening the file
+        return pointer["generation"], frame_from_table(pa.ipc.open_file(source).read_all())
+    raise FileNotFoundError(f"Sales table in {shared_dir} kept changing while mapping it")
+
+
+class SharedTableLoader:
+    """IncrementalLoader's load/refresh over a published table.
+
+    Every dashboard process maps the same pages, so the table costs one
+    copy per host; refresh() swaps to a newer generation when the CSV
+    changes (republishing it first if no other process has yet).
+    """
+
+    def __init__(self, file_path, shared_dir=SHARED_DIR):
+        self.file_path = file_path
+        self.shared_dir = shared_dir
+        self.generation = None
+        self.data = None
+
+    def load(self):
+        ensure_published(self.file_path, self.shared_dir)
+        self.generation, self.data = map_generation(self.shared_dir)
+        return self.data
+
+    def refresh(self):
+        """Returns ("reloaded", frame) after a swap to a new generation, else ("unchanged", None)."""
+        if ensure_published(self.file_path, self.shared_dir) == self.generation:
+            return "unchanged", None
+        return "reloaded", self.load()
+
+
+# ---------------------------------------------
+# Command Line: a dedicated publisher
+# ---------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Publish the preprocessed sales table for dashboard processes to map.")
+    parser.add_argument("--source", default="vgsales.csv")
+    parser.add_argument("--dir", default=SHARED_DIR or "/dev/shm/vgsales", help="Shared directory (default: %(default)s)")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="Keep republishing when the CSV changes")
+    args = parser.parse_args()
+
+    while True:
+        pointer = read_pointer(args.dir)
+        generation = ensure_published(args.source, args.dir)
+        if pointer is None or pointer["generation"] != generation:
+            current = read_pointer(args.dir)
+            print(f"generation {generation}: {current['rows']} rows -> {os.path.join(args.dir, current['path'])}")
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+import numpy as np
+import pandas as pd
+
+from data_store import load_sales_data
+from query_cache import QueryCache, selection_key
+from title_index import TITLE_LIMIT, TitleIndex, top_titles
+from trend_analytics import clip_years, lifecycle_curves, prefix_sums, trend_frames
+
+DATABASE_PATH = os.environ.get("VGSALES_DB", "video_game.db")
+POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", 4))
+# Map the file instead of copying pages into each connection's cache, so
+# every worker reads the same OS page cache
+MMAP_BYTES = 256 * 2**20
+SQL_DIMENSIONS = ("Genre", "Platform", "Publisher")
+
+# The normalized schema from the project notebook (Q3)
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS genre_table (
+        Genre_ID INTEGER PRIMARY KEY,
+        Genre TEXT NOT NULL
+    )""",
+    """
+    CREATE TABLE IF NOT EXISTS publisher_table (
+        Publisher_ID INTEGER PRIMARY KEY,
+        Publisher TEXT NOT NULL
+    )""",
+    """
+    CREATE TABLE IF NOT EXISTS platform_table (
+        Platform_ID INTEGER PRIMARY KEY,
+        Platform TEXT NOT NULL
+    )""",
+    """
+    CREATE TABLE IF NOT EXISTS sales_table (
+        Sales_ID INTEGER PRIMARY KEY,
+        NA_Sales REAL,
+        EU_Sales REAL,
+        Other_Sales REAL,
+        Global_Sales REAL
+    )""",
+    """
+    CREATE TABLE IF NOT EXISTS video_game_table (
+        Rank INTEGER,
+        Name TEXT NOT NULL,
+        Year INTEGER,
+        Genre_ID INTEGER,
+        Publisher_ID INTEGER,
+        Platform_ID INTEGER,
+        Sales_ID INTEGER,
+        FOREIGN KEY (Genre_ID) REFERENCES genre_table (Genre_ID),
+        FOREIGN KEY (Publisher_ID) REFERENCES publisher_table (Publisher_ID),
+        FOREIGN KEY (Platform_ID) REFERENCES platform_table (Platform_ID),
+        FOREIGN KEY (Sales_ID) REFERENCES sales_table (Sales_ID)
+    )""",
+]
+
+# The filter panel always constrains genre or platform, usually with a year
+# range. Each index also carries the columns the rollup reads, so the scan
+# never visits the table rows; the Global_Sales index serves the best seller.
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS video_game_genre_idx "
+    "ON video_game_table (Genre_ID, Year, Platform_ID, Publisher_ID, Sales_ID)",
+    "CREATE INDEX IF NOT EXISTS video_game_platform_idx "
+    "ON video_game_table (Platform_ID, Year, Genre_ID, Publisher_ID, Sales_ID)",
+    "CREATE INDEX IF NOT EXISTS video_game_publisher_idx "
+    "ON video_game_table (Publisher_ID, Year, Genre_ID, Platform_ID, Sales_ID)",
+    "CREATE INDEX IF NOT EXISTS video_game_year_idx "
+    "ON video_game_table (Year, Genre_ID, Platform_ID, Publisher_ID, Sales_ID)",
+    "CREATE INDEX IF NOT EXISTS video_game_sales_idx ON video_game_table (Sales_ID)",
+    # Title search resolves matched names to rows
+    "CREATE INDEX IF NOT EXISTS video_game_name_idx ON video_game_table (Name)",
+    "CREATE INDEX IF NOT EXISTS sales_global_idx ON sales_table (Global_Sales)",
+]
+
+JOIN_SALES = "FROM video_game_table v JOIN sales_table s ON s.Sales_ID = v.Sales_ID"
+ROWS_QUERY = (
+    "SELECT v.Name, v.Year, g.Genre, p.Publisher, pl.Platform, "
+    "s.NA_Sales, s.EU_Sales, s.Other_Sales, s.Global_Sales "
+    f"{JOIN_SALES} "
+    "JOIN genre_table g ON g.Genre_ID = v.Genre_ID "
+    "JOIN publisher_table p ON p.Publisher_ID = v.Publisher_ID "
+    "JOIN platform_table pl ON pl.Platform_ID = v.Platform_ID"
+)
+
+
+def _where(clauses):
+    return (" WHERE " + " AND ".join(clauses)) if clauses else ""
+
+
+# ---------------------------------------------
+# Building the Database
+# ---------------------------------------------
+def _dimension_table(data, dimension):
+    """Distinct values in first-appearance order with 1-based ids, as the notebook numbers them."""
+    values = pd.unique(data[dimension].astype(object))
+    return {value: i + 1 for i, value in enumerate(values)}
+
+
+def create_indexes(conn):
+    for statement in INDEXES:
+        conn.execute(statement)
+    conn.execute("ANALYZE")
+
+
+def build_database(data, db_path=DATABASE_PATH):
+    """Writes the preprocessed sales table into the normalized schema.
+
+    Built in a temp file and swapped in, so open read-only connections keep
+    the old file until they reconnect.
+    """
+    directory = os.path.dirname(os.path.abspath(db_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".db.tmp")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            ids = {}
+            for dimension in SQL_DIMENSIONS:
+                ids[dimension] = _dimension_table(data, dimension)
+                conn.executemany(
+                    f"INSERT INTO {dimension.lower()}_table ({dimension}_ID, {dimension}) VALUES (?, ?)",
+                    [(i, value) for value, i in ids[dimension].items()],
+                )
+
+            sales_ids = range(1, len(data) + 1)
+            conn.executemany(
+                "INSERT INTO sales_table VALUES (?, ?, ?, ?, ?)",
+                zip(sales_ids, *(data[c].astype(float).tolist()
+                                 for c in ["NA_Sales", "EU_Sales", "Other_Sales", "Global_Sales"])),
+            )
+            rank = data["Rank"].tolist() if "Rank" in data.columns else [None] * len(data)
+            conn.executemany(
+                "INSERT INTO video_game_table VALUES (?, ?, ?, ?, ?, ?, ?)",
+                zip(
+                    rank,
+                    data["Name"].astype(str).tolist(),
+                    data["Year"].astype(int).tolist(),
+                    *([ids[d][value] for value in data[d].astype(object)]
+                      for d in ("Genre", "Publisher", "Platform")),
+                    sales_ids,
+                ),
+            )
+            create_indexes(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return db_path
+
+
+def ensure_database(file_path, db_path=DATABASE_PATH):
+    """Builds the database from the CSV when it is missing or older than the CSV."""
+    try:
+        current = os.path.getmtime(db_path) >= os.path.getmtime(file_path)
+    except OSError:
+        current = False
+    if not current:
+        build_database(load_sales_data(file_path), db_path)
+    return db_path
+
+
+# ---------------------------------------------
+# Read-only Connection Pool
+# ---------------------------------------------
+class ConnectionPool:
+    """A fixed set of read-only connections, handed out one per query."""
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.retired = False
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self):
+        uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = 1")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_BYTES}")
+        return conn
+
+    def acquire(self):
+        return self._idle.get()
+
+    def release(self, conn):
+        with self._lock:
+            if not self.retired:
+                self._idle.put(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Closes the idle connections now and the checked-out ones as they come back."""
+        with self._lock:
+            self.retired = True
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+# ---------------------------------------------
+# SQL Sales Dataset
+# ---------------------------------------------
+class SqlSalesDataset:
+    """Answers the dashboard's selections with indexed SQL over the normalized schema.
+
+    Drop-in for SalesDataset: the same options, year bounds, rollup and
+    filter, with the rows living on disk instead of in each process.
+    """
+
+    def __init__(self, db_path=DATABASE_PATH, source_path=None, pool_size=POOL_SIZE):
+        self.db_path = db_path
+        self.source_path = source_path
+        self.pool_size = pool_size
+        self.lock = threading.RLock()
+        self.query_cache = QueryCache()
+        self.version = 0
+        self.pool = None
+        self._rebuild_thread = None
+        self._reloaded = False
+        self._swap(self._load())
+
+    def _load(self):
+        """Opens a pool on the database file and reads the filter options, without touching self."""
+        stat = os.stat(self.db_path)
+        pool = ConnectionPool(self.db_path, self.pool_size)
+        ids, options = {}, {}
+        with pool.connection() as conn:
+            for dimension in SQL_DIMENSIONS:
+                rows = conn.execute(
+                    f"SELECT {dimension}, {dimension}_ID FROM {dimension.lower()}_table ORDER BY {dimension}_ID"
+                ).fetchall()
+                ids[dimension] = dict(rows)
+                options[dimension] = [value for value, _ in rows]
+            low, high = conn.execute("SELECT MIN(Year), MAX(Year) FROM video_game_table").fetchone()
+            titles = [name for (name,) in conn.execute("SELECT DISTINCT Name FROM video_game_table")]
+        return {
+            "identity": (stat.st_ino, stat.st_mtime_ns),
+            "pool": pool,
+            "ids": ids,
+            "options": options,
+            "titles": titles,
+            "index": TitleIndex(titles),
+            "years": (int(low or 0), int(high or 0)),
+        }
+
+    def _swap(self, state):
+        with self.lock:
+            previous = self.pool
+            self._identity, self.pool = state["identity"], state["pool"]
+            self._ids, self.options = state["ids"], state["options"]
+            self._titles, self.titles = state["titles"], state["index"]
+            self.year_min, self.year_max = state["years"]
+            self.query_cache.clear()
+            self.version += 1
+        if previous is not None:
+            previous.close()
+
+    def _stale(self):
+        """True when the CSV is newer than the database or the database file was replaced."""
+        try:
+            stat = os.stat(self.db_path)
+            if self.source_path is not None and os.path.getmtime(self.source_path) > stat.st_mtime:
+                return True
+        except OSError:
+            return self.source_path is not None
+        return (stat.st_ino, stat.st_mtime_ns) != self._identity
+
+    def _rebuild(self):
+        try:
+            if self.source_path is not None:
+                ensure_database(self.source_path, self.db_path)
+            self._swap(self._load())
+            with self.lock:
+                self._reloaded = True
+        finally:
+            with self.lock:
+                self._rebuild_thread = None
+
+    def refresh(self):
+        """Starts a background rebuild and reconnect when the CSV or the database file changed.
+
+        Returns "reloaded" once a rebuild has been swapped in since the last
+        call, else "unchanged"; queries keep reading the current file meanwhile.
+        """
+        with self.lock:
+            if self._rebuild_thread is None and self._stale():
+                self._rebuild_thread = threading.Thread(target=self._rebuild, name="sql-rebuild", daemon=True)
+                self._rebuild_thread.start()
+            status, self._reloaded = ("reloaded" if self._reloaded else "unchanged"), False
+            return status
+
+    @contextmanager
+    def _connection(self):
+        # Checked out under the lock the swap takes, so no query waits on a
+        # pool that was just closed; a retired pool closes it on return
+        with self.lock:
+            pool = self.pool
+            conn = pool.acquire()
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+
+    @property
+    def source_stamp(self):
+        """Identifies the database file this version reads, the same in every process."""
+        return [os.path.abspath(self.db_path), *self._identity]
+
+    def _conditions(self, genres=(), platforms=(), publishers=(), year_range=None):
+        """Returns the selection as SQL conditions on `v` and their parameters."""
+        clauses, params = [], []
+        for dimension, selected in zip(SQL_DIMENSIONS, (genres, platforms, publishers)):
+            if len(selected):
+                ids = [self._ids[dimension][v] for v in selected if v in self._ids[dimension]]
+                clauses.append(f"v.{dimension}_ID IN ({', '.join('?' * len(ids))})")
+                params += ids
+        if year_range is not None:
+            clauses.append("v.Year BETWEEN ? AND ?")
+            params += [int(year_range[0]), int(year_range[1])]
+        return clauses, params
+
+    def _rollup(self, selection):
+        clauses, params = self._conditions(**selection)
+        where = _where(clauses)
+        with self._connection() as conn:
+            # One scan into (year, genre, publisher) cells; the charts are rolled up from those
+            rows = conn.execute(
+                f"SELECT v.Year, v.Genre_ID, v.Publisher_ID, SUM(s.Global_Sales), COUNT(*), "
+                f"MAX(s.Global_Sales) {JOIN_SALES}{where} "
+                "GROUP BY v.Year, v.Genre_ID, v.Publisher_ID", params).fetchall()
+            cells = np.array(rows, dtype=np.float64).reshape(-1, 6)
+            best = None
+            if len(cells):
+                # Few rows share the top sale, so look them up through the sales index.
+                # Ties go to the earliest row, as idxmax does on the raw frame.
+                best = conn.execute(
+                    "SELECT v.Name FROM sales_table s CROSS JOIN video_game_table v "
+                    "ON v.Sales_ID = s.Sales_ID WHERE s.Global_Sales = ?"
+                    + "".join(f" AND {clause}" for clause in clauses)
+                    + " ORDER BY v.rowid LIMIT 1",
+                    [float(cells[:, 5].max())] + params).fetchone()
+
+        year, genre, publisher = cells[:, :3].astype(np.int64).T
+        cell_sum, cell_count = cells[:, 3], cells[:, 4]
+        years, year_index = np.unique(year, return_inverse=True)
+        year_sum = np.bincount(year_index, weights=cell_sum, minlength=len(years))
+        year_count = np.bincount(year_index, weights=cell_count, minlength=len(years))
+
+        genre_names = {i: name for name, i in self._ids["Genre"].items()}
+        genre_ids, genre_index = np.unique(genre, return_inverse=True)
+        genre_sum = np.bincount(genre_index, weights=cell_sum, minlength=len(genre_ids))
+        # Exact distinct publishers per genre: count distinct (genre, publisher) pairs
+        pairs = np.unique(np.stack([genre_index, publisher]), axis=1)
+        publisher_count = np.bincount(pairs[0], minlength=len(genre_ids))
+        names = [genre_names[i] for i in genre_ids]
+        order = np.argsort(names, kind="stable")
+        names = [names[i] for i in order]
+
+        return {
+            "rows": int(year_count.sum()),
+            "total_sales": float(year_sum.sum()),
+            "sales_by_year": pd.DataFrame({"Year": years, "Global_Sales": year_sum}),
+            "avg_sales_by_year": pd.DataFrame({"Year": years, "Global_Sales": year_sum / year_count}),
+            "sales_by_genre": pd.DataFrame({"Genre": names, "Global_Sales": genre_sum[order]}),
+            "publishers_by_genre": pd.DataFrame({"Genre": names, "Publisher_Count": publisher_count[order]}),
+            "top_genre": names[int(np.argmax(genre_sum[order]))] if names else None,
+            "best_selling_game": best[0] if best else None,
+        }
+
+    def rollup(self, selection):
+        """Chart frames and insight values for a selection, memoized until the next change."""
+        # Queries only take the lock to check out a connection, so they run in
+        # parallel; the version in the key keeps a result from a replaced file out of the cache
+        return self.query_cache.get_or_compute(
+            (self.version,) + selection_key(**selection), lambda: self._rollup(selection)
+        )
+
+    def trends(self, selection, window=1):
+        """Regional series, growth and platform lifecycles for a selection, over `window`-year means."""
+        base = self.query_cache.get_or_compute(
+            (self.version, "trends") + selection_key(**selection), lambda: self._trend_base(selection)
+        )
+        return trend_frames(base, window)
+
+    def _trend_base(self, selection):
+        clauses, params = self._conditions(**selection)
+        where = _where(clauses)
+        n_years = self.year_max - self.year_min + 1
+        with self._connection() as conn:
+            by_year = np.array(conn.execute(
+                f"SELECT v.Year, SUM(s.NA_Sales), SUM(s.EU_Sales), SUM(s.Other_Sales), SUM(s.Global_Sales) "
+                f"{JOIN_SALES}{where} GROUP BY v.Year", params).fetchall(), dtype=np.float64).reshape(-1, 5)
+            by_platform = np.array(conn.execute(
+                f"SELECT v.Platform_ID, v.Year, SUM(s.Global_Sales) {JOIN_SALES}{where} "
+                "GROUP BY v.Platform_ID, v.Year", params).fetchall(), dtype=np.float64).reshape(-1, 3)
+            # Launch years come from the whole catalog, not the selection
+            launch = dict(conn.execute(
+                f"SELECT v.Platform_ID, MIN(v.Year) {JOIN_SALES} WHERE s.Global_Sales > 0 GROUP BY v.Platform_ID"
+            ).fetchall())
+
+        # The schema keeps no JP_Sales column; Global_Sales is the sum of the four regions
+        year, na, eu, other, global_sales = by_year.T
+        per_year = np.zeros((n_years, 5))
+        per_year[year.astype(np.int64) - self.year_min] = np.column_stack(
+            [na, eu, global_sales - na - eu - other, other, global_sales]
+        )
+        prefix, first_year = clip_years(prefix_sums(per_year), self.year_min, selection.get("year_range"))
+
+        platform_ids = list(self._ids["Platform"].values())
+        position = {platform_id: i for i, platform_id in enumerate(platform_ids)}
+        platform_years = np.zeros((len(platform_ids), len(prefix) - 1))
+        for platform_id, year, sales in by_platform:
+            platform_years[position[int(platform_id)], int(year) - first_year] = sales
+        since_launch = np.array([first_year - launch.get(platform_id, first_year) for platform_id in platform_ids])
+        return {
+            "prefix": prefix,
+            "year_min": first_year,
+            "lifecycle": lifecycle_curves(platform_years, since_launch, self.options["Platform"]),
+        }
+
+    def filter(self, selection):
+        """Rows matching a selection, joined back to their names."""
+        clauses, params = self._conditions(**selection)
+        with self._connection() as conn:
+            return pd.read_sql_query(f"{ROWS_QUERY}{_where(clauses)} ORDER BY v.rowid", conn, params=params)
+
+    def row_chunks(self, selection, chunk_rows):
+        """Rows matching a selection, chunk_rows at a time, straight from the cursor."""
+        clauses, params = self._conditions(**selection)
+        with self._connection() as conn:
+            yield from pd.read_sql_query(
+                f"{ROWS_QUERY}{_where(clauses)} ORDER BY v.rowid", conn, params=params, chunksize=chunk_rows
+            )
+
+    def search_titles(self, query, selection, limit=TITLE_LIMIT):
+        """Rows of the best-selling titles matching a name fragment within a selection.
+
+        Returns (rows, fuzzy); fuzzy is True when a word only matched by spelling.
+        """
+        return self.query_cache.get_or_compute(
+            (self.version, "titles", query.strip().lower(), limit) + selection_key(**selection),
+            lambda: self._search_titles(query, selection, limit),
+        )
+
+    def _search_titles(self, query, selection, limit):
+        codes, fuzzy = self.titles.match(query)
+        clauses, params = self._conditions(**selection)
+        # The matched names travel as one JSON parameter, however many there are
+        clauses.insert(0, "v.Name IN (SELECT value FROM json_each(?))")
+        params.insert(0, json.dumps([self._titles[code] for code in codes]))
+        with self._connection() as conn:
+            rows = pd.read_sql_query(f"{ROWS_QUERY}{_where(clauses)} ORDER BY v.rowid", conn, params=params)
+        return top_titles(rows, limit), fuzzy
+
+
+# ---------------------------------------------
+# Command Line: build the database ahead of deploys
+# ---------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Build the normalized SQLite sales database.")
+    parser.add_argument("--source", default="vgsales.csv")
+    parser.add_argument("--db", default=DATABASE_PATH)
+    parser.add_argument("--index-only", action="store_true",
+                        help="only add the query indexes to an existing database (e.g. the notebook's)")
+    args = parser.parse_args()
+
+    if args.index_only:
+        conn = sqlite3.connect(args.db)
+        try:
+            create_indexes(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        print(f"{args.db}: indexes created")
+        return
+    data = load_sales_data(args.source)
+    build_database(data, args.db)
+    print(f"{args.source}: {len(data)} rows -> {args.db} ({os.path.getsize(args.db) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
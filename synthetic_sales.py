@@ -0,0 +1,145 @@
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import (
+    SALES_COLUMNS, SNAPSHOT_DIR, clean_sales_frame, compact_sales_frame, concat_compact_frames, write_snapshot,
+)
+
+CSV_COLUMNS = ["Rank", "Name", "Platform", "Year", "Genre", "Publisher"] + SALES_COLUMNS
+CHUNK_ROWS = 500_000
+# Spread of the log-normal factor applied to each bootstrapped row's sales
+SALES_JITTER = 0.25
+
+
+def _draw_pool(draws, distinct_ratio):
+    """Size of a pool from which `draws` uniform draws yield about `distinct_ratio * draws` distinct values."""
+    # Expected distinct values are pool * (1 - exp(-draws / pool)); bisect on x = draws / pool
+    low, high = 1e-9, 50.0
+    for _ in range(60):
+        x = (low + high) / 2
+        if (1 - math.exp(-x)) / x > distinct_ratio:
+            low = x
+        else:
+            high = x
+    return draws / x
+
+
+# ---------------------------------------------
+# Distributions Measured from the Real Data
+# ---------------------------------------------
+class SalesProfile:
+    """The real table's rows and missing-value rates, resampled to make synthetic rows.
+
+    Whole rows are drawn together, so platform/year pairs, publisher/genre
+    mixes and the correlation between regions carry over; each row's sales
+    get one shared log-normal jitter, which keeps the zero mass and heavy
+    tail of every region while spreading values past the ones observed.
+    """
+
+    def __init__(self, source_path, missing_year=None, missing_publisher=None):
+        raw = pd.read_csv(source_path, usecols=CSV_COLUMNS, dtype={"Year": "float64"})
+        self.missing_year = raw["Year"].isna().mean() if missing_year is None else missing_year
+        self.missing_publisher = raw["Publisher"].isna().mean() if missing_publisher is None else missing_publisher
+        complete = raw.dropna(subset=["Year", "Publisher"]).reset_index(drop=True)
+        self.rows = len(raw)
+        # Same title on several platforms: names repeat about as often as in the source
+        self.title_ratio = raw["Name"].nunique() / len(raw)
+        self.names = complete["Name"].to_numpy(dtype=object)
+        self.distinct_names = complete["Name"].nunique()
+        self.keys = {
+            column: complete[column].astype("category") for column in ["Platform", "Genre", "Publisher"]
+        }
+        self.years = complete["Year"].to_numpy()
+        self.sales = complete[SALES_COLUMNS].to_numpy()
+
+    def sample(self, rng, rows, total_rows, start=0):
+        """A raw chunk of `rows` rows, shaped like the CSV, ranked from `start` + 1."""
+        picks = rng.integers(0, len(self.years), rows)
+
+        # Sequels: suffix 1 keeps the source name, so small outputs look like the source
+        sequels = max(1, round(_draw_pool(total_rows, self.title_ratio) / self.distinct_names))
+        suffix = rng.integers(1, sequels + 1, rows)
+        names = pd.Series(self.names[picks])
+        numbered = suffix > 1
+        names[numbered] = names[numbered] + " " + suffix[numbered].astype(str).astype(object)
+
+        jitter = np.exp(rng.normal(0.0, SALES_JITTER, rows))[:, None]
+        sales = np.round(self.sales[picks] * jitter, 2)
+
+        years = pd.array(self.years[picks], dtype="Int64")
+        years[rng.random(rows) < self.missing_year] = pd.NA
+        frame = pd.DataFrame({
+            "Rank": np.arange(start + 1, start + rows + 1, dtype=np.int64),
+            "Name": names,
+            "Platform": self.keys["Platform"].take(picks).to_numpy(),
+            "Year": years,
+            "Genre": self.keys["Genre"].take(picks).to_numpy(),
+            "Publisher": self.keys["Publisher"].take(picks).astype(object).to_numpy(),
+            **{column: sales[:, i] for i, column in enumerate(SALES_COLUMNS)},
+        })
+        frame.loc[rng.random(rows) < self.missing_publisher, "Publisher"] = None
+        return frame
+
+
+# ---------------------------------------------
+# Streaming Writer
+# ---------------------------------------------
+def _loader_chunk(frame):
+    """The chunk as the loader would parse it back from the CSV: float32 sales, cleaned, compacted."""
+    parsed = frame.astype({"Year": "float32", **{column: "float32" for column in SALES_COLUMNS}})
+    return compact_sales_frame(clean_sales_frame(parsed))
+
+
+def write_sales(source_path, target_path, rows, seed=0, chunk_rows=CHUNK_ROWS, snapshot_dir=None,
+                missing_year=None, missing_publisher=None):
+    """Writes `rows` synthetic rows to `target_path` as CSV, one chunk in memory at a time.
+
+    With `snapshot_dir`, also writes the loader's columnar snapshot of the new
+    CSV, so the first load at scale skips parsing.
+    """
+    profile = SalesProfile(source_path, missing_year, missing_publisher)
+    rng = np.random.default_rng(seed)
+    compacted = []
+    tmp_path = f"{target_path}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        f.write(",".join(CSV_COLUMNS) + "\n")
+        for start in range(0, rows, chunk_rows):
+            frame = profile.sample(rng, min(chunk_rows, rows - start), rows, start)
+            # Rounded sales print as their shortest repr ("0.29"); float_format would run per value in Python
+            frame.to_csv(f, header=False, index=False, na_rep="N/A")
+            if snapshot_dir is not None:
+                compacted.append(_loader_chunk(frame))
+    os.replace(tmp_path, target_path)
+    if snapshot_dir is not None:
+        write_snapshot(concat_compact_frames(compacted), target_path, snapshot_dir)
+    return target_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic vgsales-shaped CSV of any size.")
+    parser.add_argument("target", help="CSV file to write")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--source", default="vgsales.csv", help="Real CSV whose distributions are reproduced")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--snapshot", nargs="?", const=SNAPSHOT_DIR, metavar="DIR",
+                        help="Also write the loader's columnar snapshot (default dir: %(const)s)")
+    parser.add_argument("--missing-year", type=float, help="Share of rows with no Year (default: as in source)")
+    parser.add_argument("--missing-publisher", type=float, help="Share of rows with no Publisher (default: as in source)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_sales(args.source, args.target, args.rows, args.seed, args.chunk_rows, args.snapshot,
+                args.missing_year, args.missing_publisher)
+    elapsed = time.perf_counter() - start
+    print(f"{args.rows} rows -> {args.target} ({os.path.getsize(args.target) / 1e6:.1f} MB) "
+          f"in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_store import load_sales_data  # noqa: E402
+
+SALES_CSV = os.path.join(ROOT, "vgsales.csv")
+
+# Selections the engines are checked on, edge cases included
+SELECTIONS = [
+    {},
+    {"genres": ["Action"]},
+    {"genres": ["Sports", "Racing"], "platforms": ["Wii", "PS2"], "year_range": (2000, 2010)},
+    {"platforms": ["GB", "DS", "3DS"], "publishers": ["Nintendo", "mixi, Inc"]},
+    {"publishers": ["Electronic Arts", "id Software"], "year_range": (1990, 2016)},
+    {"year_range": (2008, 2008)},  # A single year
+    {"genres": ["Puzzle"], "year_range": (1950, 1960)},  # No rows
+    {"genres": ["No Such Genre"]},  # No rows
+]
+
+
+@pytest.fixture(scope="session")
+def sales():
+    """The preprocessed table, read from the CSV."""
+    return load_sales_data(SALES_CSV, use_snapshot=False)
+
+
+def read_plain(file_path):
+    """A CSV as the original dashboard read it: plain pandas, no compaction."""
+    data = pd.read_csv(file_path)
+    data["Global_Sales"] = data[["NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales"]].sum(axis=1)
+    data = data.dropna(subset=["Year", "Publisher"])
+    data["Year"] = data["Year"].astype(int)
+    return data.reset_index(drop=True)
+
+
+@pytest.fixture(scope="session")
+def raw_sales():
+    return read_plain(SALES_CSV)
+
+
+def pandas_filter(data, genres=(), platforms=(), publishers=(), year_range=None):
+    """The original dashboard's boolean-mask filter."""
+    mask = pd.Series(True, index=data.index)
+    for column, selected in (("Genre", genres), ("Platform", platforms), ("Publisher", publishers)):
+        if len(selected):
+            mask &= data[column].isin(selected)
+    if year_range is not None:
+        mask &= data["Year"].between(*year_range)
+    return data[mask]
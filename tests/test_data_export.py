@@ -0,0 +1,111 @@
+import io
+import json
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from conftest import SALES_CSV, SELECTIONS, pandas_filter
+from data_export import ExportJobs, encode, export_tables, serve_exports
+from sales_dataset import SalesDataset
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    return SalesDataset(SALES_CSV, snapshot_dir=str(tmp_path_factory.mktemp("snapshots")), shared_dir=None)
+
+
+def expected_rows(raw_sales, dataset, selection):
+    return pandas_filter(raw_sales, **selection)[list(dataset.data.columns)].reset_index(drop=True)
+
+
+def assert_same_rows(frame, expected):
+    pd.testing.assert_frame_equal(frame, expected, check_dtype=False, rtol=1e-6)
+
+
+def export_bytes(dataset, selection, kind="rows", fmt="csv", chunk_rows=1000):
+    return b"".join(bytes(data) for data in encode(export_tables(dataset, selection, kind, chunk_rows), fmt))
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_csv_matches_pandas(dataset, raw_sales, selection):
+    exported = pd.read_csv(io.BytesIO(export_bytes(dataset, selection)))
+    expected = expected_rows(raw_sales, dataset, selection)
+    assert list(exported.columns) == list(expected.columns)  # One header, even with no rows
+    assert_same_rows(exported, expected)
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_parquet_matches_pandas(dataset, raw_sales, selection):
+    parquet = pq.ParquetFile(io.BytesIO(export_bytes(dataset, selection, fmt="parquet")))
+    expected = expected_rows(raw_sales, dataset, selection)
+    assert parquet.metadata.num_row_groups == max(1, -(-len(expected) // 1000))  # One per chunk
+    assert_same_rows(parquet.read().to_pandas(), expected)
+
+
+def test_aggregate_matches_pandas(dataset, raw_sales):
+    selection = {"genres": ["Sports", "Racing"], "year_range": (2000, 2010)}
+    exported = pd.read_csv(io.BytesIO(export_bytes(dataset, selection, kind="sales_by_year")))
+    expected = pandas_filter(raw_sales, **selection).groupby("Year")["Global_Sales"].sum().reset_index()
+    assert_same_rows(exported, expected)
+
+
+def test_unknown_export(dataset):
+    with pytest.raises(ValueError):
+        list(export_tables(dataset, {}, kind="everything"))
+    with pytest.raises(ValueError):
+        list(encode([], "xlsx"))
+
+
+# ---------------------------------------------
+# HTTP Endpoint
+# ---------------------------------------------
+@pytest.fixture(scope="module")
+def endpoint(dataset, tmp_path_factory):
+    jobs = ExportJobs(str(tmp_path_factory.mktemp("exports")))
+    server = serve_exports(dataset, jobs, port=0)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    jobs.shutdown()
+
+
+QUERY = {"genre": ["Sports", "Racing"], "platform": ["Wii"], "year_min": 2006, "year_max": 2008}
+SELECTION = {"genres": ["Sports", "Racing"], "platforms": ["Wii"], "year_range": (2006, 2008)}
+
+
+def test_http_export_streams_chunked(endpoint, dataset, raw_sales):
+    with urllib.request.urlopen(f"{endpoint}/export?{urlencode(QUERY, doseq=True)}") as response:
+        assert response.headers["Transfer-Encoding"] == "chunked"
+        assert response.headers["Content-Type"] == "text/csv"
+        exported = pd.read_csv(io.BytesIO(response.read()))
+    assert_same_rows(exported, expected_rows(raw_sales, dataset, SELECTION))
+
+
+def test_http_export_bad_request(endpoint):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"{endpoint}/export?format=xlsx")
+    assert error.value.code == 400
+
+
+def test_http_job(endpoint, dataset, raw_sales):
+    request = urllib.request.Request(
+        f"{endpoint}/jobs?{urlencode(dict(QUERY, format='parquet'), doseq=True)}", method="POST"
+    )
+    with urllib.request.urlopen(request) as response:
+        assert response.status == 202
+        job = json.load(response)
+    for _ in range(100):
+        with urllib.request.urlopen(f"{endpoint}/jobs/{job['id']}") as response:
+            job = json.load(response)
+        if job["status"] not in ("queued", "running"):
+            break
+        time.sleep(0.05)
+    assert job["status"] == "done" and job["rows"] == job["total_rows"]
+
+    with urllib.request.urlopen(f"{endpoint}/jobs/{job['id']}/file") as response:
+        exported = pq.read_table(io.BytesIO(response.read())).to_pandas()
+    assert_same_rows(exported, expected_rows(raw_sales, dataset, SELECTION))
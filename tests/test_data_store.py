@@ -0,0 +1,95 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from conftest import SALES_CSV, read_plain
+from data_store import IncrementalLoader
+
+NEW_ROWS = (
+    "99990,Brand New Quest,NewConsole,2030,New Genre,New Publisher,1.5,0.5,0.25,0.25\n"
+    "99991,Wii Sports Again,Wii,2006,Sports,Nintendo,1,1,1,1\n"
+)
+
+
+def assert_same_rows(data, expected):
+    """Same values as the plain-pandas frame, whatever the category order or numeric widths."""
+    data = data.astype({c: str for c in data.columns if hasattr(data[c], "cat")})
+    pd.testing.assert_frame_equal(data, expected[data.columns], check_dtype=False, rtol=1e-6)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "vgsales.csv"
+    shutil.copy(SALES_CSV, path)
+    return str(path)
+
+
+@pytest.fixture
+def loader(csv_path, tmp_path):
+    loader = IncrementalLoader(csv_path, snapshot_dir=str(tmp_path / "snapshots"))
+    loader.load()
+    return loader
+
+
+def append(path, text):
+    with open(path, "a", newline="") as f:
+        f.write(text)
+
+
+def test_load_matches_pandas(loader, raw_sales):
+    assert_same_rows(loader.data, raw_sales)
+    assert loader.raw_rows == len(pd.read_csv(SALES_CSV))
+
+
+def test_load_from_snapshot(csv_path, loader, raw_sales):
+    again = IncrementalLoader(csv_path, snapshot_dir=loader.snapshot_dir)
+    assert_same_rows(again.load(), raw_sales)
+    assert again.raw_rows == loader.raw_rows and again.offset == loader.offset
+
+
+def test_unchanged(loader):
+    assert loader.refresh() == ("unchanged", None)
+
+
+def test_append_unseen_categories(csv_path, loader):
+    codes = loader.data["Platform"].cat.codes.to_numpy()
+    append(csv_path, NEW_ROWS)
+    status, new_rows = loader.refresh()
+    assert status == "appended" and len(new_rows) == 2
+    assert_same_rows(loader.data, read_plain(csv_path))
+    # New values go to the end of the dictionary; the loaded rows keep their codes
+    assert loader.data["Platform"].cat.categories[-1] == "NewConsole"
+    assert (loader.data["Platform"].cat.codes.to_numpy()[:len(codes)] == codes).all()
+
+
+def test_partial_trailing_line_waits(csv_path, loader):
+    first, second = NEW_ROWS.splitlines(keepends=True)
+    append(csv_path, first + second[:20])
+    status, new_rows = loader.refresh()
+    assert status == "appended" and len(new_rows) == 1
+    assert loader.refresh() == ("unchanged", None)
+
+    append(csv_path, second[20:])
+    status, new_rows = loader.refresh()
+    assert status == "appended" and new_rows["Name"].tolist() == ["Wii Sports Again"]
+    assert_same_rows(loader.data, read_plain(csv_path))
+
+
+def test_rewrite_reloads(csv_path, loader):
+    data = pd.read_csv(csv_path)
+    data.iloc[:100].to_csv(csv_path, index=False)
+    status, frame = loader.refresh()
+    assert status == "reloaded"
+    assert_same_rows(frame, read_plain(csv_path))
+
+
+def test_replaced_file_reloads(csv_path, loader):
+    replacement = csv_path + ".new"
+    shutil.copy(csv_path, replacement)
+    append(replacement, NEW_ROWS)
+    os.replace(replacement, csv_path)
+    status, frame = loader.refresh()
+    assert status == "reloaded" and len(frame) == len(loader.data)
+    assert_same_rows(frame, read_plain(csv_path))
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SELECTIONS, pandas_filter
+from data_store import align_categories
+from filter_engine import FilterEngine, bitmap_to_ids, ids_to_bitmap, set_bits
+
+
+@pytest.fixture(scope="module")
+def engine(sales):
+    return FilterEngine(sales)
+
+
+def test_bitmap_round_trip():
+    bitmap = ids_to_bitmap([0, 7, 8, 20], 3)
+    set_bits(bitmap, [3, 20, 23])
+    assert bitmap_to_ids(bitmap, 24).tolist() == [0, 3, 7, 8, 20, 23]
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_filter_matches_pandas(engine, raw_sales, selection):
+    result = engine.filter(**selection)
+    expected = pandas_filter(raw_sales, **selection)
+    assert result["Rank"].tolist() == expected["Rank"].tolist()
+    assert result["Name"].astype(str).tolist() == expected["Name"].tolist()
+
+
+def test_dense_and_sparse_values(engine):
+    # Common values are bitmaps, rare ones sorted row-id lists; a selection mixes both
+    assert "Nintendo" in engine._bitmaps["Publisher"]
+    assert "mixi, Inc" in engine._row_ids["Publisher"]
+
+
+def test_select_everything_is_none(engine):
+    assert engine.select() is None
+    assert engine.select(year_range=(engine.year_min, engine.year_max)) is None
+
+
+def test_empty_selection_keeps_columns(engine, sales):
+    result = engine.filter(genres=["No Such Genre"])
+    assert result.empty
+    assert list(result.columns) == list(sales.columns)
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_append_matches_full_build(sales, selection):
+    start = len(sales) - 500
+    engine = FilterEngine(sales.iloc[:start])
+    engine.append(sales, start)
+    assert np.array_equal(
+        engine.filter(**selection).index, pandas_filter(sales, **selection).index
+    )
+
+
+def test_append_unseen_values(sales):
+    new_rows = sales.iloc[:3].astype(object).assign(
+        Platform=["NewConsole", "NewConsole", "Wii"], Genre="New Genre", Year=[2030, 2031, 1975]
+    )
+    data, new_rows = align_categories(sales, new_rows)
+    data = pd.concat([data, new_rows], ignore_index=True)
+    engine = FilterEngine(sales)
+    engine.append(data, len(sales))
+
+    assert (engine.year_min, engine.year_max) == (1975, 2031)
+    assert "NewConsole" in engine.options["Platform"]
+    for selection in [
+        {"platforms": ["NewConsole"]},
+        {"genres": ["New Genre"], "year_range": (2031, 2031)},
+        {"platforms": ["Wii"], "year_range": (1970, 1979)},
+        {"year_range": (2021, 2040)},
+    ]:
+        expected = pandas_filter(data, **selection)
+        assert engine.filter(**selection).index.tolist() == expected.index.tolist()
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from conftest import SELECTIONS, pandas_filter
+from query_cache import QueryCache, estimate_size, selection_key
+
+
+def sales_by_year(data, selection):
+    return pandas_filter(data, **selection).groupby("Year")["Global_Sales"].sum().reset_index()
+
+
+def test_selection_key_ignores_pick_order():
+    assert selection_key(genres=["Sports", "Action"], year_range=[2000, 2010]) == selection_key(
+        genres=("Action", "Sports"), year_range=(2000, 2010)
+    )
+    assert selection_key() != selection_key(year_range=(2008, 2008))
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_cached_results_match_pandas(raw_sales, selection):
+    cache, calls = QueryCache(), []
+
+    def compute():
+        calls.append(1)
+        return sales_by_year(raw_sales, selection)
+
+    key = selection_key(**selection)
+    first = cache.get_or_compute(key, compute)
+    second = cache.get_or_compute(key, compute)
+    assert second is first and len(calls) == 1
+    pd.testing.assert_frame_equal(second, sales_by_year(raw_sales, selection))
+
+
+def test_evicts_least_recently_used_by_bytes(raw_sales):
+    frames = {year: sales_by_year(raw_sales, {"year_range": (year, year)}) for year in (2006, 2007, 2008)}
+    size = max(estimate_size(frame) for frame in frames.values())
+    cache = QueryCache(max_bytes=2 * size)
+
+    cache.put(2006, frames[2006])
+    cache.put(2007, frames[2007])
+    assert cache.get(2006) is frames[2006]  # 2007 is now the least recently used
+    cache.put(2008, frames[2008])
+
+    assert cache.get(2007) is None
+    assert cache.get(2006) is frames[2006] and cache.get(2008) is frames[2008]
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+    assert stats["bytes"] == estimate_size(frames[2006]) + estimate_size(frames[2008]) <= cache.max_bytes
+
+
+def test_value_over_budget_is_served_but_not_kept(raw_sales):
+    cache = QueryCache(max_bytes=64)
+    frame = sales_by_year(raw_sales, {})
+    assert cache.get_or_compute("all", lambda: frame) is frame
+    assert cache.get("all") is None and cache.stats()["bytes"] == 0
+
+
+def test_replacing_a_key_recounts_its_bytes():
+    cache = QueryCache()
+    cache.put("key", "a" * 1000)
+    cache.put("key", "b")
+    assert cache.stats()["bytes"] == estimate_size("b")
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.stats()["bytes"] == 0
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from conftest import SELECTIONS, pandas_filter
+from data_store import align_categories
+from sales_cube import SalesCube
+
+
+def pandas_rollup(data, selection):
+    """The original dashboard's groupby charts and insights for a selection."""
+    filtered = pandas_filter(data, **selection)
+    by_genre = filtered.groupby("Genre")["Global_Sales"].sum()
+    return {
+        "rows": len(filtered),
+        "total_sales": filtered["Global_Sales"].sum(),
+        "sales_by_year": filtered.groupby("Year")["Global_Sales"].sum().reset_index(),
+        "avg_sales_by_year": filtered.groupby("Year")["Global_Sales"].mean().reset_index(),
+        "sales_by_genre": by_genre.reset_index(),
+        "publishers_by_genre": filtered.groupby("Genre")["Publisher"].nunique().reset_index(),
+        "top_genre": by_genre.idxmax() if len(by_genre) else None,
+        "best_selling_game": filtered.loc[filtered["Global_Sales"].idxmax(), "Name"] if len(filtered) else None,
+    }
+
+
+def assert_rollup_equal(rollup, expected):
+    assert rollup["rows"] == expected["rows"]
+    assert rollup["total_sales"] == pytest.approx(expected["total_sales"], rel=1e-5)
+    for name, value_column in [
+        ("sales_by_year", "Global_Sales"),
+        ("avg_sales_by_year", "Global_Sales"),
+        ("sales_by_genre", "Global_Sales"),
+        ("publishers_by_genre", "Publisher"),
+    ]:
+        frame, baseline = rollup[name], expected[name]
+        key = frame.columns[0]
+        frame = frame.astype({key: baseline[key].dtype}).sort_values(key, ignore_index=True)
+        assert frame[key].tolist() == baseline[key].tolist()
+        assert frame.iloc[:, 1].to_numpy() == pytest.approx(baseline[value_column].to_numpy(), rel=1e-5)
+    assert rollup["top_genre"] == expected["top_genre"]
+    assert rollup["best_selling_game"] == expected["best_selling_game"]
+
+
+@pytest.fixture(scope="module")
+def cube(sales):
+    return SalesCube(sales)
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_rollup_matches_pandas(cube, raw_sales, selection):
+    assert_rollup_equal(cube.rollup(**selection), pandas_rollup(raw_sales, selection))
+
+
+def test_empty_selection(cube):
+    rollup = cube.rollup(genres=["No Such Genre"])
+    assert rollup["rows"] == 0 and rollup["total_sales"] == 0
+    assert rollup["sales_by_year"].empty and rollup["publishers_by_genre"].empty
+    assert rollup["top_genre"] is None and rollup["best_selling_game"] is None
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_append_matches_pandas(sales, raw_sales, selection):
+    start = len(sales) - 500
+    cube = SalesCube(sales.iloc[:start])
+    cube.append(sales, start)
+    assert_rollup_equal(cube.rollup(**selection), pandas_rollup(raw_sales, selection))
+
+
+def test_append_unseen_values(sales, raw_sales):
+    new_rows = raw_sales.iloc[:3].assign(
+        Name=["Brand New", "Brand New", "Wii Sports"],
+        Publisher=["New Publisher", "Nintendo", "New Publisher"],
+        Genre=["New Genre", "Sports", "Sports"],
+        Year=[2030, 2006, 2006],
+        Global_Sales=[90.0, 1.0, 0.5],
+    )
+    data, compact_rows = align_categories(sales, new_rows)
+    data = pd.concat([data, compact_rows], ignore_index=True)
+    cube = SalesCube(sales)
+    cube.append(data, len(sales))
+
+    raw = pd.concat([raw_sales, new_rows], ignore_index=True)
+    for selection in [{}, {"genres": ["New Genre"]}, {"genres": ["Sports"], "year_range": (2006, 2006)},
+                      {"publishers": ["New Publisher"]}]:
+        assert_rollup_equal(cube.rollup(**selection), pandas_rollup(raw, selection))
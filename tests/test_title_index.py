@@ -0,0 +1,97 @@
+import re
+import unicodedata
+
+import pytest
+
+from conftest import SELECTIONS, pandas_filter
+from filter_engine import FilterEngine
+from title_index import TitleIndex, _within_edits, normalize_titles, top_titles
+
+
+def words(text):
+    """Lowercase ASCII words: accents dropped, punctuation as spaces."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return re.sub("[^a-z0-9]+", " ", text).split()
+
+
+def prefix_matches(names, query):
+    """Titles holding every query word as the start of one of their words, by brute force."""
+    query_words = words(query)
+    return {
+        name for name in names
+        if query_words and all(any(w.startswith(q) for w in words(name)) for q in query_words)
+    }
+
+
+@pytest.fixture(scope="module")
+def index(sales):
+    names = sales["Name"]
+    return TitleIndex(names.cat.categories, names.cat.codes.to_numpy())
+
+
+def matched_names(index, sales, query):
+    codes, fuzzy = index.match(query)
+    return set(sales["Name"].cat.categories[codes]), fuzzy
+
+
+def test_normalize_titles():
+    assert normalize_titles(["Pokémon Yellow: Special Pikachu Edition", "1080°: TenEighty", "!!"]).to_pylist() == [
+        "pokemon yellow special pikachu edition", "1080 teneighty", ""
+    ]
+
+
+@pytest.mark.parametrize("query", ["mario", "Super Mario Bros", "call of du", "FIFA 1", "zelda: ocarina"])
+def test_prefix_match_matches_brute_force(index, sales, raw_sales, query):
+    names, fuzzy = matched_names(index, sales, query)
+    assert names == prefix_matches(raw_sales["Name"].unique(), query)
+    assert names and not fuzzy
+
+
+@pytest.mark.parametrize("query", ["Pokémon", "pokemon", "POKÉMON platinum"])
+def test_accents_are_ignored(index, sales, raw_sales, query):
+    names, fuzzy = matched_names(index, sales, query)
+    assert names == prefix_matches(raw_sales["Name"].unique(), query)
+    assert "Pokemon Red/Pokemon Blue" in names or "Pokémon Platinum Version" in names
+    assert not fuzzy
+
+
+@pytest.mark.parametrize("typo, word", [("pokemno", "pokemon"), ("zleda", "zelda"), ("marip", "mario")])
+def test_misspelled_words_match_by_edit_distance(index, sales, raw_sales, typo, word):
+    names, fuzzy = matched_names(index, sales, typo)
+    assert fuzzy
+    assert prefix_matches(raw_sales["Name"].unique(), word) & {n for n in names if word in words(n)}
+
+
+def test_no_match(index, sales):
+    assert matched_names(index, sales, "qqqxzzv") == (set(), True)
+    assert matched_names(index, sales, "") == (set(), False)
+
+
+def test_within_edits():
+    assert _within_edits("zelda", "zleda", 1)  # One swap of neighbours
+    assert _within_edits("pokemon", "pokmeon", 1)
+    assert not _within_edits("mario", "wario land", 2)
+    assert not _within_edits("halo", "hole", 1)
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_rows_within_selection_match_pandas(index, sales, raw_sales, selection):
+    codes, _ = index.match("super")
+    rows = index.rows(codes, FilterEngine(sales).select(**selection))
+    filtered = pandas_filter(raw_sales, **selection)
+    expected = filtered[filtered["Name"].isin(prefix_matches(filtered["Name"].unique(), "super"))]
+    assert rows.tolist() == expected.index.tolist()
+
+    top = top_titles(sales.take(rows), limit=5)
+    if len(expected):
+        assert top["Name"].iloc[0] == expected.groupby("Name")["Global_Sales"].sum().idxmax()
+    assert top["Name"].nunique() <= 5
+
+
+def test_extend_keeps_codes(sales):
+    names = list(sales["Name"].cat.categories)
+    index = TitleIndex(names[:-1])
+    codes, _ = index.match("mario")
+    index.extend(names + ["Mariö Brand New"])
+    extended, _ = index.match("mario")
+    assert set(codes) < set(extended) and len(names) in extended
@@ -0,0 +1,166 @@
+import bisect
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Most titles returned by one search
+TITLE_LIMIT = int(os.environ.get("TITLE_SEARCH_LIMIT", 25))
+# Fuzzy candidates per query token, by shared trigrams, checked for edit distance
+FUZZY_CANDIDATES = 200
+RESULT_COLUMNS = ["Name", "Platform", "Year", "Genre", "Publisher",
+                  "NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales", "Global_Sales"]
+
+
+# ---------------------------------------------
+# Normalization
+# ---------------------------------------------
+def normalize_titles(names):
+    """Lowercase ASCII words of each title: accents dropped, punctuation as spaces."""
+    titles = pc.utf8_normalize(pa.array(pd.Series(names, dtype="str")), "NFKD")
+    titles = pc.utf8_lower(pc.replace_substring_regex(titles, r"[^\x00-\x7f]", ""))
+    return pc.utf8_trim_whitespace(pc.replace_substring_regex(titles, "[^a-z0-9]+", " "))
+
+
+def tokenize_titles(names):
+    """Every word of every title as (tokens, position of its title in `names`)."""
+    words = pc.split_pattern(normalize_titles(names), " ")
+    tokens, parents = pc.list_flatten(words), pc.list_parent_indices(words)
+    # A title with no letters or digits splits into one empty word
+    keep = pc.not_equal(tokens, "")
+    return tokens.filter(keep), parents.filter(keep).to_numpy()
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_edits(a, b, limit):
+    """Whether a and b are at most `limit` edits apart, a swap of neighbours counting as one."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return False
+        before, previous = previous, current
+    return previous[-1] <= limit
+
+
+# ---------------------------------------------
+# Title Index
+# ---------------------------------------------
+class TitleIndex:
+    """Token index over distinct titles, answering prefix and typo-tolerant queries.
+
+    Tokens are kept sorted, so every token starting with a query word is one
+    contiguous id range, and the titles holding them are one contiguous slice
+    of the postings. Query words that match no token fall back to tokens
+    within one or two edits, found through a trigram index. With `row_codes`
+    (the title code of every table row), matches also resolve to table rows.
+    """
+
+    def __init__(self, names, row_codes=None):
+        self.n_names = 0
+        self._pair_tokens = pa.chunked_array([], type=pa.string())
+        self._pair_names = np.empty(0, dtype=np.int64)
+        self.extend(names)
+        if row_codes is not None:
+            self.set_rows(row_codes)
+
+    def extend(self, names):
+        """Indexes titles appended to the name dictionary; existing codes keep their meaning."""
+        names = names[self.n_names:]
+        if len(names):
+            tokens, positions = tokenize_titles(names)
+            self._pair_tokens = pa.chunked_array(self._pair_tokens.chunks + [tokens])
+            self._pair_names = np.concatenate([self._pair_names, positions + self.n_names])
+            self.n_names += len(names)
+            self._build_postings()
+
+    def _build_postings(self):
+        encoded = self._pair_tokens.dictionary_encode().combine_chunks()
+        order = pc.sort_indices(encoded.dictionary).to_numpy()
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        token_ids = rank[encoded.indices.to_numpy()]
+        self.vocabulary = encoded.dictionary.take(order).to_pylist()
+        self._token_lengths = np.array([len(token) for token in self.vocabulary], dtype=np.int64)
+        by_token = np.argsort(token_ids, kind="stable")
+        self._postings = self._pair_names[by_token]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(token_ids, minlength=len(order)))])
+
+        trigrams = defaultdict(list)
+        for token_id, token in enumerate(self.vocabulary):
+            for trigram in _trigrams(token):
+                trigrams[trigram].append(token_id)
+        self._trigrams = {trigram: np.array(ids, dtype=np.int64) for trigram, ids in trigrams.items()}
+
+    def set_rows(self, row_codes):
+        """Sets the title code of every table row; call again after rows are appended."""
+        self._row_codes = np.asarray(row_codes)
+
+    # ---------------------------------------------
+    # Queries
+    # ---------------------------------------------
+    def _prefix_titles(self, word):
+        low = bisect.bisect_left(self.vocabulary, word)
+        high = bisect.bisect_left(self.vocabulary, word + "\uffff")
+        return self._postings[self._offsets[low]:self._offsets[high]]
+
+    def _fuzzy_titles(self, word):
+        ids = [self._trigrams[t] for t in _trigrams(word) if t in self._trigrams]
+        if not ids:
+            return self._postings[:0]
+        limit = 1 if len(word) <= 5 else 2
+        shared = np.bincount(np.concatenate(ids), minlength=len(self.vocabulary))
+        shared[np.abs(self._token_lengths - len(word)) > limit] = 0
+        candidates = np.argsort(-shared, kind="stable")[:FUZZY_CANDIDATES]
+        close = [i for i in candidates if shared[i] and _within_edits(word, self.vocabulary[i], limit)]
+        if not close:
+            return self._postings[:0]
+        return np.concatenate([self._postings[self._offsets[i]:self._offsets[i + 1]] for i in close])
+
+    def match(self, query, fuzzy=True):
+        """Codes of the titles holding every query word as a token prefix, and whether any word was fuzzy."""
+        words = normalize_titles([query])[0].as_py().split()
+        matched, used_fuzzy = None, False
+        for word in words:
+            titles = self._prefix_titles(word)
+            if not len(titles) and fuzzy:
+                titles, used_fuzzy = self._fuzzy_titles(word), True
+            titles = np.unique(titles)
+            matched = titles if matched is None else np.intersect1d(matched, titles, assume_unique=True)
+            if not len(matched):
+                break
+        return (np.empty(0, dtype=np.int64) if matched is None else matched), used_fuzzy
+
+    def rows(self, codes, selected=None):
+        """Sorted table rows of the given titles, kept to `selected` (row ids) if given."""
+        wanted = np.zeros(self.n_names, dtype=bool)
+        wanted[codes] = True
+        mask = wanted[self._row_codes]
+        if selected is not None:
+            in_selection = np.zeros(len(mask), dtype=bool)
+            in_selection[selected] = True
+            mask &= in_selection
+        return np.flatnonzero(mask)
+
+
+def top_titles(rows, limit=TITLE_LIMIT):
+    """Rows of the `limit` best-selling titles among `rows`, best title first."""
+    totals = rows.groupby("Name", observed=True, sort=False)["Global_Sales"].transform("sum")
+    ranked = rows.assign(_total=totals).sort_values(["_total", "Global_Sales"], ascending=False, kind="stable")
+    keep = ranked["Name"].drop_duplicates().iloc[:limit]
+    ranked = ranked[ranked["Name"].isin(keep)]
+    return ranked[[c for c in RESULT_COLUMNS if c in ranked.columns]].reset_index(drop=True)
@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Measures of every trend series, in column order
+TREND_MEASURES = ("NA_Sales", "EU_Sales", "JP_Sales", "Other_Sales", "Global_Sales")
+TREND_REGIONS = TREND_MEASURES[:4]
+GLOBAL = TREND_MEASURES.index("Global_Sales")
+# Platforms drawn as lifecycle curves, best-selling in the selection first
+LIFECYCLE_PLATFORMS = int(os.environ.get("LIFECYCLE_PLATFORMS", 8))
+
+
+# ---------------------------------------------
+# Prefix Sums over Years
+# ---------------------------------------------
+def prefix_sums(per_year, axis=0):
+    """Cumulative sums along the year axis with a leading zero.
+
+    prefix[stop] - prefix[start] is the total of years start..stop-1, so any
+    window costs one subtraction however many years it spans.
+    """
+    shape = list(per_year.shape)
+    shape[axis] = 1
+    return np.concatenate([np.zeros(shape), np.cumsum(per_year, axis=axis)], axis=axis)
+
+
+def value_year_sums(codes, years, weights, n_values, n_years):
+    """Sums `weights` into a (value, year) grid; one bincount per measure column."""
+    flat = codes.astype(np.int64) * n_years + years
+    return np.stack(
+        [np.bincount(flat, weights=column, minlength=n_values * n_years) for column in weights.T], axis=-1
+    ).reshape(n_values, n_years, weights.shape[1])
+
+
+class YearRollups:
+    """Per-(dimension value, Year) prefix sums of every trend measure.
+
+    Built once from the cube's cells. A selection constraining at most one
+    dimension is answered by adding the prefix rows of its values, which
+    costs O(values x years) and never touches cells or rows.
+    """
+
+    def __init__(self, cell_codes, cell_years, cell_measures, n_values, n_years):
+        self.n_years = n_years
+        self.prefix = {
+            dimension: prefix_sums(
+                value_year_sums(codes, cell_years, cell_measures, n_values[dimension], n_years), axis=1
+            )
+            for dimension, codes in cell_codes.items()
+        }
+        any_dimension = next(iter(self.prefix.values()))
+        self.total = any_dimension.sum(axis=0)
+        # A platform's launch is its first year with sales anywhere in the catalog
+        platform_sales = np.diff(self.prefix["Platform"][:, :, GLOBAL], axis=1)
+        self.launch = np.where(platform_sales.any(axis=1), np.argmax(platform_sales > 0, axis=1), -1)
+
+    def selection_prefix(self, dimension=None, codes=None):
+        """Year prefix of every measure over the rows whose `dimension` code is in `codes` (all rows if None)."""
+        if dimension is None:
+            return self.total
+        return self.prefix[dimension][codes].sum(axis=0)
+
+    def platform_years(self, codes=None):
+        """Global sales per (platform, year offset), for the given platform codes or all."""
+        prefix = self.prefix["Platform"][:, :, GLOBAL]
+        return np.diff(prefix if codes is None else prefix[codes], axis=1)
+
+
+def clip_years(prefix, year_min, year_range):
+    """The prefix restricted to a year range, rebased to start at zero, and the range's first year."""
+    n_years = len(prefix) - 1
+    start, stop = 0, n_years
+    if year_range is not None:
+        start = min(max(int(year_range[0]) - year_min, 0), n_years)
+        stop = min(max(int(year_range[1]) - year_min + 1, start), n_years)
+    return prefix[start:stop + 1] - prefix[start], year_min + start
+
+
+# ---------------------------------------------
+# Trend Frames
+# ---------------------------------------------
+def lifecycle_curves(platform_years, since_launch, names, top=LIFECYCLE_PLATFORMS):
+    """Sales of the `top` best-selling platforms by years since each one's launch.
+
+    `since_launch` is each platform's age in the first year of `platform_years`.
+    """
+    totals = platform_years.sum(axis=1)
+    order = [i for i in np.argsort(-totals, kind="stable")[:top] if totals[i] > 0]
+    frames = []
+    for i in order:
+        years = np.flatnonzero(platform_years[i])
+        frames.append(pd.DataFrame({
+            "Platform": names[i],
+            "Years_Since_Launch": years + since_launch[i],
+            "Global_Sales": platform_years[i, years],
+        }))
+    if not frames:
+        return pd.DataFrame({"Platform": [], "Years_Since_Launch": [], "Global_Sales": []})
+    return pd.concat(frames, ignore_index=True)
+
+
+def trend_frames(base, window=1):
+    """Regional series, growth and lifecycle frames for one selection.
+
+    `base` holds the selection's year prefix ("prefix", from "year_min") and
+    its "lifecycle" frame. Every series here is a difference of prefix rows,
+    so a rolling window of any width costs O(years).
+    """
+    prefix, year_min = base["prefix"], base["year_min"]
+    per_year = np.diff(prefix[:, GLOBAL])
+    present = np.flatnonzero(per_year)
+    if not len(present):
+        empty = pd.DataFrame({"Year": [], "Region": [], "Sales": []})
+        return {"regional": empty, "growth": pd.DataFrame({"Year": [], "Growth": []}),
+                "lifecycle": base["lifecycle"], "window": window}
+    # Leading and trailing years without sales are outside the selection's history
+    prefix = prefix[present[0]:present[-1] + 2]
+    year_min += present[0]
+    window = max(1, min(window, len(prefix) - 1))
+
+    # Trailing `window`-year means, from the first year with a full window
+    rolling = (prefix[window:] - prefix[:-window]) / window
+    years = np.arange(len(rolling)) + year_min + window - 1
+    regional = pd.DataFrame({
+        "Year": np.repeat(years, len(TREND_REGIONS)),
+        "Region": np.tile([region[:-len("_Sales")] for region in TREND_REGIONS], len(years)),
+        "Sales": rolling[:, :len(TREND_REGIONS)].ravel(),
+    })
+
+    # Change of each window's global sales over the window a year earlier
+    previous, current = rolling[:-1, GLOBAL], rolling[1:, GLOBAL]
+    valid = previous > 0
+    growth = pd.DataFrame({
+        "Year": years[1:][valid],
+        "Growth": current[valid] / previous[valid] - 1,
+    })
+    return {"regional": regional, "growth": growth, "lifecycle": base["lifecycle"], "window": window}